@@ -0,0 +1,101 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from accounts.revocation import revocation_list
+from accounts.user_cache import (
+    acache_user,
+    acurrent_generation,
+    aget_cached_user,
+    cache_user,
+    current_generation,
+    get_cached_user,
+)
+from config.db_routers import anote_user, note_user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that rejects revoked tokens (accounts.revocation) and
+    serves the token's user from accounts.user_cache instead of querying the
+    database on every request.
+    """
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if revocation_list.is_revoked(token):
+            raise InvalidToken(_("Token has been revoked"))
+        return token
+
+    async def aget_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if await revocation_list.ais_revoked(token):
+            raise InvalidToken(_("Token has been revoked"))
+        return token
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+    def check_user(self, user, validated_token):
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+    def get_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+        note_user(user_id)
+        user = get_cached_user(user_id)
+        if user is None:
+            # Read the generation first, so a save racing the lookup marks this copy stale.
+            generation = current_generation(user_id)
+            # Database lookup plus simplejwt's own checks; only valid users are cached.
+            user = super().get_user(validated_token)
+            cache_user(user, generation)
+            return user
+
+        self.check_user(user, validated_token)
+        return user
+
+    async def aget_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+        await anote_user(user_id)
+        user = await aget_cached_user(user_id)
+        if user is None:
+            generation = await acurrent_generation(user_id)
+            try:
+                user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            self.check_user(user, validated_token)
+            await acache_user(user, generation)
+            return user
+
+        self.check_user(user, validated_token)
+        return user
+
+    async def aauthenticate(self, request):
+        """
+        Async counterpart of authenticate() for async views. Token validation
+        is CPU-only; the revocation store is only read, off the event loop,
+        on a Bloom filter hit or resync.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = await self.aget_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import ModelBackend
 
+from accounts.hashers import check_password_with_upgrade
+
 User = get_user_model()
 
 
@@ -16,15 +18,15 @@ class CaseInsensitiveEmailBackend(ModelBackend):
             return None
         
         try:
-            # Case-insensitive email lookup
-            user = User.objects.get(email__iexact=username)
+            # Case-insensitive email lookup on the lower(email) index
+            user = User.objects.get_by_email(username)
         except User.DoesNotExist:
             # Run the default password hasher once to reduce timing
             # difference between existing and non-existing users
             User().set_password(password)
             return None
         
-        if user.check_password(password) and self.user_can_authenticate(user):
+        if check_password_with_upgrade(user, password) and self.user_can_authenticate(user):
             return user
         
         return None
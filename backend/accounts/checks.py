@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+REDIS_CACHE_BACKEND = "django.core.cache.backends.redis.RedisCache"
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_throttle_cache(app_configs, **kwargs):
+    """
+    Login throttle buckets live in the default cache; with anything but
+    Redis each worker process counts attempts on its own.
+    """
+    if settings.CACHES["default"]["BACKEND"] == REDIS_CACHE_BACKEND:
+        return []
+    return [
+        Warning(
+            "The default cache is not Redis, so login throttling is enforced per worker process.",
+            hint="Set REDIS_URL so LOGIN_THROTTLE buckets are shared and updated atomically.",
+            id="accounts.W001",
+        )
+    ]
@@ -0,0 +1,72 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import (
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+    make_password,
+    verify_password,
+)
+from django.db import connection
+
+from accounts.user_cache import invalidate_user
+
+logger = logging.getLogger(__name__)
+
+# A single worker bounds the CPU spent on upgrades, even during a login burst.
+_upgrade_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="password-upgrade")
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 with the iteration count taken from PASSWORD_HASH_ITERATIONS."""
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASH_ITERATIONS or PBKDF2PasswordHasher.iterations
+
+
+class ConfigurableScryptPasswordHasher(ScryptPasswordHasher):
+    """scrypt with the work factor taken from PASSWORD_HASH_WORK_FACTOR."""
+
+    @property
+    def work_factor(self):
+        return settings.PASSWORD_HASH_WORK_FACTOR or ScryptPasswordHasher.work_factor
+
+
+def _upgrade_password_hash(user_id, raw_password, old_encoded, background):
+    try:
+        # Compare-and-set so a concurrent password change is never overwritten.
+        get_user_model().objects.filter(pk=user_id, password=old_encoded).update(
+            password=make_password(raw_password)
+        )
+        # .update() skips post_save, so drop the cached copy here.
+        invalidate_user(user_id)
+    except Exception:
+        logger.exception("Password hash upgrade failed for user %s", user_id)
+    finally:
+        if background:
+            connection.close()
+
+
+def check_password_with_upgrade(user, raw_password):
+    """
+    Verify a password and, when the stored hash uses an outdated algorithm
+    or cost, re-hash it with the preferred hasher.
+
+    With PASSWORD_UPGRADE_IN_BACKGROUND the re-hash runs on a bounded
+    in-process worker thread after the login has been answered, so a
+    successful login never pays for two hashes. The plaintext never leaves
+    the process.
+    """
+    is_correct, must_update = verify_password(raw_password, user.password)
+    if is_correct and must_update:
+        background = settings.PASSWORD_UPGRADE_IN_BACKGROUND
+        if background:
+            _upgrade_executor.submit(
+                _upgrade_password_hash, user.pk, raw_password, user.password, True
+            )
+        else:
+            _upgrade_password_hash(user.pk, raw_password, user.password, False)
+    return is_correct
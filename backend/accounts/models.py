@@ -4,6 +4,7 @@ from django.contrib.auth.base_user import BaseUserManager
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 from django.db import models
+from django.db.models.functions import Lower
 
 
 
@@ -19,6 +20,13 @@ class UserManager(BaseUserManager):
         user.save()
         return user
 
+    def get_by_natural_key(self, username):
+        return self.get_by_email(username)
+
+    def get_by_email(self, email):
+        """Case-insensitive lookup served by the unique index on lower(email)."""
+        return self.alias(email_lower=Lower("email")).get(email_lower=email.strip().lower())
+
     def create_superuser(self, email, password, **extra_fields):
         extra_fields.setdefault("is_staff", True)
         extra_fields.setdefault("is_superuser", True)
@@ -54,5 +62,16 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     objects = UserManager()
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(Lower("email"), name="accounts_user_email_lower_uniq"),
+        ]
+
     def __str__(self):
         return self.email
+
+    def save(self, *args, **kwargs):
+        # Rows created outside create_user (e.g. the Django admin) are normalized too.
+        if self.email:
+            self.email = self.email.lower()
+        super().save(*args, **kwargs)
@@ -0,0 +1,213 @@
+"""
+JWT revocation without a per-request database lookup.
+
+Revoked token ids (`jti`) and per-user cut-offs (set on password change)
+are recorded in a store whose entries expire with the tokens they cover.
+Each process keeps a Bloom filter of everything in the store, rebuilt
+every TOKEN_REVOCATION["SYNC_INTERVAL"] seconds, so the per-request check
+is a few in-memory hash probes; the store is only consulted when the
+filter reports a possible hit.
+
+With REDIS_URL set the store is Redis and shared by all processes;
+otherwise it is an in-process dict, which is only correct for a single
+process (development and tests).
+"""
+import hashlib
+import math
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework_simplejwt.settings import api_settings
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter using double hashing over one blake2b digest."""
+
+    def __init__(self, capacity, error_rate):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class MemoryRevocationStore:
+    def __init__(self):
+        self._entries = {}  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+
+    def add(self, key, value, expires_at):
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= time.time():
+            return None
+        return entry[0]
+
+    def keys(self):
+        now = time.time()
+        with self._lock:
+            for key in [k for k, (_, exp) in self._entries.items() if exp <= now]:
+                del self._entries[key]
+            return list(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisRevocationStore:
+    """
+    One string key per entry (value, with a TTL matching the token) plus a
+    sorted set of all keys scored by expiry, which lets keys() enumerate the
+    live entries without SCAN.
+    """
+    prefix = "auth:revoked:"
+    index_key = "auth:revoked"
+
+    def __init__(self, url):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+
+    def add(self, key, value, expires_at):
+        ttl = max(1, math.ceil(expires_at - time.time()))
+        pipe = self.client.pipeline()
+        pipe.set(self.prefix + key, value, ex=ttl)
+        pipe.zadd(self.index_key, {key: expires_at})
+        pipe.execute()
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return value.decode() if value is not None else None
+
+    def keys(self):
+        now = time.time()
+        pipe = self.client.pipeline()
+        pipe.zremrangebyscore(self.index_key, "-inf", now)
+        pipe.zrange(self.index_key, 0, -1)
+        return [key.decode() for key in pipe.execute()[1]]
+
+    def clear(self):
+        keys = self.client.zrange(self.index_key, 0, -1)
+        self.client.delete(self.index_key, *(self.prefix + key.decode() for key in keys))
+
+
+class RevocationList:
+    def __init__(self, store):
+        self.store = store
+        self._filter = None
+        self._synced_at = 0.0
+        self._lock = threading.Lock()
+
+    def _config(self):
+        return settings.TOKEN_REVOCATION
+
+    def sync(self):
+        """Rebuild this process's Bloom filter from the store."""
+        config = self._config()
+        keys = self.store.keys()
+        bloom = BloomFilter(max(config["BLOOM_CAPACITY"], len(keys) * 2), config["BLOOM_ERROR_RATE"])
+        for key in keys:
+            bloom.add(key)
+        self._filter = bloom
+        self._synced_at = time.monotonic()
+
+    def _is_stale(self):
+        return self._filter is None or time.monotonic() - self._synced_at >= self._config()["SYNC_INTERVAL"]
+
+    def _bloom(self):
+        if self._is_stale():
+            # One thread rebuilds; the rest keep using the current filter.
+            if self._lock.acquire(blocking=self._filter is None):
+                try:
+                    if self._is_stale():
+                        self.sync()
+                finally:
+                    self._lock.release()
+        return self._filter
+
+    async def _abloom(self):
+        if self._is_stale():
+            await sync_to_async(self._bloom, thread_sensitive=False)()
+        return self._filter
+
+    def _add(self, key, value, expires_at):
+        self.store.add(key, value, expires_at)
+        self._bloom().add(key)
+
+    def revoke_token(self, token):
+        """Revoke one token until it expires."""
+        self._add(f"jti:{token[api_settings.JTI_CLAIM]}", "1", token["exp"])
+
+    def revoke_user(self, user_id, lifetime=None):
+        """
+        Revoke every token issued to the user before the current second.
+
+        `iat` has one-second resolution, so tokens issued within the same
+        second as the cut-off stay valid; this is what lets a fresh pair be
+        issued immediately afterwards.
+        """
+        if lifetime is None:
+            lifetime = max(api_settings.ACCESS_TOKEN_LIFETIME, api_settings.REFRESH_TOKEN_LIFETIME)
+        now = time.time()
+        self._add(f"user:{user_id}", str(int(now)), now + lifetime.total_seconds())
+
+    def clear(self):
+        self.store.clear()
+        self._filter = None
+
+    def is_revoked(self, token):
+        bloom = self._bloom()
+        jti_key = f"jti:{token.get(api_settings.JTI_CLAIM)}"
+        if jti_key in bloom and self.store.get(jti_key) is not None:
+            return True
+
+        user_key = f"user:{token.get(api_settings.USER_ID_CLAIM)}"
+        if user_key in bloom:
+            cutoff = self.store.get(user_key)
+            if cutoff is not None and token.get("iat", 0) < int(cutoff):
+                return True
+        return False
+
+    async def ais_revoked(self, token):
+        """
+        is_revoked() for the event loop: the probes stay on the loop, while
+        filter rebuilds and store reads (Redis round trips) run in a thread.
+        """
+        bloom = await self._abloom()
+        get = sync_to_async(self.store.get, thread_sensitive=False)
+        jti_key = f"jti:{token.get(api_settings.JTI_CLAIM)}"
+        if jti_key in bloom and await get(jti_key) is not None:
+            return True
+
+        user_key = f"user:{token.get(api_settings.USER_ID_CLAIM)}"
+        if user_key in bloom:
+            cutoff = await get(user_key)
+            if cutoff is not None and token.get("iat", 0) < int(cutoff):
+                return True
+        return False
+
+
+def _make_store():
+    url = settings.TOKEN_REVOCATION["REDIS_URL"]
+    return RedisRevocationStore(url) if url else MemoryRevocationStore()
+
+
+revocation_list = RevocationList(_make_store())
@@ -0,0 +1,21 @@
+"""
+OpenAPI extensions for drf-spectacular.
+
+drf-spectacular only sees extensions whose module has been imported. This
+module is listed in SPECTACULAR_SETTINGS["PREPROCESSING_HOOKS"], which the
+generator imports before building any operation, so every path that
+renders a schema (the schema views, `manage.py spectacular`, build_schema
+and drf-spectacular's system check) registers them, while django.setup()
+never loads drf-spectacular's plumbing.
+"""
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    """Document CachedJWTAuthentication as the bearer scheme SimpleJWTScheme only matches by exact class."""
+    target_class = "accounts.authentication.CachedJWTAuthentication"
+
+
+def register_extensions(endpoints):
+    """Preprocessing hook; importing this module is what registers the extensions above."""
+    return endpoints
@@ -1,6 +1,17 @@
 from django.contrib.auth import get_user_model
+from django.contrib.auth.password_validation import validate_password
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+    TokenVerifySerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken, UntypedToken
+
+from accounts.revocation import revocation_list
 
 User = get_user_model()
 
@@ -15,19 +26,28 @@ class UserSerializer(serializers.ModelSerializer):
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, min_length=8)
 
+    duplicate_email_message = "A user with that email already exists."
+
     class Meta:
         model = User
         fields = ("id", "email", "username", "password")
         read_only_fields = ("id",)
+        # Uniqueness is enforced by the lower(email) constraint instead of a
+        # pre-check query; see create().
+        extra_kwargs = {"email": {"validators": []}}
 
     def validate_email(self, value):
-        if User.objects.filter(email__iexact=value).exists():
-            raise serializers.ValidationError("A user with that email already exists.")
-        return value
+        return value.lower()
 
     def create(self, validated_data):
         password = validated_data.pop("password")
-        return User.objects.create_user(password=password, **validated_data)
+        try:
+            with transaction.atomic():
+                return User.objects.create_user(password=password, **validated_data)
+        except IntegrityError as exc:
+            if "email" not in str(exc).lower():
+                raise
+            raise serializers.ValidationError({"email": [self.duplicate_email_message]})
 
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
@@ -49,3 +69,46 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         data = super().validate(attrs)
         data["user"] = UserSerializer(self.user).data
         return data
+
+
+class RevocationCheckedTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        if revocation_list.is_revoked(RefreshToken(attrs["refresh"])):
+            raise InvalidToken("Token has been revoked")
+        return super().validate(attrs)
+
+
+class RevocationCheckedTokenVerifySerializer(TokenVerifySerializer):
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        if revocation_list.is_revoked(UntypedToken(attrs["token"])):
+            raise InvalidToken("Token has been revoked")
+        return data
+
+
+class LogoutSerializer(serializers.Serializer):
+    """Optionally accept the refresh token so it is revoked along with the access token."""
+    refresh = serializers.CharField(required=False)
+
+    def validate_refresh(self, value):
+        try:
+            token = RefreshToken(value)
+        except TokenError as exc:
+            raise serializers.ValidationError(str(exc))
+        if str(token.get(api_settings.USER_ID_CLAIM)) != str(self.context["request"].user.pk):
+            raise serializers.ValidationError("Token belongs to another user.")
+        return token
+
+
+class ChangePasswordSerializer(serializers.Serializer):
+    old_password = serializers.CharField(write_only=True)
+    new_password = serializers.CharField(write_only=True, min_length=8)
+
+    def validate_old_password(self, value):
+        if not self.context["request"].user.check_password(value):
+            raise serializers.ValidationError("Incorrect password.")
+        return value
+
+    def validate_new_password(self, value):
+        validate_password(value, self.context["request"].user)
+        return value
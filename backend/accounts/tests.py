@@ -1,9 +1,35 @@
-from django.test import TestCase
+import asyncio
+import threading
+import time
+from unittest import skipUnless
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from .checks import REDIS_CACHE_BACKEND, check_shared_throttle_cache
+from .revocation import BloomFilter, revocation_list
 from .serializers import RegisterSerializer
+from .throttling import take_token
+from .user_cache import (
+    TTLLRUCache,
+    _shared_key,
+    cache_user,
+    current_generation,
+    get_cached_user,
+    invalidate_user,
+    local_cache,
+)
 
 User = get_user_model()
 
@@ -61,12 +87,50 @@ class RegisterSerializerTests(TestCase):
             "username": "newuser"
         }
         serializer = RegisterSerializer(data=data)
-        self.assertFalse(serializer.is_valid())
-        self.assertIn("email", serializer.errors)
-        self.assertEqual(str(serializer.errors["email"][0]), "A user with that email already exists.")
+        self.assertTrue(serializer.is_valid())
+        with self.assertRaises(ValidationError) as ctx:
+            serializer.save()
+        self.assertIn("email", ctx.exception.detail)
+        self.assertEqual(str(ctx.exception.detail["email"][0]), "A user with that email already exists.")
+
+    def test_duplicate_check_relies_on_constraint(self):
+        """
+        Test that validation does not run a separate existence query for the email.
+        """
+        serializer = RegisterSerializer(data=self.user_data)
+        with self.assertNumQueries(1):  # username uniqueness only
+            self.assertTrue(serializer.is_valid())
+
+
+class CaseInsensitiveEmailIndexTests(TestCase):
+    def test_save_lowercases_email(self):
+        """
+        Test that rows saved outside create_user are normalized too.
+        """
+        user = User(email="Admin.Made@Example.COM", username="adminmade")
+        user.set_password("password123")
+        user.save()
+        self.assertEqual(user.email, "admin.made@example.com")
+
+    def test_lower_email_constraint_rejects_case_duplicates(self):
+        """
+        Test that the functional unique index rejects case-only duplicates.
+        """
+        User.objects.create_user(email="dup@example.com", password="password123")
+        with self.assertRaises(IntegrityError):
+            User.objects.bulk_create([User(email="DUP@example.com", username="dup2")])
+
+    def test_get_by_email_is_case_insensitive(self):
+        """
+        Test lookups by email ignore casing and surrounding whitespace.
+        """
+        user = User.objects.create_user(email="find@example.com", password="password123")
+        self.assertEqual(User.objects.get_by_email(" FIND@Example.com "), user)
+
 
 class AuthIntegrationTests(APITestCase):
     def setUp(self):
+        cache.clear()  # login throttle buckets
         self.register_url = reverse("register")
         self.login_url = reverse("token_obtain_pair")
         self.me_url = reverse("me")
@@ -181,3 +245,350 @@ class AuthIntegrationTests(APITestCase):
         }
         response = self.client.post(self.login_url, data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+LOGIN_THROTTLE_FOR_TESTS = {
+    "login_ip": {"capacity": 3, "refill_per_minute": 1},
+    "login_email": {"capacity": 2, "refill_per_minute": 1},
+}
+
+
+@override_settings(LOGIN_THROTTLE=LOGIN_THROTTLE_FOR_TESTS)
+class LoginThrottleTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.login_url = reverse("token_obtain_pair")
+        User.objects.create_user(email="target@example.com", password="strongpassword123")
+
+    def test_email_bucket_is_shared_across_casing(self):
+        """
+        Test repeated attempts on one email are throttled regardless of casing.
+        """
+        for email in ("target@example.com", "TARGET@example.com"):
+            response = self.client.post(self.login_url, {"email": email, "password": "wrong-password"})
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = self.client.post(self.login_url, {"email": " Target@Example.com", "password": "x"})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", response)
+
+    def test_throttled_request_skips_password_hashing(self):
+        """
+        Test the IP bucket rejects a burst before any password is hashed.
+        """
+        for i in range(3):
+            self.client.post(self.login_url, {"email": f"nobody{i}@example.com", "password": "x"})
+
+        with patch("accounts.backends.check_password_with_upgrade") as mock_check, \
+                patch("accounts.backends.User.set_password") as mock_set_password:
+            response = self.client.post(self.login_url, {"email": "target@example.com", "password": "x"})
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        mock_check.assert_not_called()
+        mock_set_password.assert_not_called()
+
+
+class TokenBucketConcurrencyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def spend_concurrently(self, attempts, capacity):
+        results = []
+        barrier = threading.Barrier(attempts)
+
+        def attempt():
+            barrier.wait()
+            results.append(take_token("throttle:test:bucket", capacity, 1 / 60, 60)[0])
+
+        threads = [threading.Thread(target=attempt) for _ in range(attempts)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_attempts_cannot_overspend(self):
+        """
+        Test simultaneous attempts spend each token once, even with a slow cache read between refill and spend.
+        """
+        original_get = LocMemCache.get
+
+        def slow_get(self, *args, **kwargs):
+            value = original_get(self, *args, **kwargs)
+            time.sleep(0.01)
+            return value
+
+        # Cache handles are per thread, so slow down the backend class itself.
+        with patch.object(LocMemCache, "get", slow_get):
+            results = self.spend_concurrently(attempts=10, capacity=3)
+        self.assertEqual(results.count(True), 3)
+
+    @skipUnless(isinstance(cache, RedisCache), "requires the Redis cache (REDIS_URL)")
+    def test_redis_bucket_is_atomic(self):
+        """
+        Test the Lua script spends each token once across concurrent clients.
+        """
+        results = self.spend_concurrently(attempts=10, capacity=3)
+        self.assertEqual(results.count(True), 3)
+
+    def test_deploy_check_requires_shared_cache(self):
+        """
+        Test check --deploy warns when throttle buckets would be per process.
+        """
+        locmem = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+        redis = {"default": {"BACKEND": REDIS_CACHE_BACKEND, "LOCATION": "redis://localhost:6379/0"}}
+        with override_settings(CACHES=locmem):
+            self.assertEqual([w.id for w in check_shared_throttle_cache(None)], ["accounts.W001"])
+        with override_settings(CACHES=redis):
+            self.assertEqual(check_shared_throttle_cache(None), [])
+
+
+@override_settings(PASSWORD_UPGRADE_IN_BACKGROUND=False)
+class PasswordHashUpgradeTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_login_upgrades_outdated_hash(self):
+        """
+        Test a successful login re-hashes a password stored with an old cost.
+        """
+        with override_settings(PASSWORD_HASH_ITERATIONS=1000):
+            user = User.objects.create_user(email="legacy@example.com", password="strongpassword123")
+        self.assertIn("$1000$", user.password)
+
+        with override_settings(PASSWORD_HASH_ITERATIONS=2000):
+            response = self.client.post(
+                reverse("token_obtain_pair"),
+                {"email": "legacy@example.com", "password": "strongpassword123"},
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$2000$"))
+        self.assertTrue(user.check_password("strongpassword123"))
+
+
+class CachedJWTAuthenticationTests(APITestCase):
+    def setUp(self):
+        local_cache.clear()
+        self.user = User.objects.create_user(email="cached@example.com", password="strongpassword123")
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.me_url = reverse("me")
+
+    def test_repeat_requests_skip_user_query(self):
+        """
+        Test the token's user is loaded once and then served from the cache.
+        """
+        self.assertEqual(self.client.get(self.me_url).status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.me_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["email"], "cached@example.com")
+
+    def test_deactivation_invalidates_cached_user(self):
+        """
+        Test saving the user drops the cached copy so deactivation applies at once.
+        """
+        self.assertEqual(self.client.get(self.me_url).status_code, status.HTTP_200_OK)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.me_url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_user_is_not_served_from_cache(self):
+        """
+        Test a deleted user's token stops authenticating.
+        """
+        self.assertEqual(self.client.get(self.me_url).status_code, status.HTTP_200_OK)
+        self.user.delete()
+        self.assertEqual(self.client.get(self.me_url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cached_user_is_a_private_copy(self):
+        """
+        Test mutating one request's user does not leak into the cache.
+        """
+        cache_user(self.user, 0)
+        first = get_cached_user(self.user.pk)
+        first.username = "changed"
+        self.assertNotEqual(get_cached_user(self.user.pk).username, "changed")
+
+
+@override_settings(AUTH_USER_CACHE={**settings.AUTH_USER_CACHE, "SHARED_CACHE_ALIAS": "default"})
+class SharedUserCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create_user(email="shared@example.com", password="strongpassword123")
+
+    def test_save_in_another_process_invalidates_local_copy(self):
+        """
+        Test a save elsewhere, which only reaches the shared tier, stops this process serving its local copy.
+        """
+        cache_user(self.user, current_generation(self.user.pk))
+        self.assertIsNotNone(get_cached_user(self.user.pk))
+
+        with patch("accounts.user_cache.local_cache", TTLLRUCache(maxsize=10, ttl=30)):
+            invalidate_user(self.user.pk)
+
+        self.assertIsNone(get_cached_user(self.user.pk))
+
+    def test_entry_cached_under_an_old_generation_is_stale(self):
+        """
+        Test a copy loaded before a concurrent save is not served after it.
+        """
+        generation = current_generation(self.user.pk)
+        invalidate_user(self.user.pk)
+        cache_user(self.user, generation)
+        self.assertIsNone(get_cached_user(self.user.pk))
+
+        cache_user(self.user, current_generation(self.user.pk))
+        self.assertEqual(get_cached_user(self.user.pk).email, "shared@example.com")
+
+    def test_password_hash_is_not_cached(self):
+        """
+        Test the shared tier holds no password hash and cached users load it only when asked.
+        """
+        cache_user(self.user, current_generation(self.user.pk))
+        self.assertNotIn("password", cache.get(_shared_key(self.user.pk))["fields"])
+
+        local_cache.clear()
+        with self.assertNumQueries(0):
+            user = get_cached_user(self.user.pk)
+        with self.assertNumQueries(1):
+            self.assertTrue(user.check_password("strongpassword123"))
+
+
+class TTLLRUCacheTests(TestCase):
+    def test_evicts_least_recently_used(self):
+        """
+        Test the cache stays within its size bound, evicting the oldest entry.
+        """
+        lru = TTLLRUCache(maxsize=2, ttl=60)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        lru.get("a")
+        lru.set("c", 3)
+        self.assertEqual(lru.get("a"), 1)
+        self.assertIsNone(lru.get("b"))
+        self.assertEqual(len(lru), 2)
+
+    def test_entries_expire(self):
+        """
+        Test entries older than the TTL are treated as misses.
+        """
+        lru = TTLLRUCache(maxsize=2, ttl=30)
+        with patch("accounts.user_cache.time.monotonic", return_value=100.0):
+            lru.set("a", 1)
+        with patch("accounts.user_cache.time.monotonic", return_value=131.0):
+            self.assertIsNone(lru.get("a"))
+
+
+class TokenRevocationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        revocation_list.clear()
+        self.user = User.objects.create_user(email="revoke@example.com", password="strongpassword123")
+        self.refresh = RefreshToken.for_user(self.user)
+        self.access = self.refresh.access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access}")
+
+    def tearDown(self):
+        # User ids are reused after rollback; don't leak revocations into other tests.
+        revocation_list.clear()
+
+    def test_logout_revokes_access_and_refresh_tokens(self):
+        """
+        Test logging out rejects the access token and the submitted refresh token.
+        """
+        response = self.client.post(reverse("logout"), {"refresh": str(self.refresh)})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.client.get(reverse("me")).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.credentials()
+        response = self.client.post(reverse("token_refresh"), {"refresh": str(self.refresh)})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_logout_rejects_another_users_refresh_token(self):
+        """
+        Test a user cannot revoke someone else's refresh token.
+        """
+        other = User.objects.create_user(email="other@example.com", password="strongpassword123")
+        response = self.client.post(reverse("logout"), {"refresh": str(RefreshToken.for_user(other))})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_check_skips_store_when_filter_misses(self):
+        """
+        Test unrevoked tokens are accepted without consulting the store.
+        """
+        with patch.object(revocation_list.store, "get") as mock_get:
+            response = self.client.get(reverse("me"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_get.assert_not_called()
+
+    def test_password_change_revokes_earlier_tokens(self):
+        """
+        Test changing the password revokes tokens issued before it and returns a working pair.
+        """
+        with patch("accounts.revocation.time.time", return_value=time.time() + 5):
+            response = self.client.post(
+                reverse("change_password"),
+                {"old_password": "strongpassword123", "new_password": "newstrongpassword456"},
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.client.credentials()
+        response = self.client.post(reverse("token_refresh"), {"refresh": str(self.refresh)})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.assertTrue(User.objects.get(pk=self.user.pk).check_password("newstrongpassword456"))
+
+    def test_password_change_requires_old_password(self):
+        """
+        Test the current password must be supplied to change it.
+        """
+        response = self.client.post(
+            reverse("change_password"),
+            {"old_password": "wrongpassword", "new_password": "newstrongpassword456"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_async_check_does_store_io_off_the_event_loop(self):
+        """
+        Test async authentication rebuilds the filter and reads the store outside the event loop.
+        """
+        await sync_to_async(revocation_list.revoke_token)(self.access)
+        revocation_list._synced_at = 0.0
+        calls = []
+
+        def record(method):
+            def wrapper(*args):
+                try:
+                    asyncio.get_running_loop()
+                except RuntimeError:
+                    calls.append((method.__name__, "thread"))
+                else:
+                    calls.append((method.__name__, "event loop"))
+                return method(*args)
+            return wrapper
+
+        store = revocation_list.store
+        with patch.object(store, "keys", record(store.keys)), patch.object(store, "get", record(store.get)):
+            response = await self.async_client.get(
+                "/api/async/tasks/", headers={"Authorization": f"Bearer {self.access}"}
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(calls, [("keys", "thread"), ("get", "thread")])
+
+
+class BloomFilterTests(TestCase):
+    def test_added_items_are_members(self):
+        """
+        Test the filter has no false negatives.
+        """
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        items = [f"jti:{i}" for i in range(1000)]
+        for item in items:
+            bloom.add(item)
+        self.assertTrue(all(item in bloom for item in items))
+        false_positives = sum(f"other:{i}" in bloom for i in range(1000))
+        self.assertLess(false_positives, 50)
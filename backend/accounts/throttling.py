@@ -0,0 +1,112 @@
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.redis import RedisCache
+from rest_framework.throttling import BaseThrottle
+
+# Refill and spend in one step on the Redis server, timed by the server's
+# clock, so concurrent attempts from any worker can't spend the same token.
+TAKE_TOKEN_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'stamp')
+local tokens = tonumber(state[1]) or capacity
+local stamp = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - stamp) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'stamp', tostring(now))
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return {allowed, tostring(tokens)}
+"""
+
+_local_lock = threading.Lock()
+
+
+def take_token(key, capacity, rate, timeout):
+    """
+    Refill the bucket at `key` and try to spend one token. Returns
+    (allowed, tokens left). Atomic across processes with the Redis cache;
+    any other cache backend is only serialized within this process, which
+    is all a per-process LocMemCache can offer anyway (see
+    accounts.checks).
+    """
+    if isinstance(cache, RedisCache):
+        key = cache.make_and_validate_key(key)
+        client = cache._cache.get_client(key, write=True)
+        allowed, tokens = client.register_script(TAKE_TOKEN_SCRIPT)(keys=[key], args=[capacity, rate, timeout])
+        return bool(allowed), float(tokens)
+
+    with _local_lock:
+        now = time.time()
+        tokens, stamp = cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - stamp) * rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        cache.set(key, (tokens, now), timeout)
+    return allowed, tokens
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token bucket stored in the default cache.
+
+    Each key holds up to `capacity` tokens and regains `refill_per_minute`
+    per minute; a request spends one token. Settings are read per request
+    from LOGIN_THROTTLE[scope] so they can be tuned without code changes.
+    Buckets are only shared between workers when the default cache is
+    Redis (REDIS_URL).
+    """
+    scope = None
+
+    def get_cache_key(self, request, view):
+        raise NotImplementedError(".get_cache_key() must be overridden")
+
+    def allow_request(self, request, view):
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+
+        config = settings.LOGIN_THROTTLE[self.scope]
+        capacity = config["capacity"]
+        rate = config["refill_per_minute"] / 60.0
+        timeout = math.ceil(capacity / rate)
+
+        allowed, tokens = take_token(key, capacity, rate, timeout)
+        if not allowed:
+            self.wait_seconds = (1 - tokens) / rate
+        return allowed
+
+    def wait(self):
+        return getattr(self, "wait_seconds", None)
+
+    def make_key(self, ident):
+        digest = hashlib.sha256(ident.encode()).hexdigest()
+        return f"throttle:{self.scope}:{digest}"
+
+
+class LoginIPThrottle(TokenBucketThrottle):
+    scope = "login_ip"
+
+    def get_cache_key(self, request, view):
+        return self.make_key(self.get_ident(request) or "")
+
+
+class LoginEmailThrottle(TokenBucketThrottle):
+    scope = "login_email"
+
+    def get_cache_key(self, request, view):
+        email = request.data.get("email") if hasattr(request.data, "get") else None
+        if not isinstance(email, str) or not email.strip():
+            return None
+        return self.make_key(email.strip().lower())
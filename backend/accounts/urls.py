@@ -8,4 +8,5 @@ urlpatterns = [
     path("token/verify/", views.TokenVerifyView.as_view(), name="token_verify"),
     path("me/", views.CurrentUserView.as_view(), name="me"),
     path("logout/", views.LogoutView.as_view(), name="logout"),
+    path("password/change/", views.ChangePasswordView.as_view(), name="change_password"),
 ]
@@ -0,0 +1,178 @@
+"""
+Two-tier cache of authenticated users.
+
+The first tier is a bounded, per-process LRU with a short TTL; the optional
+second tier is a Django cache shared by all processes. Only the user's
+plain fields are cached, never the password hash: cached users come back
+with the password deferred, so the rare caller that needs it (a password
+change) loads it from the database.
+
+Saving or deleting a user (see accounts.signals) bumps a per-user
+generation counter in the shared tier. Entries remember the generation
+they were cached under and are only served while it is still current, so
+a save in one process invalidates every process's local tier at the cost
+of one small shared-cache read per hit. Without a shared tier, other
+processes' local tiers catch up within the local TTL.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+
+
+class TTLLRUCache:
+    """Thread-safe LRU mapping whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+
+
+_config = settings.AUTH_USER_CACHE
+local_cache = TTLLRUCache(_config["MAX_SIZE"], _config["TTL"])
+
+
+def _shared_cache():
+    alias = settings.AUTH_USER_CACHE["SHARED_CACHE_ALIAS"]
+    return caches[alias] if alias else None
+
+
+def _shared_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def _generation_key(user_id):
+    return f"auth:user-generation:{user_id}"
+
+
+def _cached_fields():
+    return [field.attname for field in get_user_model()._meta.concrete_fields if field.attname != "password"]
+
+
+def _fields(user):
+    return {name: getattr(user, name) for name in _cached_fields()}
+
+
+def _build(fields):
+    # A fresh instance per call: callers may mutate request.user.
+    names = _cached_fields()
+    return get_user_model().from_db(None, names, [fields[name] for name in names])
+
+
+def _from_shared(key, values):
+    """Rebuild a user from a shared-tier lookup and keep it locally, or None if missing or stale."""
+    generation = values.get(_generation_key(key), 0)
+    entry = values.get(_shared_key(key))
+    if entry is None or entry["generation"] != generation:
+        return None
+    local_cache.set(key, (generation, entry["fields"]))
+    return _build(entry["fields"])
+
+
+def current_generation(user_id):
+    """The generation to pass to cache_user(); read it before loading the user."""
+    shared = _shared_cache()
+    return 0 if shared is None else shared.get(_generation_key(user_id), 0)
+
+
+async def acurrent_generation(user_id):
+    shared = _shared_cache()
+    return 0 if shared is None else await shared.aget(_generation_key(user_id), 0)
+
+
+def get_cached_user(user_id):
+    """Return a private copy of the cached user, or None on a miss."""
+    key = str(user_id)
+    shared = _shared_cache()
+    entry = local_cache.get(key)
+    if entry is not None:
+        generation, fields = entry
+        if shared is None or shared.get(_generation_key(key), 0) == generation:
+            return _build(fields)
+    if shared is None:
+        return None
+    return _from_shared(key, shared.get_many([_shared_key(key), _generation_key(key)]))
+
+
+async def aget_cached_user(user_id):
+    key = str(user_id)
+    shared = _shared_cache()
+    entry = local_cache.get(key)
+    if entry is not None:
+        generation, fields = entry
+        if shared is None or await shared.aget(_generation_key(key), 0) == generation:
+            return _build(fields)
+    if shared is None:
+        return None
+    return _from_shared(key, await shared.aget_many([_shared_key(key), _generation_key(key)]))
+
+
+def cache_user(user, generation):
+    key = str(user.pk)
+    fields = _fields(user)
+    local_cache.set(key, (generation, fields))
+    shared = _shared_cache()
+    if shared is not None:
+        shared.set(
+            _shared_key(key), {"generation": generation, "fields": fields}, settings.AUTH_USER_CACHE["SHARED_TTL"]
+        )
+
+
+async def acache_user(user, generation):
+    key = str(user.pk)
+    fields = _fields(user)
+    local_cache.set(key, (generation, fields))
+    shared = _shared_cache()
+    if shared is not None:
+        await shared.aset(
+            _shared_key(key), {"generation": generation, "fields": fields}, settings.AUTH_USER_CACHE["SHARED_TTL"]
+        )
+
+
+def invalidate_user(user_id):
+    key = str(user_id)
+    local_cache.delete(key)
+    shared = _shared_cache()
+    if shared is not None:
+        # Never expires: if the counter could vanish, an entry cached under
+        # generation 0 before the save would look current again.
+        if not shared.add(_generation_key(key), 1, None):
+            shared.incr(_generation_key(key))
+        shared.delete(_shared_key(key))
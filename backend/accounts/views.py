@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.http import JsonResponse
 from rest_framework import generics, status
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
@@ -9,9 +10,16 @@ from rest_framework_simplejwt.views import (
     TokenVerifyView as _TokenVerifyView,
 )
 
+from accounts.revocation import revocation_list
+from config.async_api import async_api_view
+from accounts.throttling import LoginEmailThrottle, LoginIPThrottle
 from accounts.serializers import (
+    ChangePasswordSerializer,
     CustomTokenObtainPairSerializer,
+    LogoutSerializer,
     RegisterSerializer,
+    RevocationCheckedTokenRefreshSerializer,
+    RevocationCheckedTokenVerifySerializer,
     UserSerializer,
 )
 
@@ -26,13 +34,17 @@ class RegisterView(generics.CreateAPIView):
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
     permission_classes = [AllowAny]
+    # Throttles run in initial(), before the serializer hashes anything.
+    throttle_classes = [LoginIPThrottle, LoginEmailThrottle]
 
 
 class TokenRefreshView(_TokenRefreshView):
+    serializer_class = RevocationCheckedTokenRefreshSerializer
     permission_classes = [AllowAny]
 
 
 class TokenVerifyView(_TokenVerifyView):
+    serializer_class = RevocationCheckedTokenVerifySerializer
     permission_classes = [AllowAny]
 
 
@@ -44,9 +56,45 @@ class CurrentUserView(generics.RetrieveAPIView):
         return self.request.user
 
 
+@async_api_view
+async def current_user_async(request, user):
+    """GET /api/async/accounts/me/ - async counterpart of CurrentUserView."""
+    return JsonResponse(UserSerializer(user).data)
+
+
 class LogoutView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        # JWT is stateless; clients should forget tokens. This endpoint exists for symmetry.
+        serializer = LogoutSerializer(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+
+        # request.auth is the access token for JWT requests, None for sessions.
+        if request.auth is not None:
+            revocation_list.revoke_token(request.auth)
+        refresh = serializer.validated_data.get("refresh")
+        if refresh is not None:
+            revocation_list.revoke_token(refresh)
         return Response({"detail": "Logged out"}, status=status.HTTP_200_OK)
+
+
+class ChangePasswordView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = ChangePasswordSerializer(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+
+        user = request.user
+        user.set_password(serializer.validated_data["new_password"])
+        user.save(update_fields=["password"])
+
+        # Revoke every token issued so far and hand back a fresh pair.
+        revocation_list.revoke_user(user.pk)
+        if request.auth is not None:
+            revocation_list.revoke_token(request.auth)
+        refresh = CustomTokenObtainPairSerializer.get_token(user)
+        return Response(
+            {"refresh": str(refresh), "access": str(refresh.access_token)},
+            status=status.HTTP_200_OK,
+        )
@@ -0,0 +1,29 @@
+from django.contrib import admin
+from .models import AdminLog, NotificationJob, NotificationTemplate, OutboxMessage
+
+
+@admin.register(NotificationTemplate)
+class NotificationTemplateAdmin(admin.ModelAdmin):
+    list_display = ['title', 'is_active', 'created_at', 'updated_at']
+    list_filter = ['is_active', 'created_at']
+    search_fields = ['title', 'subject']
+
+
+@admin.register(NotificationJob)
+class NotificationJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'created_by', 'total', 'sent', 'failed', 'created_at']
+    readonly_fields = ['id', 'created_by', 'total', 'sent', 'failed', 'created_at', 'updated_at']
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ['id', 'task_name', 'attempts', 'available_at', 'created_at']
+    readonly_fields = ['task_id', 'task_name', 'args', 'kwargs', 'created_at', 'last_error']
+
+
+@admin.register(AdminLog)
+class AdminLogAdmin(admin.ModelAdmin):
+    list_display = ['admin_email', 'action', 'created_at']
+    list_filter = ['action']
+    search_fields = ['admin_email', 'description']
+    readonly_fields = ['admin', 'admin_email', 'action', 'description', 'created_at']
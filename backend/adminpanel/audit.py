@@ -0,0 +1,175 @@
+"""
+Buffered AdminLog writer and retention.
+
+record() only appends an unsaved AdminLog to a per-process buffer. The
+buffer is written with a single bulk_create once it holds
+AUDIT_LOG_BATCH_SIZE entries or its oldest entry is AUDIT_LOG_FLUSH_INTERVAL
+seconds old. The check runs on request_finished, after the response has
+been handed to the server, so no admin request waits on the INSERT, and
+in a background thread started per worker process by start_flusher()
+(gunicorn post_fork, Celery worker_process_init, config.asgi), so an idle
+worker doesn't sit on its entries. Whatever is left is flushed when the
+process exits: atexit, the gunicorn worker_exit hook and Celery's
+worker_process_shutdown.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import close_old_connections, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import AdminLog, AdminLogDailySummary
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLogBuffer:
+    def __init__(self):
+        self._entries = []
+        self._oldest = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, entry):
+        with self._lock:
+            if not self._entries:
+                self._oldest = time.monotonic()
+            if len(self._entries) >= settings.AUDIT_LOG_MAX_BUFFER:
+                # The database has been unreachable for a while; keep the newest entries.
+                self._entries.pop(0)
+                logger.error("Audit log buffer full, dropping the oldest entry")
+            self._entries.append(entry)
+
+    def is_due(self):
+        return bool(self._entries) and (
+            len(self._entries) >= settings.AUDIT_LOG_BATCH_SIZE
+            or time.monotonic() - self._oldest >= settings.AUDIT_LOG_FLUSH_INTERVAL
+        )
+
+    def flush(self):
+        """Write every buffered entry; returns how many were written."""
+        with self._lock:
+            entries, self._entries = self._entries, []
+            oldest, self._oldest = self._oldest, None
+        if not entries:
+            return 0
+        try:
+            AdminLog.objects.bulk_create(entries, batch_size=settings.AUDIT_LOG_BATCH_SIZE)
+        except Exception:
+            logger.exception("Writing %d audit log entries failed; keeping them for the next flush", len(entries))
+            with self._lock:
+                self._entries[:0] = entries
+                self._oldest = oldest
+            return 0
+        return len(entries)
+
+
+buffer = AuditLogBuffer()
+
+
+def record(admin, action, description=""):
+    """Queue an AdminLog entry for `admin`; it is written in the next batch."""
+    entry = AdminLog(
+        admin=admin, admin_email=admin.email, action=action, description=description, created_at=timezone.now()
+    )
+    if settings.AUDIT_LOG_BUFFERED:
+        buffer.add(entry)
+    else:
+        entry.save()
+
+
+def flush():
+    return buffer.flush()
+
+
+def flush_if_due(**kwargs):
+    if buffer.is_due():
+        buffer.flush()
+
+
+def _flush_from_thread():
+    if not buffer.is_due():
+        return
+    # Same connection hygiene as a request: drop a stale connection before
+    # the INSERT and release this thread's connection after it.
+    close_old_connections()
+    try:
+        buffer.flush()
+    finally:
+        close_old_connections()
+
+
+def _run_flusher():
+    while True:
+        time.sleep(settings.AUDIT_LOG_FLUSH_INTERVAL)
+        try:
+            _flush_from_thread()
+        except Exception:
+            logger.exception("Background audit log flush failed")
+
+
+_flusher_pid = None
+_flusher_lock = threading.Lock()
+
+
+def start_flusher():
+    """Start this process's flusher thread; call it after forking, a forked child doesn't inherit threads."""
+    global _flusher_pid
+    with _flusher_lock:
+        if _flusher_pid == os.getpid():
+            return
+        _flusher_pid = os.getpid()
+        threading.Thread(target=_run_flusher, name="audit-log-flusher", daemon=True).start()
+
+
+request_finished.connect(flush_if_due, dispatch_uid="adminpanel.audit.flush_if_due")
+# Backstop for entries recorded after the flusher's last pass.
+atexit.register(flush)
+
+
+def prune_admin_logs(now=None):
+    """
+    Fold AdminLog entries older than AUDIT_LOG_RETENTION_DAYS into
+    AdminLogDailySummary and delete them, a day at a time so each
+    transaction stays small. Returns the number of entries removed.
+    """
+    now = now or timezone.now()
+    cutoff = (now - timedelta(days=settings.AUDIT_LOG_RETENTION_DAYS)).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    removed = 0
+    while True:
+        oldest = AdminLog.objects.filter(created_at__lt=cutoff).order_by("created_at").values_list(
+            "created_at", flat=True
+        ).first()
+        if oldest is None:
+            return removed
+        day_end = min(oldest.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1), cutoff)
+
+        with transaction.atomic():
+            expired = AdminLog.objects.filter(created_at__lt=day_end)
+            counts = (
+                expired.annotate(day=TruncDate("created_at"))
+                .values("day", "admin_id", "action")
+                .annotate(count=Count("id"))
+                .order_by()
+            )
+            for row in counts:
+                updated = AdminLogDailySummary.objects.filter(
+                    day=row["day"], admin_id=row["admin_id"], action=row["action"]
+                ).update(count=F("count") + row["count"])
+                if not updated:
+                    AdminLogDailySummary.objects.create(
+                        day=row["day"], admin_id=row["admin_id"], action=row["action"], count=row["count"]
+                    )
+            removed += expired.delete()[0]
@@ -0,0 +1,48 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from adminpanel.rendering import compile_message
+from adminpanel.tasks import NOTIFICATION_SUBJECT, chunked, send_notification_chunk
+
+
+class Command(BaseCommand):
+    help = (
+        "Send synthetic admin notifications through the chunked SMTP pipeline and "
+        "report throughput. Point it at `manage.py smtp_sink`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=5000)
+        parser.add_argument("--chunk-size", type=int, default=settings.ADMIN_NOTIFY_CHUNK_SIZE)
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=1025)
+
+    def handle(self, *args, **options):
+        recipients = [f"bench{i}@example.com" for i in range(options["count"])]
+        sources = compile_message(
+            NOTIFICATION_SUBJECT, "# Benchmark\n\nHello {{ email }}, this is a synthetic notification."
+        ).sources
+
+        with override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST=options["host"],
+            EMAIL_PORT=options["port"],
+            EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER="",
+            EMAIL_HOST_PASSWORD="",
+        ):
+            sent = failed = 0
+            started = time.perf_counter()
+            for chunk in chunked(recipients, options["chunk_size"]):
+                result = send_notification_chunk.apply(args=(chunk, *sources)).get()
+                sent += result["sent_count"]
+                failed += result["failed_count"]
+            elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"Sent {sent} emails ({failed} failed) in {elapsed:.2f}s "
+            f"= {sent / elapsed:.0f} emails/sec with chunk size {options['chunk_size']}"
+        )
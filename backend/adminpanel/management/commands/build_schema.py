@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from config.schema import RENDERERS, code_version, render_schema, write_schema
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the OpenAPI schema for the current code version into SCHEMA_CACHE['DIR'] "
+        "so /api/schema/ never generates it at request time."
+    )
+
+    def handle(self, *args, **options):
+        for fmt in RENDERERS:
+            path = write_schema(fmt, render_schema(fmt))
+            self.stdout.write(f"Wrote {path}")
+        self.stdout.write(f"Schema version {code_version()}")
@@ -0,0 +1,46 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+from config.db_pool import pool_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Run concurrent queries through the database connection pool and report "
+        "its statistics, including time spent waiting for a connection."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=20)
+        parser.add_argument("--queries", type=int, default=50, help="Queries per thread.")
+        parser.add_argument("--sleep", type=float, default=0.01, help="Server-side pg_sleep per query.")
+
+    def handle(self, *args, **options):
+        if getattr(connection, "pool", None) is None:
+            raise CommandError("The default database is not pooled; set a postgresql DATABASE_URL.")
+
+        def worker():
+            try:
+                for _ in range(options["queries"]):
+                    with connection.cursor() as cursor:
+                        cursor.execute("SELECT pg_sleep(%s)", [options["sleep"]])
+                    # Hand the connection back to the pool as a request would.
+                    connection.close()
+            finally:
+                connections.close_all()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["threads"]) as executor:
+            for future in [executor.submit(worker) for _ in range(options["threads"])]:
+                future.result()
+        elapsed = time.perf_counter() - started
+
+        total = options["threads"] * options["queries"]
+        self.stdout.write(f"Ran {total} queries in {elapsed:.2f}s = {total / elapsed:.0f} queries/sec")
+        for alias, stats in pool_stats().items():
+            self.stdout.write(f"[{alias}]")
+            for name, value in sorted(stats.items()):
+                self.stdout.write(f"  {name}: {value}")
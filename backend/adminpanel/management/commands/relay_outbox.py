@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from adminpanel import outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Publish pending outbox messages to the Celery broker. Runs once by "
+        "default; --loop keeps relaying, as an alternative to the beat task."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--loop", action="store_true", help="Keep relaying until interrupted.")
+        parser.add_argument("--interval", type=float, default=1.0, help="Seconds to sleep when idle (--loop).")
+
+    def handle(self, *args, **options):
+        total = outbox.drain(options["batch_size"])
+        while options["loop"]:
+            time.sleep(options["interval"])
+            total += outbox.drain(options["batch_size"])
+        self.stdout.write(f"Published {total} messages; {outbox.pending_count()} pending")
@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+from django.core.management.base import BaseCommand
+
+
+class SinkStats:
+    def __init__(self):
+        self.messages = 0
+        self.connections = 0
+        self.started = time.monotonic()
+
+
+class SMTPSinkProtocol:
+    """
+    Minimal SMTP server that accepts and discards every message.
+
+    It speaks just enough of RFC 5321 for smtplib (and so Django's SMTP
+    backend) without TLS or AUTH.
+    """
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    async def handle(self, reader, writer):
+        self.stats.connections += 1
+        writer.write(b"220 taskboard-smtp-sink ESMTP\r\n")
+        await writer.drain()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line[:4].upper()
+                if command in (b"EHLO", b"HELO"):
+                    writer.write(b"250-taskboard-smtp-sink\r\n250 8BITMIME\r\n")
+                elif command in (b"MAIL", b"RCPT", b"RSET", b"NOOP"):
+                    writer.write(b"250 OK\r\n")
+                elif command == b"DATA":
+                    writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                    await writer.drain()
+                    while (await reader.readline()) not in (b".\r\n", b".\n", b""):
+                        pass
+                    self.stats.messages += 1
+                    writer.write(b"250 OK: queued\r\n")
+                elif command == b"QUIT":
+                    writer.write(b"221 Bye\r\n")
+                    await writer.drain()
+                    break
+                else:
+                    writer.write(b"502 Command not implemented\r\n")
+                await writer.drain()
+        finally:
+            writer.close()
+
+
+class Command(BaseCommand):
+    help = "Run a local SMTP sink that discards mail and reports emails/sec."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=1025)
+        parser.add_argument(
+            "--interval", type=float, default=1.0, help="Seconds between throughput reports."
+        )
+
+    def handle(self, *args, **options):
+        try:
+            asyncio.run(self.serve(options["host"], options["port"], options["interval"]))
+        except KeyboardInterrupt:
+            pass
+
+    async def serve(self, host, port, interval):
+        stats = SinkStats()
+        protocol = SMTPSinkProtocol(stats)
+        server = await asyncio.start_server(protocol.handle, host, port)
+        self.stdout.write(f"SMTP sink listening on {host}:{port}")
+
+        async with server:
+            last_count = 0
+            while True:
+                await asyncio.sleep(interval)
+                count = stats.messages
+                if count != last_count:
+                    elapsed = time.monotonic() - stats.started
+                    self.stdout.write(
+                        f"{count} emails ({(count - last_count) / interval:.0f}/s now, "
+                        f"{count / elapsed:.0f}/s avg) over {stats.connections} connections"
+                    )
+                    last_count = count
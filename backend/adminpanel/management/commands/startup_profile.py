@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from config.startup import FORBIDDEN_MODULES, SCENARIOS, measure_imports
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure import time of process startup scenarios (manage.py setup, Celery worker, "
+        "web worker) in fresh interpreters and compare them with STARTUP_IMPORT_BUDGET_MS."
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("scenarios", nargs="*", help=f"Any of {', '.join(SCENARIOS)} (default: all).")
+        parser.add_argument("--top", type=int, default=15, help="Show the N slowest modules.")
+
+    def handle(self, *args, **options):
+        failures = []
+        unknown = set(options["scenarios"]) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+
+        for scenario in options["scenarios"] or SCENARIOS:
+            profile = measure_imports(scenario)
+            budget = settings.STARTUP_IMPORT_BUDGET_MS[scenario]
+            self.stdout.write(f"{scenario}: {profile.total_ms:.0f} ms of imports (budget {budget} ms)")
+            for name, ms in profile.slowest(options["top"]):
+                self.stdout.write(f"  {ms:8.1f} ms  {name}")
+
+            if profile.total_ms > budget:
+                failures.append(f"{scenario} took {profile.total_ms:.0f} ms")
+            leaked = [name for name in FORBIDDEN_MODULES[scenario] if name in profile.modules]
+            if leaked:
+                failures.append(f"{scenario} imported {', '.join(leaked)}")
+
+        if failures:
+            raise CommandError("Startup budget exceeded: " + "; ".join(failures))
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+
+
+def populate_summaries(apps, schema_editor):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Task = apps.get_model('tasks', 'Task')
+    UserTaskSummary = apps.get_model('adminpanel', 'UserTaskSummary')
+
+    counts = {
+        row['user_id']: row
+        for row in Task.objects.values('user_id').annotate(
+            open_tasks=Count('id', filter=Q(status__in=['TODO', 'DOING'])),
+            total_tasks=Count('id'),
+            last_activity_at=Max('updated_at'),
+        ).order_by()
+    }
+    UserTaskSummary.objects.bulk_create(
+        [
+            UserTaskSummary(
+                user_id=user_id,
+                email=email,
+                open_tasks=counts.get(user_id, {}).get('open_tasks', 0),
+                total_tasks=counts.get(user_id, {}).get('total_tasks', 0),
+                last_activity_at=counts.get(user_id, {}).get('last_activity_at'),
+            )
+            for user_id, email in User.objects.values_list('id', 'email').iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('adminpanel', '0002_notificationtemplate'),
+        ('tasks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserTaskSummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='task_summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('email', models.EmailField(max_length=254)),
+                ('open_tasks', models.IntegerField(default=0)),
+                ('total_tasks', models.IntegerField(default=0)),
+                ('last_activity_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['open_tasks', 'user'], name='summary_open_tasks_idx'), models.Index(fields=['total_tasks', 'user'], name='summary_total_tasks_idx'), models.Index(fields=['last_activity_at', 'user'], name='summary_last_activity_idx'), models.Index(fields=['email'], name='summary_email_prefix_idx', opclasses=['varchar_pattern_ops'])],
+            },
+        ),
+        migrations.RunPython(populate_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("adminpanel", "0006_admin_log"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="usertasksummary",
+            index=models.Index(fields=["email", "user"], name="summary_email_idx"),
+        ),
+    ]
@@ -0,0 +1,232 @@
+import uuid
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class NotificationJob(models.Model):
+    """
+    Progress of one admin notification fan-out.
+
+    The id is the job_id returned by POST /api/admin/notify/. Chunk subtasks
+    add to sent/failed as they finish, so reading progress is a single
+    primary-key lookup.
+    """
+
+    id = models.CharField(primary_key=True, max_length=32, editable=False)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        related_name="notification_jobs",
+        null=True,
+        blank=True,
+    )
+    total = models.PositiveIntegerField()
+    sent = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Notification job {self.id}"
+
+    @property
+    def pending(self):
+        return max(self.total - self.sent - self.failed, 0)
+
+    @property
+    def status(self):
+        return "completed" if self.pending == 0 else "in_progress"
+
+
+class NotificationTemplate(models.Model):
+    title = models.CharField(max_length=255)
+    subject = models.CharField(max_length=255)
+    body = models.TextField(help_text="Markdown. Supports {{ email }} and {{ username }}.")
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return self.title
+
+
+class UserTaskSummary(models.Model):
+    """
+    Per-user task counts served by the admin overview.
+
+    Kept current by task save/delete signals (see adminpanel.signals) and
+    fully rebuilt by the rebuild_task_summaries Celery task. The email is
+    copied here so search, sorting and pagination stay on this table's
+    indexes.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="task_summary",
+    )
+    email = models.EmailField()
+    open_tasks = models.IntegerField(default=0)
+    total_tasks = models.IntegerField(default=0)
+    last_activity_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["open_tasks", "user"], name="summary_open_tasks_idx"),
+            models.Index(fields=["total_tasks", "user"], name="summary_total_tasks_idx"),
+            models.Index(fields=["last_activity_at", "user"], name="summary_last_activity_idx"),
+            # varchar_pattern_ops serves the LIKE 'prefix%' search but not ORDER BY email.
+            models.Index(
+                fields=["email"], name="summary_email_prefix_idx", opclasses=["varchar_pattern_ops"]
+            ),
+            models.Index(fields=["email", "user"], name="summary_email_idx"),
+        ]
+
+    def __str__(self):
+        return f"Task summary for {self.email}"
+
+
+class DailyTaskActivity(models.Model):
+    """
+    Tasks created and completed per day and user.
+
+    Maintained incrementally by the roll_up_task_activity Celery task, so
+    analytics queries read at most one row per day and user.
+    """
+
+    day = models.DateField()
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="daily_task_activity",
+        null=True,
+        blank=True,
+    )
+    created_count = models.PositiveIntegerField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["day"]
+        constraints = [
+            models.UniqueConstraint(fields=["day", "user"], name="daily_activity_day_user_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["user", "day"], name="daily_activity_user_day_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.day} user={self.user_id}: {self.created_count} created, {self.completed_count} completed"
+
+
+class RollupWatermark(models.Model):
+    """High-water mark of the task timestamps a rollup job has processed."""
+
+    name = models.CharField(primary_key=True, max_length=50)
+    processed_until = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.processed_until}"
+
+
+class OutboxMessage(models.Model):
+    """
+    A Celery task waiting to be published to the broker.
+
+    Rows are written in the same transaction as the changes that caused
+    them (see adminpanel.outbox), so a rolled-back request never dispatches
+    and a committed one always does, whatever the broker's state. The relay
+    deletes a row once the broker has accepted it; rows that exhausted
+    OUTBOX_MAX_ATTEMPTS stay behind with their last error.
+    """
+
+    task_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    task_name = models.CharField(max_length=255)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["available_at", "id"], name="outbox_available_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.task_name} ({self.task_id})"
+
+
+class AdminLog(models.Model):
+    """
+    One admin action. Written in batches by adminpanel.audit, pruned after
+    AUDIT_LOG_RETENTION_DAYS into AdminLogDailySummary counts.
+    """
+
+    ACTION_CHOICES = [
+        ("create", "Create"),
+        ("update", "Update"),
+        ("delete", "Delete"),
+        ("send_notification", "Send notification"),
+    ]
+
+    admin = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        related_name="admin_logs",
+        null=True,
+        blank=True,
+    )
+    # Kept so entries stay attributable after the admin account is deleted.
+    admin_email = models.EmailField(blank=True)
+    action = models.CharField(max_length=50, choices=ACTION_CHOICES)
+    description = models.TextField(blank=True)
+    # Set when the entry is recorded, not when its batch is flushed.
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="adminlog_created_idx"),
+            models.Index(fields=["admin", "created_at"], name="adminlog_admin_created_idx"),
+            models.Index(fields=["action", "created_at"], name="adminlog_action_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.admin_email} - {self.action}"
+
+
+class AdminLogDailySummary(models.Model):
+    """Per-day action counts of AdminLog entries that were pruned."""
+
+    day = models.DateField()
+    admin = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        related_name="admin_log_summaries",
+        null=True,
+        blank=True,
+    )
+    action = models.CharField(max_length=50)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["day"]
+        constraints = [
+            models.UniqueConstraint(fields=["day", "admin", "action"], name="adminlog_summary_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.day} admin={self.admin_id} {self.action}: {self.count}"
@@ -0,0 +1,98 @@
+"""
+Transactional outbox for Celery dispatch.
+
+Request handlers call enqueue() instead of task.delay(): it only inserts an
+OutboxMessage, so the response never waits on the broker and the message
+commits or rolls back together with the request's other writes. relay()
+publishes a batch of pending rows in id order and drain() repeats it
+until the outbox is caught up; that runs from the relay_outbox beat
+task every OUTBOX_RELAY_INTERVAL seconds, or continuously from
+`manage.py relay_outbox --loop`.
+"""
+import logging
+from datetime import timedelta
+
+from celery.utils.time import get_exponential_backoff_interval
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from config.celery import app
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(task, *args, **kwargs):
+    """Record a call of `task` to be published once the current transaction commits."""
+    return OutboxMessage.objects.create(task_name=task.name, args=list(args), kwargs=kwargs)
+
+
+def relay(batch_size=None):
+    """
+    Publish up to `batch_size` due messages and return how many were sent.
+
+    Rows are locked with SKIP LOCKED, so several relays can run at once
+    without publishing a row twice. A failed publish postpones that row
+    with exponential backoff and ends the batch, since the broker is most
+    likely unavailable for the rows behind it too.
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    sent = 0
+    with transaction.atomic():
+        messages = (
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(available_at__lte=timezone.now(), attempts__lt=settings.OUTBOX_MAX_ATTEMPTS)
+            .order_by("id")[:batch_size]
+        )
+        published = []
+        for message in messages:
+            try:
+                app.send_task(
+                    message.task_name,
+                    args=message.args,
+                    kwargs=message.kwargs,
+                    task_id=str(message.task_id),
+                    retry=False,
+                )
+            except Exception as exc:
+                _postpone(message, exc)
+                break
+            published.append(message.pk)
+        sent = len(published)
+        if published:
+            OutboxMessage.objects.filter(pk__in=published).delete()
+    return sent
+
+
+def drain(batch_size=None):
+    """Relay batches until one comes back short; return the total sent."""
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    total = 0
+    while True:
+        sent = relay(batch_size)
+        total += sent
+        if sent < batch_size:
+            return total
+
+
+def _postpone(message, exc):
+    message.attempts += 1
+    message.last_error = repr(exc)
+    message.available_at = timezone.now() + timedelta(
+        seconds=get_exponential_backoff_interval(
+            factor=settings.OUTBOX_RETRY_BACKOFF,
+            retries=message.attempts - 1,
+            maximum=settings.OUTBOX_RETRY_BACKOFF_MAX,
+            full_jitter=True,
+        )
+    )
+    message.save(update_fields=["attempts", "last_error", "available_at"])
+    if message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        logger.error("Giving up on outbox message %s after %d attempts: %s", message, message.attempts, exc)
+    else:
+        logger.warning("Publishing outbox message %s failed (attempt %d): %s", message, message.attempts, exc)
+
+
+def pending_count():
+    return OutboxMessage.objects.filter(attempts__lt=settings.OUTBOX_MAX_ATTEMPTS).count()
@@ -0,0 +1,88 @@
+"""
+Rendering of admin notifications into text + HTML email bodies.
+
+Markdown is converted to HTML once per message source, before any
+per-recipient variables are substituted, and the resulting Django templates
+are compiled once and cached per process. Rendering for a single recipient
+is then only a template render with a small context.
+"""
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.template import Context, Engine
+
+# Standalone engine: notification bodies never need loaders or app tags.
+_engine = Engine(autoescape=True)
+
+MARKDOWN_EXTENSIONS = ["extra", "sane_lists"]
+
+
+def render_markdown(body):
+    import markdown  # Only needed when a message is compiled, not at worker boot.
+
+    return markdown.markdown(body, extensions=MARKDOWN_EXTENSIONS)
+
+
+class CompiledMessage:
+    """Compiled subject, plain-text and HTML templates for one message version."""
+
+    def __init__(self, subject_source, text_source, html_source):
+        self.sources = (subject_source, text_source, html_source)
+        self.subject_template = _engine.from_string(subject_source)
+        self.text_template = _engine.from_string(text_source)
+        self.html_template = _engine.from_string(html_source)
+
+    def render(self, variables):
+        """Return (subject, text, html) for one recipient's variables."""
+        plain = Context(variables, autoescape=False)
+        subject = " ".join(self.subject_template.render(plain).split())
+        text = self.text_template.render(plain)
+        html = self.html_template.render(Context(variables))
+        return subject, text, html
+
+
+@lru_cache(maxsize=256)
+def compile_sources(subject_source, text_source, html_source):
+    """Compile already-converted sources, e.g. inside a chunk subtask."""
+    return CompiledMessage(subject_source, text_source, html_source)
+
+
+@lru_cache(maxsize=64)
+def compile_message(subject, body_markdown):
+    """Compile an ad-hoc Markdown message, parsing the Markdown only once."""
+    return compile_sources(subject, body_markdown, render_markdown(body_markdown))
+
+
+_template_cache = OrderedDict()
+_template_cache_lock = threading.Lock()
+TEMPLATE_CACHE_SIZE = 128
+
+
+def compile_template(template):
+    """
+    Compiled message for a NotificationTemplate.
+
+    Cached by (id, updated_at), so editing a template produces a new cache
+    entry and older versions simply age out of the LRU.
+    """
+    key = (template.pk, template.updated_at)
+    with _template_cache_lock:
+        compiled = _template_cache.get(key)
+        if compiled is not None:
+            _template_cache.move_to_end(key)
+            return compiled
+
+    compiled = compile_message(template.subject, template.body)
+    with _template_cache_lock:
+        _template_cache[key] = compiled
+        if len(_template_cache) > TEMPLATE_CACHE_SIZE:
+            _template_cache.popitem(last=False)
+    return compiled
+
+
+def clear_caches():
+    compile_sources.cache_clear()
+    compile_message.cache_clear()
+    with _template_cache_lock:
+        _template_cache.clear()
@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from tasks.models import Task
+
+from .models import UserTaskSummary
+from .summaries import apply_task_delta
+
+
+@receiver(post_save, sender=Task)
+def update_summary_on_task_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    loaded_status = getattr(instance, "_loaded_status", instance.status)
+    was_open = not created and loaded_status in Task.OPEN_STATUSES
+    old_user_id = None if created else getattr(instance, "_loaded_user_id", instance.user_id)
+
+    if created or old_user_id != instance.user_id:
+        if old_user_id is not None:
+            apply_task_delta(old_user_id, total=-1, open_tasks=-int(was_open))
+        apply_task_delta(instance.user_id, total=1, open_tasks=int(instance.is_open))
+    else:
+        apply_task_delta(instance.user_id, open_tasks=int(instance.is_open) - int(was_open))
+
+    instance._loaded_user_id = instance.user_id
+    instance._loaded_status = instance.status
+
+
+@receiver(post_delete, sender=Task)
+def update_summary_on_task_delete(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, get_user_model()):
+        # The owner is being deleted; their summary row goes with them.
+        return
+    status = getattr(instance, "_loaded_status", instance.status)
+    apply_task_delta(
+        getattr(instance, "_loaded_user_id", instance.user_id),
+        total=-1,
+        open_tasks=-int(status in Task.OPEN_STATUSES),
+    )
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def sync_summary_on_user_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if created:
+        UserTaskSummary.objects.get_or_create(user=instance, defaults={"email": instance.email})
+    elif update_fields is None or "email" in update_fields:
+        UserTaskSummary.objects.filter(user=instance).update(email=instance.email)
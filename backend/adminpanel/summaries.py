@@ -0,0 +1,78 @@
+"""
+Maintenance of the UserTaskSummary table behind the admin overview.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, Max, Q
+from django.utils import timezone
+
+from tasks.models import Task
+
+from .models import UserTaskSummary
+
+REBUILD_BATCH_SIZE = 1000
+
+
+def refresh_summaries(users):
+    """Recompute and upsert summary rows for the given users from their tasks."""
+    counts = {
+        row["user_id"]: row
+        for row in (
+            Task.objects.filter(user__in=[user.pk for user in users])
+            .values("user_id")
+            .annotate(
+                open_tasks=Count("id", filter=Q(status__in=Task.OPEN_STATUSES)),
+                total_tasks=Count("id"),
+                last_activity_at=Max("updated_at"),
+            )
+            .order_by()
+        )
+    }
+    rows = []
+    for user in users:
+        row = counts.get(user.pk, {})
+        rows.append(
+            UserTaskSummary(
+                user_id=user.pk,
+                email=user.email,
+                open_tasks=row.get("open_tasks", 0),
+                total_tasks=row.get("total_tasks", 0),
+                last_activity_at=row.get("last_activity_at"),
+            )
+        )
+    UserTaskSummary.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["user"],
+        update_fields=["email", "open_tasks", "total_tasks", "last_activity_at"],
+    )
+    return len(rows)
+
+
+def rebuild_all_summaries(batch_size=REBUILD_BATCH_SIZE):
+    """Recompute every summary row, walking users in primary-key batches."""
+    User = get_user_model()
+    processed = 0
+    last_pk = 0
+    while True:
+        users = list(
+            User.objects.filter(pk__gt=last_pk).order_by("pk").only("pk", "email")[:batch_size]
+        )
+        if not users:
+            return processed
+        processed += refresh_summaries(users)
+        last_pk = users[-1].pk
+
+
+def apply_task_delta(user_id, total=0, open_tasks=0):
+    """Add deltas to one user's summary, rebuilding the row if it is missing."""
+    if user_id is None:
+        return
+    updated = UserTaskSummary.objects.filter(user_id=user_id).update(
+        total_tasks=F("total_tasks") + total,
+        open_tasks=F("open_tasks") + open_tasks,
+        last_activity_at=timezone.now(),
+    )
+    if not updated:
+        user = get_user_model().objects.filter(pk=user_id).only("pk", "email").first()
+        if user is not None:
+            refresh_summaries([user])
@@ -1,24 +1,163 @@
-from celery import shared_task
-from django.core.mail import send_mail
+import logging
+from smtplib import SMTPException, SMTPRecipientsRefused
+
+from celery import group, shared_task
+from celery.utils.time import get_exponential_backoff_interval
 from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import F
+from django.utils import timezone
+
+from config.celery import app  # noqa: F401  (binds shared_task in processes that only enqueue)
+from . import analytics, audit, outbox
+from .models import NotificationJob, NotificationTemplate
+from .rendering import compile_message, compile_sources, compile_template
+from .summaries import rebuild_all_summaries
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_SUBJECT = "Team Task Board Notification"
+
+
+def chunked(items, size):
+    """Yield successive lists of at most `size` items."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def record_progress(job_id, sent, failed):
+    """Atomically add a chunk's results to its NotificationJob counters."""
+    if job_id is None or not (sent or failed):
+        return
+    NotificationJob.objects.filter(pk=job_id).update(
+        sent=F("sent") + sent,
+        failed=F("failed") + failed,
+        updated_at=timezone.now(),
+    )
+
 
 @shared_task
-def send_admin_notification_email(recipients, message_markdown):
+def send_admin_notification_email(recipients, message_markdown, job_id=None, template_id=None):
     """
     recipients: list of email strings
-    message_markdown: markdown text (currently sent as plain text)
-    """
-    subject = "Team Task Board Notification"
-    from_email = getattr(settings, "DEFAULT_FROM_EMAIL", "no-reply@example.com")
+    message_markdown: markdown body, used when no template_id is given
+    job_id: optional NotificationJob id that chunks report progress to
+    template_id: optional NotificationTemplate to send instead
 
+    The message is compiled (Markdown -> HTML) once here, then the recipients
+    are split into chunks of ADMIN_NOTIFY_CHUNK_SIZE and each chunk is sent
+    from its own subtask, so large lists are delivered in parallel.
+    """
     if not recipients:
         return {"status": "no_recipients"}
 
-    send_mail(
-        subject=subject,
-        message=message_markdown,
-        from_email=from_email,
-        recipient_list=recipients,
-        fail_silently=False,
+    if template_id is not None:
+        compiled = compile_template(NotificationTemplate.objects.get(pk=template_id))
+    else:
+        compiled = compile_message(NOTIFICATION_SUBJECT, message_markdown)
+    subject, text_body, html_body = compiled.sources
+
+    chunks = list(chunked(recipients, settings.ADMIN_NOTIFY_CHUNK_SIZE))
+    group(
+        send_notification_chunk.s(chunk, subject, text_body, html_body, job_id)
+        for chunk in chunks
+    ).apply_async()
+    return {
+        "status": "dispatched",
+        "recipients_count": len(recipients),
+        "chunks_count": len(chunks),
+    }
+
+
+@shared_task(bind=True, max_retries=settings.ADMIN_NOTIFY_MAX_RETRIES)
+def send_notification_chunk(self, recipients, subject, text_body, html_body, job_id=None):
+    """
+    Send one personalized text + HTML message per recipient over a single
+    SMTP connection.
+
+    The bodies arrive already converted from Markdown; they are compiled once
+    per worker process and rendered with each recipient's email and username.
+
+    Refused recipients are counted as failed. Any other SMTP or socket error
+    is treated as transient: the recipients not yet sent are retried with
+    exponential backoff, so nobody in the chunk receives the message twice.
+    Progress is recorded on the job before each retry and on completion.
+    """
+    from_email = getattr(settings, "DEFAULT_FROM_EMAIL", "no-reply@example.com")
+    compiled = compile_sources(subject, text_body, html_body)
+    usernames = dict(
+        get_user_model().objects.filter(email__in=recipients).values_list("email", "username")
     )
-    return {"status": "sent", "recipients_count": len(recipients)}
+    sent = 0
+    failed = []
+
+    index = 0
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+        for index, recipient in enumerate(recipients):
+            rendered_subject, text, html = compiled.render(
+                {"email": recipient, "username": usernames.get(recipient) or ""}
+            )
+            message = EmailMultiAlternatives(
+                subject=rendered_subject,
+                body=text,
+                from_email=from_email,
+                to=[recipient],
+                connection=connection,
+            )
+            message.attach_alternative(html, "text/html")
+            try:
+                sent += connection.send_messages([message])
+            except SMTPRecipientsRefused:
+                failed.append(recipient)
+    except (SMTPException, OSError) as exc:
+        remaining = recipients[index:]
+        if self.request.retries >= self.max_retries:
+            logger.error("Giving up on %d notification recipients: %s", len(remaining), exc)
+            failed.extend(remaining)
+        else:
+            countdown = get_exponential_backoff_interval(
+                factor=settings.ADMIN_NOTIFY_RETRY_BACKOFF,
+                retries=self.request.retries,
+                maximum=settings.ADMIN_NOTIFY_RETRY_BACKOFF_MAX,
+                full_jitter=True,
+            )
+            record_progress(job_id, sent, len(failed))
+            raise self.retry(
+                args=(remaining, subject, text_body, html_body, job_id), exc=exc, countdown=countdown
+            )
+    finally:
+        # QUIT on a dropped connection raises; that must not lose the retry or the progress.
+        try:
+            connection.close()
+        except Exception:
+            logger.warning("Closing the SMTP connection failed", exc_info=True)
+
+    record_progress(job_id, sent, len(failed))
+    return {"status": "sent", "sent_count": sent, "failed_count": len(failed)}
+
+
+@shared_task
+def rebuild_task_summaries():
+    """Recompute every UserTaskSummary row from the tasks table."""
+    return {"status": "rebuilt", "users_count": rebuild_all_summaries()}
+
+
+@shared_task
+def roll_up_task_activity():
+    """Fold task activity since the last watermark into the daily rollups."""
+    return {"status": "rolled_up", "buckets_count": analytics.roll_up_task_activity()}
+
+
+@shared_task
+def relay_outbox():
+    """Publish pending outbox messages to the broker."""
+    return {"status": "relayed", "sent_count": outbox.drain()}
+
+
+@shared_task
+def prune_admin_logs():
+    """Fold admin log entries past their retention into daily counts."""
+    return {"status": "pruned", "entries_count": audit.prune_admin_logs()}
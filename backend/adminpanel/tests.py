@@ -1,15 +1,35 @@
 """
 Tests for Admin Panel functionality
 """
-from django.test import TestCase
+import threading
+from smtplib import SMTPServerDisconnected
+from unittest import skipUnless
+
+from celery.exceptions import Retry
+from django.core import mail
+from django.db import connection, connections, transaction
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
+
+from config.db_pool import pool_stats
+from tasks.models import Task
+from .analytics import roll_up_task_activity
+from . import audit, outbox
+from .models import AdminLog, AdminLogDailySummary, DailyTaskActivity, NotificationJob, NotificationTemplate, OutboxMessage, UserTaskSummary
+from .rendering import clear_caches, compile_message, compile_template
+from .summaries import rebuild_all_summaries
+from .tasks import send_admin_notification_email, send_notification_chunk
 
 User = get_user_model()
 
 
+@override_settings(AUDIT_LOG_BUFFERED=False)
 class AdminPanelAccessTestCase(TestCase):
     """Test access control for admin panel"""
     
@@ -49,7 +69,7 @@ class AdminPanelAccessTestCase(TestCase):
         self.client.force_authenticate(user=self.admin)
         response = self.client.get('/api/admin/overview/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertIsInstance(response.data, list)
+        self.assertIsInstance(response.data['results'], list)
     
     def test_admin_notify_requires_staff_permission(self):
         """Test that regular users cannot send notifications"""
@@ -69,14 +89,8 @@ class AdminPanelAccessTestCase(TestCase):
         })
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
     
-    @patch('adminpanel.views.send_admin_notification_email')
-    def test_admin_notify_success(self, mock_celery_task):
+    def test_admin_notify_success(self):
         """Test successful email notification"""
-        # Mock the Celery task to avoid Redis connection
-        mock_result = MagicMock()
-        mock_result.id = 'test-job-id-12345'
-        mock_celery_task.delay.return_value = mock_result
-        
         self.client.force_authenticate(user=self.admin)
         response = self.client.post('/api/admin/notify/', {
             'recipients': ['user@test.com'],
@@ -88,8 +102,28 @@ class AdminPanelAccessTestCase(TestCase):
         self.assertIn('recipients_count', response.data)
         self.assertEqual(response.data['recipients_count'], 1)
         
-        # Verify the Celery task was called
-        mock_celery_task.delay.assert_called_once()
+        # Verify the Celery task was queued in the outbox with the tracked job
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.task_name, send_admin_notification_email.name)
+        self.assertEqual(
+            message.args, [['user@test.com'], '# Test\n\nThis is a test', response.data['job_id']]
+        )
+        job = NotificationJob.objects.get(pk=response.data['job_id'])
+        self.assertEqual(job.total, 1)
+        self.assertEqual(job.created_by, self.admin)
+        self.assertEqual(AdminLog.objects.get().action, 'send_notification')
+
+    def test_admin_notify_retry_with_idempotency_key_sends_once(self):
+        self.client.force_authenticate(user=self.admin)
+        payload = {'recipients': ['user@test.com'], 'message': 'Once'}
+
+        first = self.client.post('/api/admin/notify/', payload, format='json', HTTP_IDEMPOTENCY_KEY='notify-1')
+        retry = self.client.post('/api/admin/notify/', payload, format='json', HTTP_IDEMPOTENCY_KEY='notify-1')
+
+        self.assertEqual(retry.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(retry.data['job_id'], first.data['job_id'])
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+        self.assertEqual(NotificationJob.objects.count(), 1)
 
 
 class AdminOverviewDataTestCase(TestCase):
@@ -122,16 +156,474 @@ class AdminOverviewDataTestCase(TestCase):
         
         response = self.client.get('/api/admin/overview/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 3)  # admin + 2 users
+        self.assertEqual(response.data['count'], 3)  # admin + 2 users
+        self.assertEqual(len(response.data['results']), 3)
     
     def test_admin_overview_includes_task_counts(self):
         """Test that overview includes open_tasks and total_tasks"""
         response = self.client.get('/api/admin/overview/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         
-        if len(response.data) > 0:
-            user_data = response.data[0]
+        if len(response.data['results']) > 0:
+            user_data = response.data['results'][0]
             self.assertIn('open_tasks', user_data)
             self.assertIn('total_tasks', user_data)
             self.assertIn('email', user_data)
             self.assertIn('username', user_data)
+
+    def test_admin_overview_sorts_paginates_and_searches(self):
+        """Overview supports ordering by counts, pagination and email prefix search"""
+        busy = User.objects.create_user(email='busy@test.com', username='busy', password='pass123')
+        idle = User.objects.create_user(email='idle@test.com', username='idle', password='pass123')
+        for i in range(3):
+            Task.objects.create(user=busy, title=f'Task {i}')
+        Task.objects.create(user=idle, title='Done', status='DONE')
+
+        response = self.client.get('/api/admin/overview/', {'ordering': '-total_tasks', 'page_size': 2})
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual([u['email'] for u in response.data['results']], ['busy@test.com', 'idle@test.com'])
+        self.assertIsNotNone(response.data['next'])
+
+        response = self.client.get('/api/admin/overview/', {'ordering': 'email', 'page_size': 2, 'page': 2})
+        self.assertEqual([u['email'] for u in response.data['results']], ['idle@test.com'])
+        self.assertIsNone(response.data['next'])
+
+        response = self.client.get('/api/admin/overview/', {'search': 'IDLE'})
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['open_tasks'], 0)
+        self.assertEqual(response.data['results'][0]['total_tasks'], 1)
+
+
+class UserTaskSummaryTestCase(TestCase):
+    """Test incremental maintenance of the per-user task summary"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='owner@test.com', password='pass123')
+
+    def summary(self):
+        return UserTaskSummary.objects.get(user=self.user)
+
+    def test_task_writes_update_counts(self):
+        """Creating, completing and deleting tasks adjust the counts"""
+        task = Task.objects.create(user=self.user, title='One')
+        Task.objects.create(user=self.user, title='Two', status='DONE')
+        self.assertEqual((self.summary().open_tasks, self.summary().total_tasks), (1, 2))
+
+        task = Task.objects.get(pk=task.pk)
+        task.status = 'DONE'
+        task.save()
+        self.assertEqual((self.summary().open_tasks, self.summary().total_tasks), (0, 2))
+
+        task.status = 'DOING'
+        task.save()
+        self.assertEqual(self.summary().open_tasks, 1)
+
+        task.delete()
+        self.assertEqual((self.summary().open_tasks, self.summary().total_tasks), (0, 1))
+        self.assertIsNotNone(self.summary().last_activity_at)
+
+    def test_rebuild_repairs_drifted_rows(self):
+        """The rebuild job recomputes rows from the tasks table"""
+        Task.objects.create(user=self.user, title='One')
+        Task.objects.filter(user=self.user).update(status='DONE')  # bypasses signals
+        UserTaskSummary.objects.filter(user=self.user).delete()
+
+        rebuild_all_summaries(batch_size=1)
+        self.assertEqual((self.summary().open_tasks, self.summary().total_tasks), (0, 1))
+
+    def test_deleting_user_with_tasks(self):
+        """Deleting a user cascades cleanly through tasks and summary"""
+        Task.objects.create(user=self.user, title='One')
+        self.user.delete()
+        self.assertFalse(UserTaskSummary.objects.exists())
+
+
+class NotificationFanOutTestCase(TestCase):
+    """Test chunked, per-recipient notification delivery"""
+
+    def test_chunk_sends_one_message_per_recipient(self):
+        """Each recipient gets their own message, so addresses are not exposed"""
+        recipients = ['a@test.com', 'b@test.com', 'c@test.com']
+        result = send_notification_chunk.apply(args=(recipients, 'Subject', 'Body', '<p>Body</p>')).get()
+
+        self.assertEqual(result['sent_count'], 3)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual([m.to for m in mail.outbox], [[r] for r in recipients])
+
+    @override_settings(ADMIN_NOTIFY_CHUNK_SIZE=2)
+    @patch('adminpanel.tasks.group')
+    def test_fan_out_splits_recipients_into_chunks(self, mock_group):
+        """Large recipient lists are split into one subtask per chunk"""
+        recipients = [f'user{i}@test.com' for i in range(5)]
+        result = send_admin_notification_email(recipients, 'Body')
+
+        self.assertEqual(result['chunks_count'], 3)
+        signatures = list(mock_group.call_args[0][0])
+        self.assertEqual([s.args[0] for s in signatures], [recipients[0:2], recipients[2:4], recipients[4:]])
+        mock_group.return_value.apply_async.assert_called_once()
+
+    @patch('adminpanel.tasks.get_connection')
+    def test_transient_failure_retries_only_unsent_recipients(self, mock_get_connection):
+        """A dropped connection retries the rest of the chunk, not the whole chunk"""
+        connection = mock_get_connection.return_value
+        connection.send_messages.side_effect = [1, SMTPServerDisconnected('gone')]
+
+        with patch.object(send_notification_chunk, 'retry', side_effect=Retry()) as mock_retry:
+            with self.assertRaises(Retry):
+                send_notification_chunk(['a@test.com', 'b@test.com', 'c@test.com'], 'Subject', 'Body', '<p>Body</p>')
+
+        self.assertEqual(mock_retry.call_args.kwargs['args'][0], ['b@test.com', 'c@test.com'])
+        connection.close.assert_called_once()
+
+    @patch('adminpanel.tasks.record_progress')
+    @patch('adminpanel.tasks.get_connection')
+    def test_failing_close_still_records_progress(self, mock_get_connection, mock_record_progress):
+        """An error while closing the connection doesn't lose the chunk's counts"""
+        connection = mock_get_connection.return_value
+        connection.send_messages.return_value = 1
+        connection.close.side_effect = SMTPServerDisconnected('gone')
+
+        with self.assertLogs('adminpanel.tasks', 'WARNING'):
+            send_notification_chunk(['a@test.com', 'b@test.com'], 'Subject', 'Body', '<p>Body</p>', 'job1')
+
+        mock_record_progress.assert_called_once_with('job1', 2, 0)
+
+
+
+class NotificationJobStatusTestCase(TestCase):
+    """Test notification job progress tracking"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(
+            email='admin@test.com',
+            username='admin',
+            password='adminpass123',
+            is_staff=True
+        )
+        self.job = NotificationJob.objects.create(id='job123', created_by=self.admin, total=3)
+
+    def test_chunks_update_job_counters(self):
+        """Chunk subtasks add their sent counts to the job"""
+        send_notification_chunk.apply(args=(['a@test.com', 'b@test.com'], 'Subject', 'Body', '<p>Body</p>', 'job123'))
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.sent, 2)
+        self.assertEqual(self.job.pending, 1)
+        self.assertEqual(self.job.status, 'in_progress')
+
+    def test_status_endpoint_reports_progress(self):
+        """Status endpoint returns sent, failed and pending counts"""
+        NotificationJob.objects.filter(pk='job123').update(sent=2, failed=1)
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get('/api/admin/notify/job123/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['sent'], 2)
+        self.assertEqual(response.data['failed'], 1)
+        self.assertEqual(response.data['pending'], 0)
+        self.assertEqual(response.data['status'], 'completed')
+
+    def test_status_endpoint_unknown_job(self):
+        """Unknown job ids return 404"""
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get('/api/admin/notify/missing/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+
+class NotificationRenderingTestCase(TestCase):
+    """Test compiled, cached notification rendering"""
+
+    def setUp(self):
+        clear_caches()
+        self.template = NotificationTemplate.objects.create(
+            title='Welcome',
+            subject='Hello {{ username }}',
+            body='# Hi {{ username }}\n\nYour email is **{{ email }}**.'
+        )
+
+    def test_render_produces_text_and_html(self):
+        """Markdown becomes HTML; the text part keeps the Markdown source"""
+        subject, text, html = compile_template(self.template).render(
+            {'email': 'a@test.com', 'username': '<alice>'}
+        )
+        self.assertEqual(subject, 'Hello <alice>')
+        self.assertIn('Your email is **a@test.com**.', text)
+        self.assertIn('<h1>Hi &lt;alice&gt;</h1>', html)
+        self.assertIn('<strong>a@test.com</strong>', html)
+
+    def test_template_compiled_once_per_version(self):
+        """Compiled templates are cached by id and updated_at"""
+        with patch('adminpanel.rendering.render_markdown', wraps=lambda body: body) as mock_markdown:
+            first = compile_template(self.template)
+            self.assertIs(compile_template(self.template), first)
+            self.assertEqual(mock_markdown.call_count, 1)
+
+            self.template.body = 'Changed {{ email }}'
+            self.template.save()
+            self.assertIsNot(compile_template(self.template), first)
+            self.assertEqual(mock_markdown.call_count, 2)
+
+    def test_chunk_sends_personalized_multipart_messages(self):
+        """Each recipient gets their own variables in both parts"""
+        User.objects.create_user(email='bob@test.com', username='bob', password='pass12345')
+        sources = compile_message('Note', 'Hi *{{ username }}*').sources
+        send_notification_chunk.apply(args=(['bob@test.com'], *sources))
+
+        message = mail.outbox[0]
+        self.assertEqual(message.body, 'Hi *bob*')
+        self.assertEqual(message.alternatives[0][0], '<p>Hi <em>bob</em></p>')
+        self.assertEqual(message.alternatives[0][1], 'text/html')
+
+    @patch('adminpanel.tasks.group')
+    def test_fan_out_parses_markdown_once(self, mock_group):
+        """Markdown is converted once for the whole fan-out"""
+        recipients = [f'user{i}@test.com' for i in range(5)]
+        with patch('adminpanel.rendering.render_markdown', return_value='<p>x</p>') as mock_markdown:
+            send_admin_notification_email(recipients, 'fan-out body', None, self.template.pk)
+        self.assertEqual(mock_markdown.call_count, 1)
+
+
+
+@override_settings(ANALYTICS_ROLLUP_LAG=0)
+class DailyActivityRollupTestCase(TestCase):
+    """Test incremental daily activity rollups and the analytics endpoint"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(
+            email='admin@test.com',
+            username='admin',
+            password='adminpass123',
+            is_staff=True
+        )
+        self.user = User.objects.create_user(email='worker@test.com', password='pass123')
+
+    def test_rollup_processes_only_new_rows(self):
+        """Each run folds in only activity newer than the watermark"""
+        Task.objects.create(user=self.user, title='One')
+        Task.objects.create(user=self.user, title='Two', status='DONE')
+        roll_up_task_activity()
+
+        row = DailyTaskActivity.objects.get(user=self.user)
+        self.assertEqual((row.created_count, row.completed_count), (2, 1))
+
+        # Nothing new: a second run must not double count
+        roll_up_task_activity()
+        row.refresh_from_db()
+        self.assertEqual((row.created_count, row.completed_count), (2, 1))
+
+        task = Task.objects.get(title='One')
+        task.status = 'DONE'
+        task.save()
+        roll_up_task_activity(now=timezone.now() + timedelta(seconds=1))
+        row.refresh_from_db()
+        self.assertEqual((row.created_count, row.completed_count), (2, 2))
+
+    def test_analytics_endpoint_reads_rollups(self):
+        """The endpoint returns a zero-filled daily series, overall or per user"""
+        today = timezone.now().date()
+        DailyTaskActivity.objects.create(day=today, user=self.user, created_count=3, completed_count=1)
+        DailyTaskActivity.objects.create(day=today, user=self.admin, created_count=2, completed_count=2)
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get('/api/admin/analytics/daily/', {'days': 7})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['series']), 7)
+        self.assertEqual(response.data['series'][-1], {'day': today, 'created': 5, 'completed': 3})
+        self.assertEqual(response.data['series'][0]['created'], 0)
+
+        response = self.client.get('/api/admin/analytics/daily/', {'days': 1, 'user_id': self.user.id})
+        self.assertEqual(response.data['series'], [{'day': today, 'created': 3, 'completed': 1}])
+
+    def test_analytics_requires_staff(self):
+        """Regular users cannot read analytics"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/admin/analytics/daily/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class DatabasePoolTestCase(TestCase):
+    """Test connection pool configuration and statistics"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(
+            email='pooladmin@test.com',
+            username='pooladmin',
+            password='adminpass123',
+            is_staff=True,
+        )
+
+    def test_pool_stats_endpoint_is_admin_only(self):
+        """Test the pool statistics endpoint rejects non-staff users"""
+        user = User.objects.create_user(email='pooluser@test.com', username='pooluser', password='x' * 12)
+        self.client.force_authenticate(user=user)
+        response = self.client.get('/api/admin/db-pool/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_pool_stats_endpoint(self):
+        """Test the endpoint lists the pooled aliases of the serving process"""
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get('/api/admin/db-pool/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data['pools']), set(pool_stats()))
+
+    @skipUnless(getattr(connection, 'pool', None) is not None, 'requires a pooled PostgreSQL database')
+    def test_connections_are_reused_from_pool(self):
+        """Test connections opened by other threads come from and return to the pool"""
+        pool = connection.pool
+        before = pool.get_stats().get('requests_num', 0)
+
+        def query():
+            with connections['default'].cursor() as cursor:
+                cursor.execute('SELECT 1')
+            connections.close_all()
+
+        for _ in range(3):
+            thread = threading.Thread(target=query)
+            thread.start()
+            thread.join()
+
+        stats = pool.get_stats()
+        self.assertGreaterEqual(stats['requests_num'] - before, 3)
+        self.assertLessEqual(stats['pool_size'], stats['pool_max'])
+
+
+@override_settings(OUTBOX_BATCH_SIZE=2, OUTBOX_MAX_ATTEMPTS=2)
+class OutboxRelayTestCase(TestCase):
+    def test_rolled_back_transaction_leaves_no_message(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                outbox.enqueue(send_admin_notification_email, ['a@test.com'], 'hi')
+                raise RuntimeError
+
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    @patch('adminpanel.outbox.app.send_task')
+    def test_relay_publishes_in_order_and_deletes(self, mock_send_task):
+        messages = [outbox.enqueue(send_admin_notification_email, [f'{i}@test.com'], 'hi') for i in range(5)]
+
+        self.assertEqual(outbox.drain(), 5)
+
+        self.assertFalse(OutboxMessage.objects.exists())
+        self.assertEqual(
+            [call.kwargs['task_id'] for call in mock_send_task.call_args_list],
+            [str(message.task_id) for message in messages],
+        )
+        mock_send_task.assert_called_with(
+            send_admin_notification_email.name, args=[['4@test.com'], 'hi'], kwargs={},
+            task_id=str(messages[4].task_id), retry=False,
+        )
+
+    @patch('adminpanel.outbox.app.send_task', side_effect=ConnectionError('broker down'))
+    def test_broker_failure_postpones_until_attempts_run_out(self, mock_send_task):
+        message = outbox.enqueue(send_admin_notification_email, ['a@test.com'], 'hi')
+        outbox.enqueue(send_admin_notification_email, ['b@test.com'], 'hi')
+
+        self.assertEqual(outbox.relay(), 0)
+        self.assertEqual(mock_send_task.call_count, 1)  # the batch stops at the first failure
+        message.refresh_from_db()
+        self.assertEqual(message.attempts, 1)
+        self.assertIn('broker down', message.last_error)
+
+        OutboxMessage.objects.update(available_at=timezone.now())
+        outbox.relay()
+        message.refresh_from_db()
+        self.assertEqual(message.attempts, 2)
+
+        # Exhausted messages are kept but no longer relayed.
+        mock_send_task.side_effect = None
+        OutboxMessage.objects.update(available_at=timezone.now())
+        self.assertEqual(outbox.relay(), 1)
+        self.assertEqual(list(OutboxMessage.objects.all()), [message])
+        self.assertEqual(outbox.pending_count(), 0)
+
+
+@override_settings(AUDIT_LOG_BUFFERED=True, AUDIT_LOG_BATCH_SIZE=3, AUDIT_LOG_FLUSH_INTERVAL=60, AUDIT_LOG_RETENTION_DAYS=30)
+class AdminLogTestCase(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(email='auditor@test.com', password='pass', is_staff=True)
+        self.addCleanup(audit.buffer.flush)
+
+    def test_entries_are_written_in_batches_after_the_response(self):
+        audit.record(self.admin, 'create', 'first')
+        recorded_at = audit.buffer._entries[0].created_at
+        audit.record(self.admin, 'update')
+        audit.flush_if_due()
+        self.assertFalse(AdminLog.objects.exists())
+
+        audit.record(self.admin, 'delete')
+        with self.assertNumQueries(1):
+            audit.flush_if_due()
+
+        self.assertEqual(AdminLog.objects.count(), 3)
+        self.assertEqual(AdminLog.objects.get(description='first').created_at, recorded_at)
+        self.assertEqual(len(audit.buffer), 0)
+
+    def test_failed_flush_keeps_entries(self):
+        audit.record(self.admin, 'create')
+        with patch.object(AdminLog.objects, 'bulk_create', side_effect=RuntimeError('db down')):
+            self.assertEqual(audit.flush(), 0)
+        self.assertEqual(audit.flush(), 1)
+        self.assertEqual(AdminLog.objects.count(), 1)
+
+    @override_settings(AUDIT_LOG_FLUSH_INTERVAL=0)
+    def test_background_flush_writes_due_entries(self):
+        audit.record(self.admin, 'create')
+        with patch('adminpanel.audit.close_old_connections') as mock_close:
+            audit._flush_from_thread()
+        self.assertEqual(AdminLog.objects.count(), 1)
+        self.assertEqual(mock_close.call_count, 2)
+
+        with patch('adminpanel.audit.close_old_connections') as mock_close:
+            audit._flush_from_thread()
+        mock_close.assert_not_called()
+
+    def test_flusher_starts_once_per_process(self):
+        with patch.object(audit, '_flusher_pid', None), patch('adminpanel.audit.threading.Thread') as mock_thread:
+            audit.start_flusher()
+            audit.start_flusher()
+        mock_thread.assert_called_once()
+        mock_thread.return_value.start.assert_called_once()
+
+    def test_log_endpoint_filters_and_pages_by_cursor(self):
+        client = APIClient()
+        client.force_authenticate(user=self.admin)
+        now = timezone.now()
+        AdminLog.objects.bulk_create(
+            AdminLog(admin=self.admin, admin_email=self.admin.email, action='create' if i % 2 else 'delete',
+                     created_at=now - timedelta(minutes=i))
+            for i in range(6)
+        )
+
+        first = client.get('/api/admin/logs/', {'action': 'create', 'page_size': 2})
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        times = [entry['created_at'] for entry in first.data['results']]
+        second = client.get(first.data['next'])
+        times += [entry['created_at'] for entry in second.data['results']]
+        self.assertEqual(len(times), 3)
+        self.assertEqual(times, sorted(times, reverse=True))
+        self.assertIsNone(second.data['next'])
+
+        self.assertEqual(client.get('/api/admin/logs/', {'action': 'bogus'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+        client.force_authenticate(user=User.objects.create_user(email='plain@test.com', password='pass'))
+        self.assertEqual(client.get('/api/admin/logs/').status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_prune_folds_expired_entries_into_daily_counts(self):
+        now = timezone.now()
+        AdminLog.objects.bulk_create([
+            AdminLog(admin=self.admin, action='create', created_at=now - timedelta(days=40)),
+            AdminLog(admin=self.admin, action='create', created_at=now - timedelta(days=40, minutes=1)),
+            AdminLog(admin=self.admin, action='delete', created_at=now - timedelta(days=35)),
+            AdminLog(admin=self.admin, action='delete', created_at=now - timedelta(days=1)),
+        ])
+
+        self.assertEqual(audit.prune_admin_logs(now), 3)
+        self.assertEqual(audit.prune_admin_logs(now), 0)
+
+        self.assertEqual(AdminLog.objects.count(), 1)
+        self.assertEqual(
+            sorted(AdminLogDailySummary.objects.values_list('action', 'count')), [('create', 2), ('delete', 1)]
+        )
@@ -1,7 +1,11 @@
 from django.urls import path
-from .views import AdminOverviewView, AdminNotifyView
+from .views import AdminOverviewView, AdminNotifyView, AdminNotifyStatusView, AdminDailyActivityView, AdminDatabasePoolView, AdminLogView
 
 urlpatterns = [
     path('overview/', AdminOverviewView.as_view(), name='admin-overview'),
     path('notify/', AdminNotifyView.as_view(), name='admin-notify'),
+    path('notify/<str:job_id>/', AdminNotifyStatusView.as_view(), name='admin-notify-status'),
+    path('analytics/daily/', AdminDailyActivityView.as_view(), name='admin-analytics-daily'),
+    path('db-pool/', AdminDatabasePoolView.as_view(), name='admin-db-pool'),
+    path('logs/', AdminLogView.as_view(), name='admin-logs'),
 ]
@@ -1,55 +1,71 @@
-from django.db.models import Count, Q
+from datetime import timedelta
+
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.template import TemplateSyntaxError
+from django.utils import timezone
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status
+from rest_framework import generics, status
 from rest_framework import serializers
 from django.utils.crypto import get_random_string
 
 from accounts.models import User
-from tasks.models import Task
+from config.db_pool import pool_stats
+from config.idempotency import idempotent
+from .analytics import daily_activity
+from . import audit, outbox
+from .models import AdminLog, NotificationJob, NotificationTemplate, UserTaskSummary
 from .permissions import IsStaffUser
-from .tasks import send_admin_notification_email
+from .rendering import compile_message, compile_template
+from .tasks import NOTIFICATION_SUBJECT, send_admin_notification_email
+
+
+class AdminOverviewPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+
+class AdminOverviewSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source="user_id")
+    username = serializers.CharField(source="user.username")
+    is_active = serializers.BooleanField(source="user.is_active")
 
+    class Meta:
+        model = UserTaskSummary
+        fields = ["id", "email", "username", "is_active", "open_tasks", "total_tasks", "last_activity_at"]
 
-class AdminOverviewView(APIView):
+
+class AdminOverviewView(generics.ListAPIView):
     """
     GET /api/admin/overview/
-    Returns list of all users with their task statistics.
+    Returns a page of users with their task statistics, served from the
+    UserTaskSummary table.
+    Query params: search (email prefix), ordering (open_tasks, total_tasks,
+    last_activity_at or email, prefix "-" for descending), page, page_size.
     Admin only.
     """
     permission_classes = [IsStaffUser]
+    serializer_class = AdminOverviewSerializer
+    pagination_class = AdminOverviewPagination
+    ordering_fields = ("open_tasks", "total_tasks", "last_activity_at", "email")
+    default_ordering = "-total_tasks"
 
-    def get(self, request, *args, **kwargs):
-        # Annotate users with task counts
-        queryset = (
-            User.objects
-            .all()
-            .annotate(
-                open_tasks_count=Count(
-                    "tasks",
-                    filter=Q(tasks__status__in=["TODO", "DOING"]),
-                    distinct=True,
-                ),
-                total_tasks_count=Count(
-                    "tasks",
-                    distinct=True,
-                )
-            )
-        )
-        
-        # Format response to match frontend expectations
-        data = [
-            {
-                "id": user.id,
-                "email": user.email,
-                "username": user.username,
-                "is_active": user.is_active,
-                "open_tasks": user.open_tasks_count,  # Frontend expects 'open_tasks'
-                "total_tasks": user.total_tasks_count,  # Frontend expects 'total_tasks'
-            }
-            for user in queryset
-        ]
-        return Response(data, status=status.HTTP_200_OK)
+    def get_queryset(self):
+        queryset = UserTaskSummary.objects.select_related("user")
+
+        search = self.request.query_params.get("search", "").strip().lower()
+        if search:
+            queryset = queryset.filter(email__startswith=search)
+
+        ordering = self.request.query_params.get("ordering", self.default_ordering)
+        if ordering.lstrip("-") not in self.ordering_fields:
+            ordering = self.default_ordering
+        # The user id tie-breaker keeps pages stable and matches the indexes.
+        tie_breaker = "-user_id" if ordering.startswith("-") else "user_id"
+        return queryset.order_by(ordering, tie_breaker)
 
 
 class AdminNotifySerializer(serializers.Serializer):
@@ -57,25 +73,48 @@ class AdminNotifySerializer(serializers.Serializer):
         child=serializers.EmailField(),
         allow_empty=False,
     )
-    message = serializers.CharField()
+    message = serializers.CharField(required=False)
+    template_id = serializers.PrimaryKeyRelatedField(
+        queryset=NotificationTemplate.objects.filter(is_active=True),
+        required=False,
+    )
+
+    def validate(self, attrs):
+        template = attrs.get("template_id")
+        if template is None and not attrs.get("message"):
+            raise serializers.ValidationError("Either message or template_id is required.")
+        try:
+            if template is not None:
+                compile_template(template)
+            else:
+                compile_message(NOTIFICATION_SUBJECT, attrs["message"])
+        except TemplateSyntaxError as exc:
+            raise serializers.ValidationError({"message": str(exc)})
+        return attrs
 
 
 class AdminNotifyView(APIView):
     """
     POST /api/admin/notify/
-    Send email notification to selected users.
+    Send email notification to selected users. Send an Idempotency-Key
+    header to make retries safe: a repeated key returns the original job.
     Admin only.
     """
     permission_classes = [IsStaffUser]
 
+    @idempotent
     def post(self, request, *args, **kwargs):
         serializer = AdminNotifySerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         recipients = serializer.validated_data["recipients"]
-        message = serializer.validated_data["message"]
+        message = serializer.validated_data.get("message", "")
+        template = serializer.validated_data.get("template_id")
 
         # Filter only existing users
-        existing_users = User.objects.filter(email__in=recipients).values_list("email", flat=True)
+        # Stored emails are lowercase, so this stays on the email index
+        existing_users = User.objects.filter(
+            email__in=[email.lower() for email in recipients]
+        ).values_list("email", flat=True)
         recipient_list = list(existing_users)
 
         if not recipient_list:
@@ -84,11 +123,26 @@ class AdminNotifyView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Generate unique job ID
-        job_id = get_random_string(32)
-        
-        # Call Celery task asynchronously
-        send_admin_notification_email.delay(recipient_list, message)
+        # Generate unique job ID and the progress record the chunk tasks update.
+        # The task goes through the outbox, so it is dispatched if and only if
+        # the job is committed, and the broker is never contacted here.
+        with transaction.atomic():
+            job = NotificationJob.objects.create(
+                id=get_random_string(32),
+                created_by=request.user,
+                total=len(recipient_list),
+            )
+            job_id = job.id
+            if template is not None:
+                outbox.enqueue(send_admin_notification_email, recipient_list, message, job_id, template.pk)
+            else:
+                outbox.enqueue(send_admin_notification_email, recipient_list, message, job_id)
+
+        audit.record(
+            request.user, "send_notification",
+            f"Notification job {job_id} to {len(recipient_list)} recipients"
+            + (f" using template {template.pk}" if template is not None else ""),
+        )
 
         return Response(
             {
@@ -98,3 +152,123 @@ class AdminNotifyView(APIView):
             },
             status=status.HTTP_202_ACCEPTED,
         )
+
+
+class AdminNotifyStatusView(APIView):
+    """
+    GET /api/admin/notify/<job_id>/
+    Returns delivery progress of a notification job.
+    Admin only.
+    """
+    permission_classes = [IsStaffUser]
+
+    def get(self, request, job_id, *args, **kwargs):
+        job = get_object_or_404(NotificationJob, pk=job_id)
+        return Response(
+            {
+                "job_id": job.id,
+                "status": job.status,
+                "total": job.total,
+                "sent": job.sent,
+                "failed": job.failed,
+                "pending": job.pending,
+                "created_at": job.created_at,
+                "updated_at": job.updated_at,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class AdminAnalyticsQuerySerializer(serializers.Serializer):
+    days = serializers.IntegerField(min_value=1, max_value=366, default=30)
+    user_id = serializers.IntegerField(required=False)
+
+
+class AdminDailyActivityView(APIView):
+    """
+    GET /api/admin/analytics/daily/?days=30&user_id=<id>
+    Returns tasks created and completed per day, overall or for one user.
+    Reads only the DailyTaskActivity rollups.
+    Admin only.
+    """
+    permission_classes = [IsStaffUser]
+
+    def get(self, request, *args, **kwargs):
+        serializer = AdminAnalyticsQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        days = serializer.validated_data["days"]
+        user_id = serializer.validated_data.get("user_id")
+
+        end_day = timezone.now().date()
+        start_day = end_day - timedelta(days=days - 1)
+        return Response(
+            {
+                "user_id": user_id,
+                "start": start_day,
+                "end": end_day,
+                "series": daily_activity(start_day, end_day, user_id=user_id),
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class AdminDatabasePoolView(APIView):
+    """
+    GET /api/admin/db-pool/
+    Returns connection pool statistics of the worker process that served
+    the request (empty when pooling is disabled).
+    Admin only.
+    """
+    permission_classes = [IsStaffUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response({"pools": pool_stats()}, status=status.HTTP_200_OK)
+
+
+class AdminLogSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AdminLog
+        fields = ["id", "admin", "admin_email", "action", "description", "created_at"]
+
+
+class AdminLogPagination(CursorPagination):
+    ordering = ("-created_at", "-id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+
+class AdminLogQuerySerializer(serializers.Serializer):
+    admin = serializers.IntegerField(required=False)
+    action = serializers.ChoiceField(choices=AdminLog.ACTION_CHOICES, required=False)
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+
+
+class AdminLogView(generics.ListAPIView):
+    """
+    GET /api/admin/logs/
+    Returns admin log entries, newest first, by cursor.
+    Query params: admin (user id), action, since, until, cursor, page_size.
+    Each filter is served by an index ending in created_at.
+    Admin only.
+    """
+    permission_classes = [IsStaffUser]
+    serializer_class = AdminLogSerializer
+    pagination_class = AdminLogPagination
+
+    def get_queryset(self):
+        query = AdminLogQuerySerializer(data=self.request.query_params)
+        query.is_valid(raise_exception=True)
+        filters = query.validated_data
+
+        queryset = AdminLog.objects.all()
+        if "admin" in filters:
+            queryset = queryset.filter(admin_id=filters["admin"])
+        if "action" in filters:
+            queryset = queryset.filter(action=filters["action"])
+        if "since" in filters:
+            queryset = queryset.filter(created_at__gte=filters["since"])
+        if "until" in filters:
+            queryset = queryset.filter(created_at__lt=filters["until"])
+        return queryset
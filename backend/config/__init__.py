@@ -1,6 +1,14 @@
-# This will make sure celery app is loaded
-from .celery import app as celery_app
+# The Celery app is created on first use (config.celery is imported by the
+# task modules and by `celery -A config`), so processes that never touch
+# Celery don't pay for importing it.
 
-__all__ = ('celery_app',)
 
-# Trigger workflow test
+def __getattr__(name):
+    if name == "celery_app":
+        from .celery import app
+
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = ('celery_app',)
@@ -6,3 +6,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 application = get_asgi_application()
+
+# uvicorn starts each worker process by importing this module.
+from adminpanel import audit  # noqa: E402
+
+audit.start_flusher()
@@ -0,0 +1,87 @@
+"""
+Helpers for the async (ASGI) read endpoints under /api/async/.
+
+DRF 3.x views are synchronous, so these endpoints are plain Django async
+views that reuse DRF's pieces which do no I/O (filter backends,
+serializers, pagination links, error payloads) and await the ORM for
+everything else. Responses match the corresponding DRF views.
+"""
+import functools
+
+from django.core.paginator import InvalidPage
+from django.http import Http404, JsonResponse
+from rest_framework import exceptions
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.request import Request
+
+from accounts.authentication import CachedJWTAuthentication
+
+
+class AsyncPageNumberPagination(PageNumberPagination):
+    """PageNumberPagination whose count and page fetch are awaited."""
+
+    async def apaginate_queryset(self, queryset, request):
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        # Pre-set the cached count so the paginator never queries synchronously.
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(page_number=page_number, message=str(exc))
+            raise exceptions.NotFound(msg)
+
+        self.request = request
+        return [obj async for obj in self.page.object_list]
+
+
+def api_exception_response(exc):
+    """Render an APIException the way rest_framework.views.exception_handler does."""
+    if isinstance(exc, Http404):
+        exc = exceptions.NotFound(*exc.args)
+
+    headers = {}
+    if getattr(exc, "auth_header", None):
+        headers["WWW-Authenticate"] = exc.auth_header
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+    return JsonResponse(data, status=exc.status_code, headers=headers, safe=False)
+
+
+async def aauthenticate(request):
+    """
+    Resolve the user from a Bearer token, falling back to the session, like
+    the DEFAULT_AUTHENTICATION_CLASSES pair. Returns None when anonymous.
+    """
+    authenticator = CachedJWTAuthentication()
+    result = await authenticator.aauthenticate(request)
+    if result is not None:
+        return result[0]
+
+    user = await request.auser()
+    return user if user.is_authenticated else None
+
+
+def async_api_view(view):
+    """
+    Wrap an `async def view(request, user, ...)` taking a DRF Request: require
+    an authenticated user and turn API exceptions into JSON responses.
+    """
+    authenticator = CachedJWTAuthentication()
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            user = await aauthenticate(request)
+            if user is None:
+                raise exceptions.NotAuthenticated()
+            return await view(Request(request), user, *args, **kwargs)
+        except (exceptions.APIException, Http404) as exc:
+            if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+                exc.auth_header = authenticator.authenticate_header(request)
+            return api_exception_response(exc)
+
+    return wrapper
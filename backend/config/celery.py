@@ -1,9 +1,17 @@
 import os
 from celery import Celery
+from celery.schedules import crontab
+from celery.signals import worker_process_init, worker_process_shutdown
+from django.conf import settings
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
+# Celery's Django fixup runs the system checks when a worker boots, and the
+# URL checks import the whole REST and schema stack. Checks already run on
+# deploy and in CI.
+os.environ.setdefault('CELERY_SKIP_CHECKS', '1')
+
 app = Celery('config')
 
 # Using a string here means the worker doesn't have to serialize
@@ -12,5 +20,51 @@ app = Celery('config')
 #   should have a `CELERY_` prefix.
 app.config_from_object('django.conf:settings', namespace='CELERY')
 
+app.conf.beat_schedule = {
+    "rebuild-task-summaries": {
+        "task": "adminpanel.tasks.rebuild_task_summaries",
+        "schedule": crontab(hour=3, minute=0),
+    },
+    "roll-up-task-activity": {
+        "task": "adminpanel.tasks.roll_up_task_activity",
+        "schedule": crontab(minute="*/5"),
+    },
+    "purge-expired-uploads": {
+        "task": "tasks.tasks.purge_expired_uploads",
+        "schedule": crontab(minute=30),
+    },
+    "prune-admin-logs": {
+        "task": "adminpanel.tasks.prune_admin_logs",
+        "schedule": crontab(hour=3, minute=30),
+    },
+    "relay-outbox": {
+        "task": "adminpanel.tasks.relay_outbox",
+        "schedule": settings.OUTBOX_RELAY_INTERVAL,
+        # A relay that couldn't start before the next one is due is redundant.
+        "options": {"expires": settings.OUTBOX_RELAY_INTERVAL},
+    },
+}
+
 # Load task modules from all registered Django apps.
 app.autodiscover_tasks()
+
+
+@worker_process_init.connect
+def reset_database_pools(**kwargs):
+    from config.db_pool import forget_inherited_pools
+
+    forget_inherited_pools()
+
+
+@worker_process_init.connect
+def start_audit_log_flusher(**kwargs):
+    from adminpanel import audit
+
+    audit.start_flusher()
+
+
+@worker_process_shutdown.connect
+def flush_audit_log(**kwargs):
+    from adminpanel import audit
+
+    audit.flush()
@@ -0,0 +1,158 @@
+"""
+Response compression negotiated from Accept-Encoding.
+
+gzip comes from the standard library, brotli ("br") and zstd from the
+`brotli` and `zstandard` packages in requirements.txt; a coding whose
+package isn't installed is simply not offered. The client's q-values
+decide, and ties go to COMPRESSION["PREFERENCE"].
+
+Levels are chosen per content type (COMPRESSION["LEVELS"]): dynamic JSON
+is compressed at a fast level because it is paid on every request, while
+payloads rendered once, like the OpenAPI schema, are precompressed at
+STATIC_LEVELS by compress_all() and served as is.
+
+HTML is never compressed: pages such as the admin login carry a CSRF token
+next to reflected input, which compression would expose to BREACH.
+"""
+import gzip
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def _gzip(data, level):
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+CODECS = {"gzip": _gzip}
+if brotli is not None:
+    CODECS["br"] = lambda data, level: brotli.compress(data, quality=level)
+if zstandard is not None:
+    CODECS["zstd"] = lambda data, level: zstandard.ZstdCompressor(level=level).compress(data)
+
+
+def available_codings():
+    return [coding for coding in settings.COMPRESSION["PREFERENCE"] if coding in CODECS]
+
+
+def negotiate(accept_encoding, codings=None):
+    """
+    The coding to use for a request's Accept-Encoding header, or None to
+    send the body uncompressed. `codings` defaults to every available one,
+    in preference order.
+    """
+    if codings is None:
+        codings = available_codings()
+    weights = {}
+    for part in (accept_encoding or "").split(","):
+        coding, *params = (item.strip() for item in part.split(";"))
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[coding.lower()] = q
+
+    best, best_q = None, 0.0
+    for coding in codings:
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+NEVER_COMPRESSED = ("text/html", "application/xhtml+xml")
+
+
+def compression_level(content_type, coding):
+    """The level for `coding` under the content-type policy, or None if the type isn't compressed."""
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    if media_type in NEVER_COMPRESSED:
+        return None
+    levels = settings.COMPRESSION["LEVELS"]
+    policy = levels.get(media_type)
+    if policy is None:
+        policy = levels.get(media_type.split("/", 1)[0] + "/*")
+    if policy is None and media_type.endswith(("+json", "+xml")):
+        policy = levels.get("application/json")
+    return None if policy is None else policy[coding]
+
+
+def compress_all(body):
+    """Compress `body` with every available coding at its static level."""
+    levels = settings.COMPRESSION["STATIC_LEVELS"]
+    return {coding: CODECS[coding](body, levels[coding]) for coding in available_codings()}
+
+
+class CompressionMiddleware:
+    """
+    Compress eligible responses with the negotiated coding. Like Django's
+    GZipMiddleware it leaves streaming, partial and already encoded
+    responses alone and turns strong ETags weak, since the compressed
+    bytes are a different representation of the same content.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self._compress(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self._compress(request, await self.get_response(request))
+
+    def _compress(self, request, response):
+        config = settings.COMPRESSION
+        if (
+            not config["ENABLED"]
+            or response.streaming
+            or response.status_code != 200
+            or response.has_header("Content-Encoding")
+            or "no-transform" in response.get("Cache-Control", "")
+        ):
+            return response
+
+        content_type = response.get("Content-Type", "")
+        if compression_level(content_type, "gzip") is None:
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if len(response.content) < config["MIN_SIZE"]:
+            return response
+
+        coding = negotiate(request.META.get("HTTP_ACCEPT_ENCODING"))
+        if coding is None:
+            return response
+        compressed = CODECS[coding](response.content, compression_level(content_type, coding))
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+        response["Content-Encoding"] = coding
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        return response
@@ -0,0 +1,31 @@
+from django.db import connections
+
+
+def pool_stats():
+    """
+    Return psycopg_pool statistics for every pooled database alias in this
+    process, e.g. pool_size, pool_available, requests_waiting,
+    requests_wait_ms and connections_errors. Aliases without a pool are
+    omitted.
+    """
+    stats = {}
+    for conn in connections.all():
+        pool = getattr(conn, "pool", None)
+        if pool is not None:
+            stats[conn.alias] = pool.get_stats()
+    return stats
+
+
+def forget_inherited_pools():
+    """
+    Forget connection pools inherited from a parent process after fork.
+
+    A pool created before the fork shares its sockets with the parent and
+    has no worker threads in the child, so each child starts its own. The
+    inherited pool is dropped rather than closed, since closing would
+    terminate the parent's connections.
+    """
+    for conn in connections.all():
+        pools = getattr(conn, "_connection_pools", None)
+        if pools is not None:
+            pools.pop(conn.alias, None)
@@ -0,0 +1,135 @@
+"""
+Primary/replica routing with read-your-writes stickiness.
+
+Reads made while serving a request go to a random replica from
+settings.DATABASE_REPLICAS; writes always go to "default". Once a request
+writes, the rest of it reads from the primary, and so do later requests
+from the same browser (signed cookie) or the same user (cache key) for
+REPLICA_PIN_SECONDS. Code running outside a request (Celery tasks,
+management commands) and reads inside a transaction always use the
+primary.
+"""
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+PRIMARY = "default"
+PIN_COOKIE = "db_primary_pin"
+PIN_COOKIE_SALT = "config.db_routers"
+
+_state = ContextVar("replica_routing_state", default=None)
+
+
+class RoutingState:
+    __slots__ = ("pinned", "wrote", "user_id")
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+        self.user_id = None
+
+
+def _user_pin_key(user_id):
+    return f"db:pin:user:{user_id}"
+
+
+def note_user(user_id):
+    """Record the authenticated user and pin the request if that user wrote recently."""
+    state = _state.get()
+    if state is None or not settings.DATABASE_REPLICAS:
+        return
+    state.user_id = user_id
+    if not state.pinned and cache.get(_user_pin_key(user_id)):
+        state.pinned = True
+
+
+async def anote_user(user_id):
+    state = _state.get()
+    if state is None or not settings.DATABASE_REPLICAS:
+        return
+    state.user_id = user_id
+    if not state.pinned and await cache.aget(_user_pin_key(user_id)):
+        state.pinned = True
+
+
+def pin_to_primary():
+    """Send the remaining reads of the current request to the primary."""
+    state = _state.get()
+    if state is not None:
+        state.pinned = True
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.pinned or not settings.DATABASE_REPLICAS:
+            return PRIMARY
+        if connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.pinned = state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaPinningMiddleware:
+    """Open a routing state per request and carry write pins across requests."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _state.set(RoutingState(pinned=self._has_pin_cookie(request)))
+        try:
+            response = self.get_response(request)
+            state = _state.get()
+            if state.wrote and state.user_id is not None:
+                cache.set(_user_pin_key(state.user_id), 1, settings.REPLICA_PIN_SECONDS)
+            return self._finish(state, response)
+        finally:
+            _state.reset(token)
+
+    async def __acall__(self, request):
+        token = _state.set(RoutingState(pinned=self._has_pin_cookie(request)))
+        try:
+            response = await self.get_response(request)
+            state = _state.get()
+            if state.wrote and state.user_id is not None:
+                await cache.aset(_user_pin_key(state.user_id), 1, settings.REPLICA_PIN_SECONDS)
+            return self._finish(state, response)
+        finally:
+            _state.reset(token)
+
+    def _has_pin_cookie(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return False
+        return request.get_signed_cookie(
+            PIN_COOKIE, default=None, salt=PIN_COOKIE_SALT, max_age=settings.REPLICA_PIN_SECONDS
+        ) is not None
+
+    def _finish(self, state, response):
+        if state.wrote and settings.DATABASE_REPLICAS:
+            response.set_signed_cookie(
+                PIN_COOKIE, "1", salt=PIN_COOKIE_SALT,
+                max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite="Lax",
+            )
+        return response
@@ -0,0 +1,128 @@
+"""
+Idempotency-Key support for unsafe API endpoints.
+
+A client that may retry a POST sends the same Idempotency-Key header with
+every attempt. The first attempt claims the key with cache.add() (SET NX
+on Redis) and runs the view; its response is stored under the key for
+IDEMPOTENCY["TTL"] seconds. Retries get the stored response back, marked
+with Idempotent-Replayed: true, without the view running again. A
+duplicate that arrives while the first attempt is still running waits for
+its result, or gets 409 after WAIT_TIMEOUT. Keys are scoped to the user
+and endpoint. Reusing a key with a different body (compared as parsed data,
+so JSON key order doesn't matter) is answered with 422.
+
+Server errors and raised exceptions release the key, so a retry of a
+request that failed runs the view again.
+"""
+import functools
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+STORED_HEADERS = ("Location", "ETag")
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.05
+CSRF_FIELD = "csrfmiddlewaretoken"
+
+_IN_PROGRESS = "in_progress"
+
+
+def _cache_key(request, key):
+    user_id = request.user.pk if request.user.is_authenticated else "anon"
+    digest = hashlib.sha256(f"{request.method}:{request.path}:{key}".encode()).hexdigest()
+    return f"idempotency:{user_id}:{digest}"
+
+
+def _fingerprint(request):
+    # Hash the parsed data rather than request.body: once CSRF checking has
+    # read a form POST the raw stream is gone, and a resent form carries a
+    # fresh CSRF token without being a different request.
+    data = request.data
+    if hasattr(data, "lists"):
+        data = {name: values for name, values in data.lists() if name != CSRF_FIELD}
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _replay(record):
+    response = Response(record["data"], status=record["status"], headers=record["headers"])
+    response[REPLAYED_HEADER] = "true"
+    return response
+
+
+def _error(detail, status_code):
+    return Response({"detail": detail}, status=status_code)
+
+
+def idempotent(view_method):
+    """
+    Decorate a DRF view or viewset method (post, create, ...) to honour the
+    Idempotency-Key header. Requests without the header are unaffected.
+    """
+
+    @functools.wraps(view_method)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return view_method(view, request, *args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return _error(f"{HEADER} must be 1-{MAX_KEY_LENGTH} characters.", status.HTTP_400_BAD_REQUEST)
+
+        config = settings.IDEMPOTENCY
+        cache_key = _cache_key(request, key)
+        fingerprint = _fingerprint(request)
+
+        if not cache.add(cache_key, {"state": _IN_PROGRESS, "fingerprint": fingerprint}, config["LOCK_TIMEOUT"]):
+            deadline = time.monotonic() + config["WAIT_TIMEOUT"]
+            while True:
+                record = cache.get(cache_key)
+                if record is None:
+                    # The first attempt failed and released the key: run it now.
+                    if cache.add(cache_key, {"state": _IN_PROGRESS, "fingerprint": fingerprint}, config["LOCK_TIMEOUT"]):
+                        break
+                    continue
+                if record["fingerprint"] != fingerprint:
+                    return _error(
+                        f"{HEADER} was already used with a different request body.",
+                        status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    )
+                if record["state"] != _IN_PROGRESS:
+                    return _replay(record)
+                if time.monotonic() >= deadline:
+                    response = _error(
+                        "A request with this Idempotency-Key is still being processed.", status.HTTP_409_CONFLICT
+                    )
+                    response["Retry-After"] = "1"
+                    return response
+                time.sleep(POLL_INTERVAL)
+
+        try:
+            response = view_method(view, request, *args, **kwargs)
+        except BaseException:
+            cache.delete(cache_key)
+            raise
+
+        if response.status_code >= 500 or not isinstance(response, Response):
+            cache.delete(cache_key)
+        else:
+            cache.set(
+                cache_key,
+                {
+                    "state": "done",
+                    "fingerprint": fingerprint,
+                    "status": response.status_code,
+                    "data": response.data,
+                    "headers": {name: response[name] for name in STORED_HEADERS if response.has_header(name)},
+                },
+                config["TTL"],
+            )
+        return response
+
+    return wrapper
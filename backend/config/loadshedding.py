@@ -0,0 +1,199 @@
+"""
+Adaptive load shedding for web workers.
+
+Under a traffic spike requests pile up in gunicorn's listen backlog, and
+by the time a worker reads one the client may already have given up. The
+middleware looks at two signals per worker process: how many requests it
+is running right now, and how long the current one sat in the queue,
+taken from the X-Request-Start header the proxy stamps on arrival
+(nginx: `proxy_set_header X-Request-Start "t=${msec}";`).
+
+Requests are classified as critical, normal or low priority. Critical
+ones (authentication and task writes) are never shed. Low-priority ones
+(admin overview, analytics and logs, the schema and docs, attachment
+downloads) are rejected with 503 and Retry-After as soon as the worker is
+overloaded, so the capacity goes to the work users are waiting on;
+normal requests are only shed past higher limits.
+
+"Overloaded" adapts to the observed queue: a single slow request doesn't
+trip it, but when even the shortest queue time over an INTERVAL window
+exceeds TARGET_MS, the backlog is standing rather than a burst, and
+low-priority work is shed until a window comes in under target again.
+"""
+import logging
+import re
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import JsonResponse
+
+logger = logging.getLogger(__name__)
+
+CRITICAL = "critical"
+NORMAL = "normal"
+LOW = "low"
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# (methods or None for any, path pattern, priority); the first match wins.
+PRIORITY_RULES = [
+    (None, re.compile(r"^/api/accounts/(token|register|logout)/"), CRITICAL),
+    (("POST", "PUT", "PATCH", "DELETE"), re.compile(r"^/api/tasks/"), CRITICAL),
+    (SAFE_METHODS, re.compile(r"^/api/admin/(overview|analytics|logs|db-pool)/"), LOW),
+    (None, re.compile(r"^/api/(schema|docs)/"), LOW),
+    (SAFE_METHODS, re.compile(r"^/api/tasks/\d+/attachments/\d+/download/"), LOW),
+]
+
+
+def request_priority(request):
+    for methods, pattern, priority in PRIORITY_RULES:
+        if (methods is None or request.method in methods) and pattern.match(request.path_info):
+            return priority
+    return NORMAL
+
+
+def queue_time_ms(header, now=None):
+    """
+    Milliseconds between the proxy stamping X-Request-Start and now, or
+    None if the header is missing or unparseable. Accepts `t=` prefixed or
+    bare timestamps in seconds (nginx), milliseconds (Heroku) or
+    microseconds (Apache).
+    """
+    if not header:
+        return None
+    value = header.strip()
+    if value.startswith("t="):
+        value = value[2:]
+    try:
+        started = float(value)
+    except ValueError:
+        return None
+    if started > 1e14:
+        started /= 1e6
+    elif started > 1e11:
+        started /= 1e3
+    now = time.time() if now is None else now
+    # Clock skew between proxy and worker can make this slightly negative.
+    return max((now - started) * 1000, 0.0)
+
+
+class LoadMonitor:
+    """In-flight count and standing-queue detection for one worker process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.overloaded = False
+        self.shed = {LOW: 0, NORMAL: 0}
+        self._window_start = None
+        self._window_min = None
+
+    def observe(self, queue_ms, now=None):
+        """Fold one request's queue time into the current window."""
+        if queue_ms is None:
+            return
+        config = settings.LOAD_SHEDDING
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self._window_start is None:
+                self._window_start = now
+            if self._window_min is None or queue_ms < self._window_min:
+                self._window_min = queue_ms
+            if now - self._window_start >= config["INTERVAL"]:
+                overloaded = self._window_min > config["TARGET_MS"]
+                if overloaded != self.overloaded:
+                    logger.warning(
+                        "Load shedding %s (minimum queue time %.0f ms)",
+                        "engaged" if overloaded else "released", self._window_min,
+                    )
+                self.overloaded = overloaded
+                self._window_start = now
+                self._window_min = None
+
+    def should_shed(self, priority, queue_ms):
+        if priority == CRITICAL:
+            return False
+        config = settings.LOAD_SHEDDING
+        in_flight = self.in_flight
+        queue_ms = queue_ms or 0.0
+        # An in-flight limit of 0 disables that check (a sync worker only ever runs one request).
+        if priority == LOW:
+            return (
+                self.overloaded
+                or 0 < config["LOW_MAX_IN_FLIGHT"] < in_flight
+                or queue_ms > config["LOW_MAX_QUEUE_MS"]
+            )
+        return 0 < config["MAX_IN_FLIGHT"] < in_flight or queue_ms > config["MAX_QUEUE_MS"]
+
+    def enter(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def leave(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def record_shed(self, priority):
+        with self._lock:
+            self.shed[priority] += 1
+
+    def stats(self):
+        return {"in_flight": self.in_flight, "overloaded": self.overloaded, "shed": dict(self.shed)}
+
+
+monitor = LoadMonitor()
+
+
+def shed_response():
+    response = JsonResponse({"detail": "Server is busy, please retry shortly."}, status=503)
+    response["Retry-After"] = str(settings.LOAD_SHEDDING["RETRY_AFTER"])
+    return response
+
+
+class LoadSheddingMiddleware:
+    """Reject non-critical requests early with 503 while this worker is overloaded."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        rejected = self._admit(request)
+        if rejected is not None:
+            return rejected
+        try:
+            return self.get_response(request)
+        finally:
+            monitor.leave()
+
+    async def __acall__(self, request):
+        rejected = self._admit(request)
+        if rejected is not None:
+            return rejected
+        try:
+            return await self.get_response(request)
+        finally:
+            monitor.leave()
+
+    def _admit(self, request):
+        """Count the request in, or return the 503 that turns it away."""
+        if not settings.LOAD_SHEDDING["ENABLED"]:
+            monitor.enter()
+            return None
+        queue_ms = queue_time_ms(request.META.get("HTTP_X_REQUEST_START"))
+        monitor.observe(queue_ms)
+        priority = request_priority(request)
+        # The request itself counts towards the in-flight limit.
+        monitor.enter()
+        if monitor.should_shed(priority, queue_ms):
+            monitor.leave()
+            monitor.record_shed(priority)
+            return shed_response()
+        return None
@@ -0,0 +1,153 @@
+"""
+Pre-rendered OpenAPI schema for /api/schema/.
+
+Generating the schema introspects every view and serializer, yet its
+output only changes when the code does. Each format is therefore rendered
+once per code version and kept in memory together with an ETag and a copy
+precompressed with every available coding (config.compression). Rendered
+files are also written to SCHEMA_CACHE["DIR"], so `manage.py build_schema`
+can produce them at image build time and every worker loads them instead
+of generating.
+"""
+import hashlib
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.views import SpectacularAPIView
+
+from config import compression
+
+RENDERERS = {"yaml": OpenApiYamlRenderer, "json": OpenApiJsonRenderer}
+
+
+@dataclass(frozen=True)
+class RenderedSchema:
+    body: bytes
+    encoded: dict  # coding -> compressed body
+    etag: str
+
+    @classmethod
+    def from_body(cls, body):
+        return cls(
+            body=body,
+            encoded=compression.compress_all(body),
+            etag=hashlib.sha256(body).hexdigest()[:32],
+        )
+
+
+@lru_cache(maxsize=1)
+def code_version():
+    """
+    SCHEMA_CACHE["CODE_VERSION"] when set (e.g. the git SHA), otherwise a
+    hash of the project's Python sources.
+    """
+    if settings.SCHEMA_CACHE["CODE_VERSION"]:
+        return settings.SCHEMA_CACHE["CODE_VERSION"]
+
+    base_dir = Path(settings.BASE_DIR)
+    roots = {Path(config.path) for config in apps.get_app_configs() if Path(config.path).is_relative_to(base_dir)}
+    roots.add(base_dir / "config")
+    digest = hashlib.sha256()
+    for path in sorted(p for root in roots for p in root.rglob("*.py")):
+        digest.update(str(path.relative_to(base_dir)).encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def schema_path(fmt):
+    return Path(settings.SCHEMA_CACHE["DIR"]) / code_version() / f"openapi.{fmt}"
+
+
+def render_schema(fmt):
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    return RENDERERS[fmt]().render(generator.get_schema(request=None, public=True), renderer_context={})
+
+
+def write_schema(fmt, body):
+    path = schema_path(fmt)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_bytes(body)
+    tmp.replace(path)
+    return path
+
+
+_rendered = {}
+_lock = threading.Lock()
+
+
+def get_rendered_schema(fmt):
+    """Return the schema in `fmt`, loading or rendering it on first use."""
+    schema = _rendered.get(fmt)
+    if schema is not None:
+        return schema
+
+    with _lock:
+        if fmt not in _rendered:
+            path = schema_path(fmt)
+            try:
+                body = path.read_bytes()
+            except OSError:
+                body = render_schema(fmt)
+                try:
+                    write_schema(fmt, body)
+                except OSError:
+                    pass  # Read-only filesystem; keep it in memory only.
+            _rendered[fmt] = RenderedSchema.from_body(body)
+        return _rendered[fmt]
+
+
+def clear_rendered_schemas():
+    _rendered.clear()
+    code_version.cache_clear()
+
+
+class CachedSpectacularAPIView(SpectacularAPIView):
+    """
+    SpectacularAPIView serving the pre-rendered schema with an ETag,
+    precompressed in the negotiated coding. Requests whose schema can
+    differ (language, API version or non-public schemas) fall back to
+    generating it.
+    """
+
+    def get(self, request, *args, **kwargs):
+        fmt = request.accepted_renderer.format
+        if (
+            not settings.SCHEMA_CACHE["ENABLED"]
+            or not self.serve_public
+            or self.custom_settings
+            or fmt not in RENDERERS
+            or request.GET.get("lang")
+            or request.GET.get("version")
+        ):
+            return super().get(request, *args, **kwargs)
+
+        schema = get_rendered_schema(fmt)
+        coding = compression.negotiate(request.META.get("HTTP_ACCEPT_ENCODING"), list(schema.encoded))
+        etag = quote_etag(f"{schema.etag}-{coding}" if coding else schema.etag)
+
+        if etag in parse_etags(request.META.get("HTTP_IF_NONE_MATCH", "")):
+            response = HttpResponseNotModified()
+        else:
+            renderer = request.accepted_renderer
+            content_type = request.accepted_media_type
+            if renderer.charset:
+                content_type = f"{content_type}; charset={renderer.charset}"
+            response = HttpResponse(schema.encoded[coding] if coding else schema.body, content_type=content_type)
+            response["Content-Disposition"] = f'inline; filename="{self._get_filename(request, None)}"'
+            if coding:
+                response["Content-Encoding"] = coding
+
+        response["ETag"] = etag
+        response["Cache-Control"] = "no-cache"
+        patch_vary_headers(response, ("Accept", "Accept-Encoding"))
+        return response
@@ -2,6 +2,8 @@ import os
 from pathlib import Path
 
 import dj_database_url
+from corsheaders.defaults import default_headers
+from django.core.exceptions import ImproperlyConfigured
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -35,7 +37,10 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
+    "config.loadshedding.LoadSheddingMiddleware",
+    "config.compression.CompressionMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "config.db_routers.ReplicaPinningMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -64,6 +69,14 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "config.wsgi.application"
 
+# Import-time budgets (ms) per startup path, checked by `manage.py startup_profile`
+# and config.tests; see config.startup for the scenarios.
+STARTUP_IMPORT_BUDGET_MS = {
+    "setup": int(os.environ.get("STARTUP_BUDGET_SETUP_MS", 1500)),
+    "celery": int(os.environ.get("STARTUP_BUDGET_CELERY_MS", 2000)),
+    "wsgi": int(os.environ.get("STARTUP_BUDGET_WSGI_MS", 3000)),
+}
+
 # Database (با استفاده از dj_database_url و متغیرهای محیطی GitHub Actions/Docker)
 DATABASES = {
     "default": dj_database_url.config(
@@ -71,12 +84,87 @@ DATABASES = {
     )
 }
 
-print(f"DEBUG: Connecting to Database -> {DATABASES['default']['ENGINE']}")
+# Postgres connection pool (psycopg_pool via Django's native support). Each
+# gunicorn worker / Celery child process owns one pool; size them so that
+# processes * DATABASE_POOL_MAX_SIZE stays below Postgres' max_connections.
+DATABASE_POOL = os.environ.get("DATABASE_POOL", "True") == "True"
+if DATABASE_POOL and DATABASES["default"].get("ENGINE") == "django.db.backends.postgresql":
+    from psycopg_pool import ConnectionPool
+
+    # Pooled connections are returned after each request instead of being kept open.
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"].setdefault("OPTIONS", {})["pool"] = {
+        "min_size": int(os.environ.get("DATABASE_POOL_MIN_SIZE", 2)),
+        "max_size": int(os.environ.get("DATABASE_POOL_MAX_SIZE", 10)),
+        # Seconds a request may wait for a free connection before erroring.
+        "timeout": float(os.environ.get("DATABASE_POOL_TIMEOUT", 10)),
+        # Connections are recycled after max_lifetime and closed after max_idle.
+        "max_lifetime": float(os.environ.get("DATABASE_POOL_MAX_LIFETIME", 1800)),
+        "max_idle": float(os.environ.get("DATABASE_POOL_MAX_IDLE", 300)),
+        # Health-check each connection as it is handed out.
+        "check": ConnectionPool.check_connection,
+    }
+
+# Read replicas: each URL in DATABASE_REPLICA_URLS (comma-separated) becomes
+# an alias replica_1..N. Requests read from a replica unless they, their
+# browser or their user wrote within REPLICA_PIN_SECONDS (see config.db_routers).
+DATABASE_REPLICAS = []
+for _index, _url in enumerate(
+    filter(None, (url.strip() for url in os.environ.get("DATABASE_REPLICA_URLS", "").split(","))),
+    start=1,
+):
+    _alias = f"replica_{_index}"
+    DATABASES[_alias] = dj_database_url.parse(_url, conn_max_age=DATABASES["default"]["CONN_MAX_AGE"])
+    if "pool" in DATABASES["default"].get("OPTIONS", {}) and DATABASES[_alias]["ENGINE"] == DATABASES["default"]["ENGINE"]:
+        DATABASES[_alias].setdefault("OPTIONS", {})["pool"] = dict(DATABASES["default"]["OPTIONS"]["pool"])
+    DATABASE_REPLICAS.append(_alias)
+
+DATABASE_ROUTERS = ["config.db_routers.PrimaryReplicaRouter"]
+REPLICA_PIN_SECONDS = int(os.environ.get("REPLICA_PIN_SECONDS", 5))
+
+# Cache (shared Redis when REDIS_URL is set, per-process memory otherwise)
+REDIS_URL = os.environ.get("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
 
 # Authentication backends - support case-insensitive email login
+# CaseInsensitiveEmailBackend extends ModelBackend (permissions included);
+# listing ModelBackend as well would hash a wrong password a second time.
 AUTHENTICATION_BACKENDS = [
     'accounts.backends.CaseInsensitiveEmailBackend',
-    'django.contrib.auth.backends.ModelBackend',
+]
+
+# Password hashing: the first hasher is used for new hashes; stored hashes
+# with another algorithm or cost are upgraded on the next successful login.
+# argon2 and bcrypt_sha256 need argon2-cffi and bcrypt (requirements.txt).
+PASSWORD_HASH_ALGORITHM = os.environ.get("PASSWORD_HASH_ALGORITHM", "pbkdf2_sha256")
+PASSWORD_HASH_ITERATIONS = int(os.environ.get("PASSWORD_HASH_ITERATIONS", 0))  # 0 = Django default
+PASSWORD_HASH_WORK_FACTOR = int(os.environ.get("PASSWORD_HASH_WORK_FACTOR", 0))  # scrypt, 0 = default
+PASSWORD_UPGRADE_IN_BACKGROUND = os.environ.get("PASSWORD_UPGRADE_IN_BACKGROUND", "True") == "True"
+_PASSWORD_HASHERS = {
+    "pbkdf2_sha256": "accounts.hashers.ConfigurablePBKDF2PasswordHasher",
+    "scrypt": "accounts.hashers.ConfigurableScryptPasswordHasher",
+    "argon2": "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "bcrypt_sha256": "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "pbkdf2_sha1": "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+}
+if PASSWORD_HASH_ALGORITHM not in _PASSWORD_HASHERS:
+    raise ImproperlyConfigured(
+        f"PASSWORD_HASH_ALGORITHM must be one of {', '.join(_PASSWORD_HASHERS)}, not {PASSWORD_HASH_ALGORITHM!r}."
+    )
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASH_ALGORITHM]] + [
+    hasher for name, hasher in _PASSWORD_HASHERS.items() if name != PASSWORD_HASH_ALGORITHM
 ]
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -101,13 +189,27 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 
+MEDIA_ROOT = Path(os.environ.get("MEDIA_ROOT", BASE_DIR / "media"))
+MEDIA_URL = "media/"
+
+# Task attachments: resumable uploads are assembled in ATTACHMENT_UPLOAD_DIR,
+# then stored once per content hash. ATTACHMENT_SENDFILE hands downloads to
+# the proxy: "x-accel-redirect" (nginx, internal location at
+# ATTACHMENT_SENDFILE_PREFIX aliased to MEDIA_ROOT) or "x-sendfile".
+ATTACHMENT_UPLOAD_DIR = Path(os.environ.get("ATTACHMENT_UPLOAD_DIR", MEDIA_ROOT / "uploads"))
+ATTACHMENT_MAX_SIZE = int(os.environ.get("ATTACHMENT_MAX_SIZE", 1024 ** 3))  # bytes
+ATTACHMENT_CHUNK_MAX_SIZE = int(os.environ.get("ATTACHMENT_CHUNK_MAX_SIZE", 8 * 1024 ** 2))  # bytes
+ATTACHMENT_UPLOAD_EXPIRY = int(os.environ.get("ATTACHMENT_UPLOAD_EXPIRY", 24 * 3600))  # seconds
+ATTACHMENT_SENDFILE = os.environ.get("ATTACHMENT_SENDFILE", "")
+ATTACHMENT_SENDFILE_PREFIX = os.environ.get("ATTACHMENT_SENDFILE_PREFIX", "/protected-media/")
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # DRF settings
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.authentication.CachedJWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
@@ -118,9 +220,43 @@ SPECTACULAR_SETTINGS = {
     "TITLE": "Team Task Board API",
     "DESCRIPTION": "Simple API for managing team tasks (Software Engineering project starter).",
     "VERSION": "1.0.0",
+    # The schema views are loaded lazily (config.urls.lazy_view) and are not API endpoints.
+    "SERVE_INCLUDE_SCHEMA": False,
+    # Imports accounts.schema, which registers the CachedJWTAuthentication extension.
+    "PREPROCESSING_HOOKS": ["accounts.schema.register_extensions"],
+}
+
+# /api/schema/ is rendered once per code version and served from memory;
+# `manage.py build_schema` pre-renders it into DIR at image build time.
+SCHEMA_CACHE = {
+    "ENABLED": os.environ.get("SCHEMA_CACHE", "True") == "True",
+    "DIR": os.environ.get("SCHEMA_CACHE_DIR", str(BASE_DIR / "schema_cache")),
+    # Defaults to a hash of the project sources when unset.
+    "CODE_VERSION": os.environ.get("CODE_VERSION") or None,
+}
+
+# Response compression (config.compression): br, zstd (brotli / zstandard
+# packages) and gzip. LEVELS is the per-request policy by content type
+# (HTML is never compressed, see the module); STATIC_LEVELS is used for
+# payloads compressed once and kept (the schema).
+_FAST_LEVELS = {"br": 4, "zstd": 3, "gzip": 6}
+COMPRESSION = {
+    "ENABLED": os.environ.get("COMPRESSION", "True") == "True",
+    "MIN_SIZE": int(os.environ.get("COMPRESSION_MIN_SIZE", 1024)),
+    "PREFERENCE": ("br", "zstd", "gzip"),
+    "LEVELS": {
+        "application/json": _FAST_LEVELS,
+        "application/vnd.oai.openapi": _FAST_LEVELS,
+        "application/javascript": _FAST_LEVELS,
+        "application/yaml": _FAST_LEVELS,
+        "text/*": _FAST_LEVELS,
+    },
+    "STATIC_LEVELS": {"br": 11, "zstd": 19, "gzip": 9},
 }
 
 CORS_ALLOW_ALL_ORIGINS = True
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key", "if-match", "if-none-match", "upload-offset")
+CORS_EXPOSE_HEADERS = ("ETag", "Idempotent-Replayed", "Retry-After", "Upload-Offset")
 
 # نکته مهم: مسیر کامل به اپ یوزر سفارشی
 AUTH_USER_MODEL = "accounts.User"
@@ -129,9 +265,69 @@ SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
 
+# Authenticated-user cache used by CachedJWTAuthentication: a per-process
+# LRU (TTL seconds) plus an optional shared tier in the named Django cache,
+# which also carries the generation counters that invalidate every worker.
+AUTH_USER_CACHE = {
+    "MAX_SIZE": int(os.environ.get("AUTH_USER_CACHE_MAX_SIZE", 10000)),
+    "TTL": int(os.environ.get("AUTH_USER_CACHE_TTL", 30)),
+    "SHARED_CACHE_ALIAS": os.environ.get("AUTH_USER_CACHE_SHARED_ALIAS") or None,
+    "SHARED_TTL": int(os.environ.get("AUTH_USER_CACHE_SHARED_TTL", 300)),
+}
+
+# Revoked JWTs (logout, password change) live in Redis when REDIS_URL is set;
+# each process checks them through a Bloom filter rebuilt every SYNC_INTERVAL
+# seconds, so a revocation made elsewhere applies within that window.
+TOKEN_REVOCATION = {
+    "REDIS_URL": REDIS_URL or None,
+    "SYNC_INTERVAL": float(os.environ.get("TOKEN_REVOCATION_SYNC_INTERVAL", 5)),
+    "BLOOM_CAPACITY": int(os.environ.get("TOKEN_REVOCATION_BLOOM_CAPACITY", 100000)),
+    "BLOOM_ERROR_RATE": 0.001,
+}
+
+# Idempotency-Key support for unsafe endpoints (config.idempotency): the
+# first response to a key is kept in the default cache for TTL seconds;
+# a duplicate arriving while it runs waits up to WAIT_TIMEOUT for it.
+IDEMPOTENCY = {
+    "TTL": int(os.environ.get("IDEMPOTENCY_TTL", 24 * 3600)),
+    "LOCK_TIMEOUT": int(os.environ.get("IDEMPOTENCY_LOCK_TIMEOUT", 60)),
+    "WAIT_TIMEOUT": float(os.environ.get("IDEMPOTENCY_WAIT_TIMEOUT", 10)),
+}
+
+# Load shedding per web worker (config.loadshedding): queue times come from
+# the proxy's X-Request-Start header. Low-priority requests are turned away
+# once the minimum queue time over INTERVAL seconds exceeds TARGET_MS or
+# past the LOW_* limits, normal ones past the general limits; auth and task
+# writes never are. An in-flight limit of 0 disables that check.
+LOAD_SHEDDING = {
+    "ENABLED": os.environ.get("LOAD_SHEDDING", "True") == "True",
+    "TARGET_MS": float(os.environ.get("LOAD_SHEDDING_TARGET_MS", 100)),
+    "INTERVAL": float(os.environ.get("LOAD_SHEDDING_INTERVAL", 1)),
+    "LOW_MAX_QUEUE_MS": float(os.environ.get("LOAD_SHEDDING_LOW_MAX_QUEUE_MS", 500)),
+    "LOW_MAX_IN_FLIGHT": int(os.environ.get("LOAD_SHEDDING_LOW_MAX_IN_FLIGHT", 0)),
+    "MAX_QUEUE_MS": float(os.environ.get("LOAD_SHEDDING_MAX_QUEUE_MS", 5000)),
+    "MAX_IN_FLIGHT": int(os.environ.get("LOAD_SHEDDING_MAX_IN_FLIGHT", 0)),
+    "RETRY_AFTER": int(os.environ.get("LOAD_SHEDDING_RETRY_AFTER", 5)),
+}
+
+# Token-bucket throttles on /api/accounts/token/, checked before any hashing.
+# Buckets are shared and updated atomically only with the Redis cache
+# (REDIS_URL); `manage.py check --deploy` warns otherwise (accounts.W001).
+LOGIN_THROTTLE = {
+    "login_ip": {
+        "capacity": int(os.environ.get("LOGIN_THROTTLE_IP_BURST", 20)),
+        "refill_per_minute": float(os.environ.get("LOGIN_THROTTLE_IP_PER_MINUTE", 10)),
+    },
+    "login_email": {
+        "capacity": int(os.environ.get("LOGIN_THROTTLE_EMAIL_BURST", 5)),
+        "refill_per_minute": float(os.environ.get("LOGIN_THROTTLE_EMAIL_PER_MINUTE", 2)),
+    },
+}
+
 # Celery configuration
 CELERY_BROKER_URL = os.environ.get("CELERY_BROKER_URL", "redis://redis:6379/0")
 CELERY_RESULT_BACKEND = os.environ.get("CELERY_RESULT_BACKEND", "redis://redis:6379/1")
+# The beat schedule lives in config/celery.py so settings don't import Celery.
 
 # Email configuration
 EMAIL_BACKEND = os.environ.get(
@@ -144,3 +340,31 @@ EMAIL_USE_TLS = os.environ.get("EMAIL_USE_TLS", "True") == "True"
 EMAIL_HOST_USER = os.environ.get("EMAIL_HOST_USER", "")
 EMAIL_HOST_PASSWORD = os.environ.get("EMAIL_HOST_PASSWORD", "")
 DEFAULT_FROM_EMAIL = os.environ.get("DEFAULT_FROM_EMAIL", "noreply@taskboard.local")
+
+# Admin notification fan-out
+ADMIN_NOTIFY_CHUNK_SIZE = int(os.environ.get("ADMIN_NOTIFY_CHUNK_SIZE", 200))
+ADMIN_NOTIFY_MAX_RETRIES = int(os.environ.get("ADMIN_NOTIFY_MAX_RETRIES", 5))
+ADMIN_NOTIFY_RETRY_BACKOFF = int(os.environ.get("ADMIN_NOTIFY_RETRY_BACKOFF", 5))  # seconds
+ADMIN_NOTIFY_RETRY_BACKOFF_MAX = int(os.environ.get("ADMIN_NOTIFY_RETRY_BACKOFF_MAX", 600))
+
+# Admin audit log: entries are buffered per process and bulk-inserted once
+# AUDIT_LOG_BATCH_SIZE accumulate or the oldest is AUDIT_LOG_FLUSH_INTERVAL
+# seconds old; entries older than AUDIT_LOG_RETENTION_DAYS are folded into
+# daily counts by the prune_admin_logs beat task.
+AUDIT_LOG_BUFFERED = os.environ.get("AUDIT_LOG_BUFFERED", "True") == "True"
+AUDIT_LOG_BATCH_SIZE = int(os.environ.get("AUDIT_LOG_BATCH_SIZE", 100))
+AUDIT_LOG_FLUSH_INTERVAL = float(os.environ.get("AUDIT_LOG_FLUSH_INTERVAL", 5))  # seconds
+AUDIT_LOG_MAX_BUFFER = int(os.environ.get("AUDIT_LOG_MAX_BUFFER", 10000))
+AUDIT_LOG_RETENTION_DAYS = int(os.environ.get("AUDIT_LOG_RETENTION_DAYS", 90))
+
+# Transactional outbox: tasks enqueued by request handlers are stored with the
+# request's writes and published by the relay_outbox beat task.
+OUTBOX_RELAY_INTERVAL = float(os.environ.get("OUTBOX_RELAY_INTERVAL", 5))  # seconds
+OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", 100))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", 20))
+OUTBOX_RETRY_BACKOFF = int(os.environ.get("OUTBOX_RETRY_BACKOFF", 2))  # seconds
+OUTBOX_RETRY_BACKOFF_MAX = int(os.environ.get("OUTBOX_RETRY_BACKOFF_MAX", 300))
+
+# Admin analytics: seconds the rollup window trails "now", so rows from
+# transactions still in flight are picked up by the next run.
+ANALYTICS_ROLLUP_LAG = int(os.environ.get("ANALYTICS_ROLLUP_LAG", 60))
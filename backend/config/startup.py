@@ -0,0 +1,67 @@
+"""
+Import-time measurement for process startup.
+
+Each scenario is run in a fresh interpreter with `python -X importtime`,
+so the numbers reflect what a new gunicorn worker, Celery worker or
+management command actually pays before doing any work.
+"""
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+
+from django.conf import settings
+
+SCENARIOS = {
+    # What every manage.py command pays.
+    "setup": "import django; django.setup()",
+    # A Celery worker child: Django setup plus the task modules.
+    "celery": (
+        "from config.celery import app; import django; django.setup(); "
+        "app.loader.import_default_modules()"
+    ),
+    # A web worker ready to route its first request.
+    "wsgi": "from config.wsgi import application; import config.urls",
+}
+
+# Modules a scenario must not import; each one points at a lazy-import regression.
+FORBIDDEN_MODULES = {
+    "setup": ("celery", "drf_spectacular.generators", "rest_framework.views", "markdown"),
+    "celery": ("drf_spectacular.generators", "rest_framework.views", "markdown"),
+    "wsgi": ("drf_spectacular.generators",),
+}
+
+
+@dataclass
+class ImportProfile:
+    scenario: str
+    total_ms: float
+    modules: dict  # module name -> cumulative import time in ms
+
+    def slowest(self, count):
+        return sorted(self.modules.items(), key=lambda item: item[1], reverse=True)[:count]
+
+
+def measure_imports(scenario):
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "config.settings")}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", SCENARIOS[scenario]],
+        cwd=settings.BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    modules = {}
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # header row
+        modules[name.strip()] = int(cumulative) / 1000
+        if not name[1:].startswith(" "):
+            total_us += int(cumulative)  # top-level imports only; nested ones are included
+    return ImportProfile(scenario, total_us / 1000, modules)
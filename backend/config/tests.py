@@ -0,0 +1,428 @@
+import gzip
+import json
+import os
+import tempfile
+import threading
+import time
+from io import StringIO
+from unittest.mock import patch
+
+import brotli
+import zstandard
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.middleware.csrf import _get_new_csrf_string
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from config import compression, idempotency, loadshedding, schema
+from config.startup import FORBIDDEN_MODULES, SCENARIOS, measure_imports
+from config.warmup import format_memory_report, memory_report, warm_up_worker
+from tasks.models import Task
+
+
+class CachedSchemaViewTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        override = override_settings(
+            SCHEMA_CACHE={"ENABLED": True, "DIR": self.tmp.name, "CODE_VERSION": "test"}
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        schema.clear_rendered_schemas()
+        self.addCleanup(schema.clear_rendered_schemas)
+
+    def test_schema_is_generated_once(self):
+        """
+        Ensure repeated requests reuse the rendered schema instead of regenerating it.
+        """
+        with self.settings(SCHEMA_CACHE={"ENABLED": False, "DIR": self.tmp.name, "CODE_VERSION": "test"}):
+            uncached = self.client.get("/api/schema/")
+
+        first = self.client.get("/api/schema/")
+        with patch("config.schema.render_schema") as mock_render:
+            second = self.client.get("/api/schema/")
+        mock_render.assert_not_called()
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.content, uncached.content)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(first["Content-Type"], uncached["Content-Type"])
+        self.assertTrue(schema.schema_path("yaml").exists())
+
+    def test_etag_revalidation(self):
+        """
+        Ensure a matching If-None-Match gets 304 Not Modified.
+        """
+        etag = self.client.get("/api/schema/")["ETag"]
+        response = self.client.get("/api/schema/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+
+    def test_gzip_when_accepted(self):
+        """
+        Ensure clients accepting gzip get the precompressed body with its own ETag.
+        """
+        plain = self.client.get("/api/schema/?format=json")
+        compressed = self.client.get("/api/schema/?format=json", HTTP_ACCEPT_ENCODING="gzip, identity;q=0.5")
+        self.assertEqual(compressed["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertNotEqual(compressed["ETag"], plain["ETag"])
+        self.assertIn("Accept-Encoding", compressed["Vary"])
+
+    def test_precompressed_in_every_available_coding(self):
+        """
+        Ensure the schema is compressed once per coding and repeated hits are served from those bytes.
+        """
+        rendered = schema.get_rendered_schema("json")
+        self.assertEqual(set(rendered.encoded), set(compression.available_codings()))
+        with patch.dict("config.compression.CODECS", {name: None for name in compression.CODECS}):
+            response = self.client.get("/api/schema/?format=json", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response.content, rendered.encoded["gzip"])
+
+        for coding, decompress in (("br", brotli.decompress), ("zstd", zstandard.decompress)):
+            with self.subTest(coding=coding):
+                response = self.client.get("/api/schema/?format=json", HTTP_ACCEPT_ENCODING=coding)
+                self.assertEqual(response["Content-Encoding"], coding)
+                self.assertEqual(decompress(response.content), rendered.body)
+
+    def test_new_code_version_uses_new_file(self):
+        """
+        Ensure the schema file is keyed by code version.
+        """
+        self.client.get("/api/schema/")
+        with self.settings(SCHEMA_CACHE={"ENABLED": True, "DIR": self.tmp.name, "CODE_VERSION": "next"}):
+            schema.clear_rendered_schemas()
+            self.assertFalse(schema.schema_path("yaml").exists())
+            self.client.get("/api/schema/")
+            self.assertTrue(schema.schema_path("yaml").exists())
+
+    def test_jwt_bearer_scheme_is_documented(self):
+        """
+        Ensure CachedJWTAuthentication is documented as the bearer scheme, not dropped as unknown.
+        """
+        document = json.loads(self.client.get("/api/schema/?format=json").content)
+        self.assertEqual(
+            document["components"]["securitySchemes"]["jwtAuth"],
+            {"type": "http", "scheme": "bearer", "bearerFormat": "JWT"},
+        )
+        tasks = document["paths"]["/api/tasks/"]["get"]
+        self.assertIn({"jwtAuth": []}, tasks["security"])
+
+    def test_prebuilt_file_is_served_without_rendering(self):
+        """
+        Ensure a schema written by build_schema is loaded instead of generated.
+        """
+        call_command("build_schema", stdout=StringIO())
+        schema.clear_rendered_schemas()
+        with patch("config.schema.render_schema") as mock_render:
+            response = self.client.get("/api/schema/")
+        mock_render.assert_not_called()
+        self.assertEqual(response.content, schema.schema_path("yaml").read_bytes())
+
+
+class StartupImportBudgetTests(SimpleTestCase):
+    def test_startup_paths_stay_within_budget(self):
+        """
+        Ensure each startup path avoids its forbidden imports and stays within its import-time budget.
+        """
+        for scenario in SCENARIOS:
+            with self.subTest(scenario=scenario):
+                profile = measure_imports(scenario)
+                for name in FORBIDDEN_MODULES[scenario]:
+                    self.assertNotIn(name, profile.modules)
+                self.assertLessEqual(profile.total_ms, settings.STARTUP_IMPORT_BUDGET_MS[scenario])
+
+
+class WorkerWarmupTests(TestCase):
+    def test_warm_up_requests_go_through_the_wsgi_application(self):
+        """
+        Ensure warm-up sends each path through the WSGI stack and reports its status code.
+        """
+        from config.wsgi import application
+
+        statuses = warm_up_worker(application, ["/", "/api/tasks/"])
+
+        self.assertEqual(statuses, {"/": status.HTTP_200_OK, "/api/tasks/": status.HTTP_401_UNAUTHORIZED})
+
+    def test_memory_report(self):
+        """
+        Ensure the memory report reads this process's smaps and formats it, or degrades without /proc.
+        """
+        report = memory_report()
+        if not os.path.exists("/proc/self/smaps_rollup"):
+            self.assertIsNone(report)
+            self.assertEqual(format_memory_report(report), "memory report unavailable")
+            return
+
+        self.assertEqual(set(report), {"rss", "pss", "shared", "private"})
+        self.assertGreater(report["rss"], 0)
+        self.assertIn("rss=", format_memory_report(report))
+
+
+@override_settings(IDEMPOTENCY={"TTL": 60, "LOCK_TIMEOUT": 60, "WAIT_TIMEOUT": 0.5})
+class IdempotencyKeyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(email="retry@example.com", password="password123")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def create(self, key, title="Retried"):
+        return self.client.post("/api/tasks/", {"title": title}, format="json", HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_is_answered_from_the_store(self):
+        first = self.create("abc")
+        second = self.create("abc")
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertEqual(second[idempotency.REPLAYED_HEADER], "true")
+        self.assertEqual(Task.objects.count(), 1)
+
+        self.assertEqual(self.create("other").status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Task.objects.count(), 2)
+
+    def test_key_reused_with_different_body(self):
+        self.create("abc")
+        self.assertEqual(self.create("abc", title="Changed").status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    def test_rejected_request_releases_the_key(self):
+        invalid = self.client.post(
+            "/api/tasks/", {"title": "x", "status": "NOPE"}, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+        )
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
+        # The validation error was raised out of the view, so the key was released.
+        again = self.client.post(
+            "/api/tasks/", {"title": "x", "status": "NOPE"}, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+        )
+        self.assertEqual(again.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Task.objects.exists())
+
+    def test_concurrent_duplicate_waits_for_the_first_result(self):
+        request = type(
+            "Request", (), {"method": "POST", "path": "/api/tasks/", "user": self.user, "data": {"title": "Retried"}}
+        )()
+        cache_key = idempotency._cache_key(request, "abc")
+        fingerprint = idempotency._fingerprint(request)
+        cache.set(cache_key, {"state": "in_progress", "fingerprint": fingerprint})
+
+        self.assertEqual(self.create("abc").status_code, status.HTTP_409_CONFLICT)
+
+        finish = threading.Timer(0.1, cache.set, args=(cache_key, {
+            "state": "done", "fingerprint": fingerprint, "status": 201, "data": {"id": 42}, "headers": {},
+        }))
+        finish.start()
+        response = self.create("abc")
+        finish.join()
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data, {"id": 42})
+
+    def test_session_form_post_with_csrf_check(self):
+        """
+        Ensure a session-authenticated form POST, whose body the CSRF check has already read, can be retried.
+        """
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        token = _get_new_csrf_string()
+        client.cookies[settings.CSRF_COOKIE_NAME] = token
+
+        responses = [
+            client.post(
+                "/api/tasks/", {"title": "From a form", "csrfmiddlewaretoken": token}, HTTP_IDEMPOTENCY_KEY="form"
+            )
+            for _ in range(2)
+        ]
+
+        self.assertEqual([response.status_code for response in responses], [201, 201])
+        self.assertEqual(responses[1][idempotency.REPLAYED_HEADER], "true")
+        self.assertEqual(Task.objects.count(), 1)
+
+
+LOAD_SHEDDING_TEST = {
+    "ENABLED": True,
+    "TARGET_MS": 100,
+    "INTERVAL": 1,
+    "LOW_MAX_QUEUE_MS": 500,
+    "LOW_MAX_IN_FLIGHT": 2,
+    "MAX_QUEUE_MS": 5000,
+    "MAX_IN_FLIGHT": 4,
+    "RETRY_AFTER": 7,
+}
+
+
+@override_settings(LOAD_SHEDDING=LOAD_SHEDDING_TEST)
+class LoadSheddingTests(TestCase):
+    def setUp(self):
+        patcher = patch.object(loadshedding, "monitor", loadshedding.LoadMonitor())
+        self.monitor = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = get_user_model().objects.create_user(email="busy@example.com", password="password123")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def queued(self, ms):
+        return {"HTTP_X_REQUEST_START": f"t={time.time() - ms / 1000:.3f}"}
+
+    def test_queue_time_header_formats(self):
+        now = 1700000000.0
+        self.assertAlmostEqual(loadshedding.queue_time_ms("t=1699999999.750", now=now), 250, places=3)
+        self.assertAlmostEqual(loadshedding.queue_time_ms("1699999999750", now=now), 250, places=3)
+        self.assertAlmostEqual(loadshedding.queue_time_ms("t=1699999999750000", now=now), 250, places=3)
+        self.assertEqual(loadshedding.queue_time_ms("t=1700000001.0", now=now), 0.0)
+        self.assertIsNone(loadshedding.queue_time_ms("garbage"))
+        self.assertIsNone(loadshedding.queue_time_ms(None))
+
+    def test_long_queue_sheds_low_priority_first(self):
+        """
+        Ensure a request that waited past the low-priority limit is turned away from the schema
+        and admin overview, while task reads, task writes and logins still go through.
+        """
+        response = self.client.get("/api/schema/", **self.queued(1000))
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response["Retry-After"], "7")
+        self.assertEqual(self.client.get("/api/admin/overview/", **self.queued(1000)).status_code, 503)
+
+        self.assertEqual(self.client.get("/api/tasks/", **self.queued(1000)).status_code, status.HTTP_200_OK)
+        created = self.client.post("/api/tasks/", {"title": "Urgent"}, format="json", **self.queued(10000))
+        self.assertEqual(created.status_code, status.HTTP_201_CREATED)
+        login = self.client.post(
+            "/api/accounts/token/", {"email": "busy@example.com", "password": "password123"},
+            format="json", **self.queued(10000),
+        )
+        self.assertEqual(login.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.client.get("/api/tasks/", **self.queued(10000)).status_code, 503)
+        stats = self.monitor.stats()
+        self.assertEqual(stats["in_flight"], 0)
+        self.assertEqual(stats["shed"], {"low": 2, "normal": 1})
+
+    def test_standing_queue_engages_and_releases_overload(self):
+        """
+        Ensure only a window whose fastest request still queued past the target marks the worker overloaded.
+        """
+        self.monitor.observe(150, now=0)
+        self.monitor.observe(120, now=0.5)
+        self.assertFalse(self.monitor.overloaded)
+        self.monitor.observe(300, now=1.0)
+        self.assertTrue(self.monitor.overloaded)
+        self.assertTrue(self.monitor.should_shed(loadshedding.LOW, 0))
+        self.assertFalse(self.monitor.should_shed(loadshedding.NORMAL, 150))
+
+        # One fast request in the next window means the queue drained.
+        self.monitor.observe(20, now=1.2)
+        self.monitor.observe(400, now=2.0)
+        self.assertFalse(self.monitor.overloaded)
+
+    def test_in_flight_limits(self):
+        for _ in range(3):
+            self.monitor.enter()
+        self.assertTrue(self.monitor.should_shed(loadshedding.LOW, None))
+        self.assertFalse(self.monitor.should_shed(loadshedding.NORMAL, None))
+        self.monitor.enter()
+        self.monitor.enter()
+        self.assertTrue(self.monitor.should_shed(loadshedding.NORMAL, None))
+        self.assertFalse(self.monitor.should_shed(loadshedding.CRITICAL, None))
+
+    @override_settings(LOAD_SHEDDING={**LOAD_SHEDDING_TEST, "ENABLED": False})
+    def test_disabled(self):
+        self.assertEqual(self.client.get("/api/admin/overview/", **self.queued(10000)).status_code, 403)
+
+
+class CompressionTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email="zip@example.com", password="password123")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_negotiation(self):
+        codings = ["br", "zstd", "gzip"]
+        self.assertEqual(compression.negotiate("gzip, deflate, br", codings), "br")
+        self.assertEqual(compression.negotiate("gzip;q=1.0, br;q=0.5", codings), "gzip")
+        self.assertEqual(compression.negotiate("br;q=0, *", codings), "zstd")
+        self.assertEqual(compression.negotiate("gzip, br", ["gzip"]), "gzip")
+        self.assertIsNone(compression.negotiate("identity", codings))
+        self.assertIsNone(compression.negotiate("", codings))
+        self.assertIsNone(compression.negotiate("gzip;q=0", codings))
+
+    def test_level_policy_by_content_type(self):
+        self.assertEqual(compression.compression_level("application/json", "gzip"), 6)
+        self.assertEqual(compression.compression_level("text/plain; charset=utf-8", "gzip"), 6)
+        self.assertIsNone(compression.compression_level("text/html; charset=utf-8", "gzip"))
+        self.assertIsNone(compression.compression_level("application/xhtml+xml", "gzip"))
+        self.assertEqual(compression.compression_level("application/problem+json", "gzip"), 6)
+        self.assertIsNone(compression.compression_level("image/png", "gzip"))
+
+    def test_large_task_page_is_compressed(self):
+        """
+        Ensure large JSON responses are gzipped for clients that accept it and small ones are left alone.
+        """
+        Task.objects.bulk_create(
+            Task(user=self.user, title=f"Task {i}", description="Quarterly planning notes " * 5) for i in range(30)
+        )
+        plain = self.client.get("/api/tasks/")
+        compressed = self.client.get("/api/tasks/", HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertNotIn("Content-Encoding", plain)
+        self.assertEqual(compressed["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertLess(len(compressed.content), len(plain.content))
+        self.assertIn("Accept-Encoding", compressed["Vary"])
+
+        small = self.client.get("/api/accounts/me/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertNotIn("Content-Encoding", small)
+
+    def test_html_is_never_compressed(self):
+        """
+        Ensure HTML pages, which may carry a CSRF token, are sent uncompressed (BREACH).
+        """
+        response = self.client.get("/admin/login/", HTTP_ACCEPT_ENCODING="gzip, br")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("csrfmiddlewaretoken", response.content.decode())
+        self.assertGreater(len(response.content), settings.COMPRESSION["MIN_SIZE"])
+        self.assertNotIn("Content-Encoding", response)
+
+    def test_brotli_and_zstd_round_trip(self):
+        """
+        Ensure br and zstd are offered and their bodies decode to the uncompressed response.
+        """
+        self.assertEqual(compression.available_codings(), ["br", "zstd", "gzip"])
+        Task.objects.bulk_create(
+            Task(user=self.user, title=f"Task {i}", description="Quarterly planning notes " * 5) for i in range(30)
+        )
+        plain = self.client.get("/api/tasks/")
+        decoders = {"br": brotli.decompress, "zstd": zstandard.decompress}
+        for coding, decompress in decoders.items():
+            with self.subTest(coding=coding):
+                response = self.client.get("/api/tasks/", HTTP_ACCEPT_ENCODING=f"gzip;q=0.5, {coding}")
+                self.assertEqual(response["Content-Encoding"], coding)
+                self.assertEqual(decompress(response.content), plain.content)
+
+        preferred = self.client.get("/api/tasks/", HTTP_ACCEPT_ENCODING="gzip, deflate, br, zstd")
+        self.assertEqual(preferred["Content-Encoding"], "br")
+
+    def test_compressed_etag_is_weak_and_still_matches(self):
+        """
+        Ensure a compressed ETag'd response carries a weak ETag that still satisfies If-None-Match and If-Match.
+        """
+        task = Task.objects.create(user=self.user, title="Long", description="x" * 5000)
+        first = self.client.get(f"/api/tasks/{task.pk}/", HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(first["Content-Encoding"], "gzip")
+        self.assertEqual(first["ETag"], 'W/"1"')
+        self.assertEqual(
+            self.client.get(f"/api/tasks/{task.pk}/", HTTP_IF_NONE_MATCH=first["ETag"]).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+        updated = self.client.patch(
+            f"/api/tasks/{task.pk}/", {"title": "Longer"}, format="json", HTTP_IF_MATCH=first["ETag"]
+        )
+        self.assertEqual(updated.status_code, status.HTTP_200_OK)
@@ -0,0 +1,126 @@
+"""
+Process warm-up and memory reporting for forking servers (gunicorn.conf.py).
+
+prepare_master() runs once in the gunicorn master after the app is
+preloaded, so the work it does is shared copy-on-write by every worker.
+warm_up_worker() runs in each worker after fork, so connections and
+per-process caches are ready before the first real request arrives.
+"""
+import io
+import logging
+import sys
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+
+def prepare_master():
+    """Populate process-wide state before workers are forked from this process."""
+    resolver = get_resolver()
+    # Importing the URLconf imports every view module; populating builds the
+    # reverse lookup tables that reverse() would otherwise build per worker.
+    resolver.url_patterns
+    resolver._populate()
+
+    if settings.SCHEMA_CACHE["ENABLED"]:
+        from config.schema import RENDERERS, get_rendered_schema
+
+        for fmt in RENDERERS:
+            get_rendered_schema(fmt)
+
+    # Nothing opened here may be inherited by the workers.
+    connections.close_all()
+
+
+def _warmup_environ(path):
+    host = next((h for h in settings.ALLOWED_HOSTS if h and "*" not in h and not h.startswith(".")), "localhost")
+    return {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": path,
+        "QUERY_STRING": "",
+        "SERVER_NAME": host,
+        "SERVER_PORT": "80",
+        "HTTP_HOST": host,
+        "HTTP_ACCEPT": "application/json",
+        "HTTP_ACCEPT_ENCODING": "gzip",
+        "REMOTE_ADDR": "127.0.0.1",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": "http",
+        "wsgi.input": io.BytesIO(),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": False,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+
+
+def warm_up_worker(application, paths):
+    """
+    Open this worker's database connections and send `paths` through the
+    WSGI application. Returns {path: status code}.
+    """
+    started = time.perf_counter()
+    for conn in connections.all():
+        pool = getattr(conn, "pool", None)
+        if pool is not None:
+            pool.open(wait=True, timeout=settings.DATABASES[conn.alias]["OPTIONS"]["pool"]["timeout"])
+        else:
+            conn.ensure_connection()
+
+    statuses = {}
+    for path in paths:
+        captured = {}
+
+        def start_response(status, headers, exc_info=None):
+            captured["status"] = int(status.split(" ", 1)[0])
+
+        try:
+            body = application(_warmup_environ(path), start_response)
+            for _ in body:
+                pass
+            if hasattr(body, "close"):
+                body.close()
+            statuses[path] = captured.get("status")
+        except Exception:
+            logger.exception("Warm-up request to %s failed", path)
+            statuses[path] = None
+
+    logger.info("Worker warmed up in %.0f ms: %s", (time.perf_counter() - started) * 1000, statuses)
+    return statuses
+
+
+def memory_report(pid="self"):
+    """
+    Memory of a process in KiB from /proc/<pid>/smaps_rollup: rss, pss
+    (shared pages split across sharers), and private vs shared pages.
+    Copy-on-write sharing shows up as shared > 0 and pss well below rss.
+    Returns None where /proc is unavailable.
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+
+    values = {}
+    for line in lines[1:]:
+        name, _, rest = line.partition(":")
+        parts = rest.split()
+        if parts and parts[0].isdigit():
+            values[name] = int(parts[0])
+    return {
+        "rss": values.get("Rss", 0),
+        "pss": values.get("Pss", 0),
+        "shared": values.get("Shared_Clean", 0) + values.get("Shared_Dirty", 0),
+        "private": values.get("Private_Clean", 0) + values.get("Private_Dirty", 0),
+    }
+
+
+def format_memory_report(report):
+    if report is None:
+        return "memory report unavailable"
+    return ", ".join(f"{key}={value / 1024:.1f}MiB" for key, value in report.items())
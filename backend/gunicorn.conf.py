@@ -0,0 +1,63 @@
+"""
+Gunicorn configuration (loaded automatically from the working directory).
+
+The app is imported once in the master and workers are forked from it, so
+code and read-only data are shared copy-on-write. Tunables come from
+GUNICORN_* environment variables.
+"""
+import gc
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("GUNICORN_WORKERS", 3))
+threads = int(os.environ.get("GUNICORN_THREADS", 1))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+preload_app = True
+
+# Recycle workers to bound slow leaks; the jitter keeps them from restarting together.
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 200))
+
+WARMUP_PATHS = [p for p in os.environ.get("GUNICORN_WARMUP_PATHS", "/,/api/tasks/,/api/schema/").split(",") if p]
+
+# No collections in the master: a collection writes to every tracked object's
+# header, which would un-share those pages in the workers.
+gc.disable()
+
+
+def when_ready(server):
+    from config.warmup import format_memory_report, memory_report, prepare_master
+
+    prepare_master()
+    # Move everything allocated so far into the permanent generation, so
+    # collections in the workers never touch (and copy) these pages.
+    gc.freeze()
+    server.log.info("Master ready (%s)", format_memory_report(memory_report()))
+
+
+def post_fork(server, worker):
+    from adminpanel import audit
+    from config.db_pool import forget_inherited_pools
+
+    gc.enable()
+    forget_inherited_pools()
+    audit.start_flusher()
+
+
+def post_worker_init(worker):
+    from config.warmup import format_memory_report, memory_report, warm_up_worker
+
+    warm_up_worker(worker.wsgi, WARMUP_PATHS)
+    worker.log.info("Worker %s warmed up (%s)", worker.pid, format_memory_report(memory_report()))
+
+
+def worker_exit(server, worker):
+    from adminpanel import audit
+    from config.warmup import format_memory_report, memory_report
+
+    audit.flush()
+
+    server.log.info(
+        "Worker %s exiting after %s requests (%s)",
+        worker.pid, worker.nr, format_memory_report(memory_report()),
+    )
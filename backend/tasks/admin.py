@@ -1,10 +1,17 @@
 from django.contrib import admin
-from .models import Task
+from .models import Task, TaskComment
 
 
 @admin.register(Task)
 class TaskAdmin(admin.ModelAdmin):
-    list_display = ['title', 'user', 'status', 'priority', 'due_date', 'created_at']
+    list_display = ['title', 'user', 'status', 'priority', 'due_date', 'comment_count', 'created_at']
     list_filter = ['status', 'priority', 'created_at']
     search_fields = ['title', 'description']
     date_hierarchy = 'created_at'
+
+
+@admin.register(TaskComment)
+class TaskCommentAdmin(admin.ModelAdmin):
+    list_display = ['task', 'author', 'created_at']
+    list_select_related = ['task', 'author']
+    raw_id_fields = ['task', 'author']
@@ -0,0 +1,270 @@
+"""
+Chunked, resumable attachment uploads stored as content-addressed blobs.
+
+An upload is opened with its filename and size, then its bytes are sent
+in order as PATCH bodies carrying an Upload-Offset header. Each chunk is
+spooled from the request (in memory up to 1 MiB, then to a temporary
+file) before the upload row is locked and the bytes are appended to a part
+file. After an interruption the client reads the offset back and
+continues from there.
+When the last byte arrives, the part file is hashed and stored once
+under blobs/<sha256>. Identical files share one Blob. A client that
+already attached the same content to one of its own tasks can skip the
+transfer by sending the hash.
+
+Downloads honour single byte ranges and, with ATTACHMENT_SENDFILE set,
+hand the file to the front proxy (X-Accel-Redirect or X-Sendfile) so
+workers never stream bytes.
+"""
+import hashlib
+import re
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import content_disposition_header, parse_etags, quote_etag
+
+from .models import AttachmentUpload, Blob, TaskAttachment
+
+READ_SIZE = 1024 * 1024
+EMPTY_SHA256 = hashlib.sha256(b"").hexdigest()
+
+
+class UploadOffsetMismatch(Exception):
+    def __init__(self, offset):
+        super().__init__(f"Expected Upload-Offset {offset}.")
+        self.offset = offset
+
+
+class UploadChecksumMismatch(Exception):
+    pass
+
+
+def part_path(upload):
+    return Path(settings.ATTACHMENT_UPLOAD_DIR) / f"{upload.pk}.part"
+
+
+def blob_name(sha256):
+    return f"blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def open_upload(task, user, filename, size, content_type="application/octet-stream", sha256=""):
+    """
+    Start an upload. Returns (upload, None), or (None, attachment) when no
+    transfer is needed: the file is empty, or `user` already attached the
+    content stored under `sha256` to one of their own tasks. Knowing a hash
+    proves nothing about having the bytes, so other users' blobs can't be
+    claimed that way; their content is still deduplicated by
+    complete_upload() once it has been uploaded and hashed.
+    """
+    if size == 0 and sha256 and sha256 != EMPTY_SHA256:
+        raise UploadChecksumMismatch(f"Checksum mismatch: an empty file hashes to {EMPTY_SHA256}.")
+    if sha256:
+        blob = Blob.objects.filter(sha256=sha256, size=size, attachments__task__user=user).first()
+        if blob is not None:
+            attachment = TaskAttachment.objects.create(
+                task=task, blob=blob, filename=filename, content_type=content_type, uploaded_by=user
+            )
+            return None, attachment
+
+    upload = AttachmentUpload.objects.create(
+        task=task, uploaded_by=user, filename=filename, size=size, content_type=content_type, sha256=sha256
+    )
+    if size == 0:
+        path = part_path(upload)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+        return None, complete_upload(upload)
+    return upload, None
+
+
+def append_chunk(upload, offset, stream, length):
+    """
+    Append `length` bytes read from `stream` at `offset`. The chunk is
+    spooled first, so a slow client never holds the row lock or a pooled
+    connection; the upload row is then locked while the spooled bytes are
+    written, so concurrent PATCHes of one upload serialize and a retried
+    chunk can never be written twice.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=READ_SIZE) as chunk:
+        received = 0
+        while received < length:
+            data = stream.read(min(READ_SIZE, length - received))
+            if not data:
+                break
+            chunk.write(data)
+            received += len(data)
+        chunk.seek(0)
+
+        with transaction.atomic():
+            upload = AttachmentUpload.objects.select_for_update().get(pk=upload.pk)
+            if offset != upload.received:
+                raise UploadOffsetMismatch(upload.received)
+            received = min(received, upload.size - upload.received)
+
+            path = part_path(upload)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            written = 0
+            with open(path, "r+b" if path.exists() else "wb") as part:
+                # Drop anything past the committed offset left by an interrupted chunk.
+                part.truncate(upload.received)
+                part.seek(upload.received)
+                while written < received:
+                    data = chunk.read(min(READ_SIZE, received - written))
+                    part.write(data)
+                    written += len(data)
+            upload.received += written
+            upload.save(update_fields=["received", "updated_at"])
+    return upload
+
+
+def complete_upload(upload):
+    """Store a fully received upload as a blob and return its TaskAttachment."""
+    path = part_path(upload)
+    digest = hashlib.sha256()
+    with open(path, "rb") as part:
+        while data := part.read(READ_SIZE):
+            digest.update(data)
+    sha256 = digest.hexdigest()
+
+    if upload.sha256 and upload.sha256 != sha256:
+        discard_upload(upload)
+        raise UploadChecksumMismatch(f"Checksum mismatch: received content hashes to {sha256}.")
+
+    blob = Blob.objects.filter(sha256=sha256).first()
+    if blob is None:
+        with open(path, "rb") as part:
+            name = default_storage.save(blob_name(sha256), File(part))
+        try:
+            with transaction.atomic():
+                blob = Blob.objects.create(sha256=sha256, size=upload.size, name=name)
+        except IntegrityError:
+            # A concurrent upload of the same content stored it first.
+            default_storage.delete(name)
+            blob = Blob.objects.get(sha256=sha256)
+
+    with transaction.atomic():
+        attachment = TaskAttachment.objects.create(
+            task_id=upload.task_id,
+            blob=blob,
+            filename=upload.filename,
+            content_type=upload.content_type,
+            uploaded_by_id=upload.uploaded_by_id,
+        )
+        discard_upload(upload)
+    return attachment
+
+
+def discard_upload(upload):
+    part_path(upload).unlink(missing_ok=True)
+    if upload.pk is not None:
+        upload.delete()
+
+
+def delete_blob_if_unused(blob_sha256):
+    """Remove a blob and its file once no attachment references it."""
+    with transaction.atomic():
+        blob = Blob.objects.select_for_update().filter(sha256=blob_sha256).first()
+        if blob is None or blob.attachments.exists():
+            return False
+        name = blob.name
+        blob.delete()
+    default_storage.delete(name)
+    return True
+
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(header, size):
+    """
+    Return (start, end) inclusive for a single satisfiable byte range,
+    None to serve the whole file (no header, or multiple ranges), or
+    raise ValueError if the range can't be satisfied.
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    elif last:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        return None
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def _file_chunks(name, start, length):
+    with default_storage.open(name, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            data = f.read(min(READ_SIZE, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+def download_response(request, attachment):
+    blob = attachment.blob
+    etag = quote_etag(blob.sha256)
+    if etag in parse_etags(request.META.get("HTTP_IF_NONE_MATCH", "")):
+        response = HttpResponseNotModified()
+        response["ETag"] = etag
+        return response
+
+    mode = settings.ATTACHMENT_SENDFILE
+    if mode == "x-accel-redirect":
+        # nginx serves the bytes (and ranges) from an internal location.
+        response = HttpResponse(content_type=attachment.content_type)
+        response["X-Accel-Redirect"] = settings.ATTACHMENT_SENDFILE_PREFIX.rstrip("/") + "/" + blob.name
+    elif mode == "x-sendfile":
+        response = HttpResponse(content_type=attachment.content_type)
+        response["X-Sendfile"] = default_storage.path(blob.name)
+    else:
+        byte_range = None
+        if_range = request.META.get("HTTP_IF_RANGE")
+        if not if_range or if_range == etag:
+            try:
+                byte_range = parse_range(request.META.get("HTTP_RANGE"), blob.size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response["Content-Range"] = f"bytes */{blob.size}"
+                return response
+
+        if byte_range is None:
+            length = blob.size
+            response = StreamingHttpResponse(_file_chunks(blob.name, 0, length), content_type=attachment.content_type)
+        else:
+            start, end = byte_range
+            length = end - start + 1
+            response = StreamingHttpResponse(
+                _file_chunks(blob.name, start, length), status=206, content_type=attachment.content_type
+            )
+            response["Content-Range"] = f"bytes {start}-{end}/{blob.size}"
+        response["Content-Length"] = str(length)
+        response["Accept-Ranges"] = "bytes"
+
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, max-age=31536000, immutable"
+    response["Content-Disposition"] = content_disposition_header(True, attachment.filename)
+    return response
+
+
+def purge_expired_uploads(before):
+    """Delete uploads not touched since `before` together with their part files."""
+    count = 0
+    for upload in AttachmentUpload.objects.filter(updated_at__lt=before).iterator():
+        discard_upload(upload)
+        count += 1
+    return count
@@ -0,0 +1,108 @@
+"""
+Task hierarchy (epics -> stories -> subtasks) backed by the TaskClosure table.
+
+Every task has a depth-0 row linking it to itself, plus one row per
+ancestor. Reads are then plain joins on the closure indexes:
+subtree(), ancestors() and progress() each run one query whatever the depth.
+Writes touch only the closure rows that cross the moved edge: moving a
+subtree deletes the links from its old ancestors and inserts the cross
+product of its new ancestors and its nodes in one INSERT ... SELECT.
+"""
+from django.db import connection, transaction
+from django.db.models import Count, F, Q
+
+from .models import Task, TaskClosure
+
+
+class InvalidMove(ValueError):
+    pass
+
+
+def insert_node(task):
+    """Add the closure rows of a newly created task."""
+    links = [TaskClosure(ancestor_id=task.pk, descendant_id=task.pk, depth=0)]
+    if task.parent_id is not None:
+        links += [
+            TaskClosure(ancestor_id=ancestor_id, descendant_id=task.pk, depth=depth + 1)
+            for ancestor_id, depth in TaskClosure.objects.filter(descendant_id=task.parent_id).values_list(
+                "ancestor_id", "depth"
+            )
+        ]
+    TaskClosure.objects.bulk_create(links)
+
+
+def relink_subtree(task_id, new_parent_id):
+    """
+    Re-point the closure rows of the subtree rooted at `task_id` after its
+    parent changed to `new_parent_id` (None for a root).
+    """
+    subtree = TaskClosure.objects.filter(ancestor_id=task_id).values("descendant_id")
+    old_ancestors = TaskClosure.objects.filter(descendant_id=task_id, depth__gt=0).values("ancestor_id")
+    table = connection.ops.quote_name(TaskClosure._meta.db_table)
+    with transaction.atomic():
+        TaskClosure.objects.filter(descendant_id__in=subtree, ancestor_id__in=old_ancestors).delete()
+        if new_parent_id is None:
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (ancestor_id, descendant_id, depth) "
+                f"SELECT up.ancestor_id, down.descendant_id, up.depth + down.depth + 1 "
+                f"FROM {table} up CROSS JOIN {table} down "
+                f"WHERE up.descendant_id = %s AND down.ancestor_id = %s",
+                [new_parent_id, task_id],
+            )
+
+
+def check_move(task_ids, new_parent_id):
+    """Raise InvalidMove if `new_parent_id` lies inside any of the subtrees."""
+    if new_parent_id is None:
+        return
+    if TaskClosure.objects.filter(ancestor_id__in=task_ids, descendant_id=new_parent_id).exists():
+        raise InvalidMove("A task can't be moved under itself or one of its subtasks.")
+
+
+def move_subtrees(task_ids, new_parent_id):
+    """Move the given tasks, with their subtrees, under `new_parent_id` (None for roots)."""
+    task_ids = list(task_ids)
+    with transaction.atomic():
+        check_move(task_ids, new_parent_id)
+        # Tasks nested under other moved tasks keep their place in that subtree.
+        nested = set(
+            TaskClosure.objects.filter(ancestor_id__in=task_ids, descendant_id__in=task_ids, depth__gt=0)
+            .values_list("descendant_id", flat=True)
+        )
+        roots = [pk for pk in task_ids if pk not in nested]
+        Task.objects.filter(pk__in=roots).update(parent_id=new_parent_id, version=F("version") + 1)
+        for pk in roots:
+            relink_subtree(pk, new_parent_id)
+    return roots
+
+
+def subtree(task):
+    """The task and all its descendants, annotated with `depth` below it."""
+    return (
+        Task.objects.filter(ancestor_links__ancestor=task)
+        .annotate(depth=F("ancestor_links__depth"))
+        .order_by("depth", "created_at", "id")
+    )
+
+
+def ancestors(task):
+    """The task's ancestors, root first."""
+    return Task.objects.filter(descendant_links__descendant=task, descendant_links__depth__gt=0).order_by(
+        "-descendant_links__depth"
+    )
+
+
+def progress(task_ids):
+    """{task id: {"done": n, "total": n}} over the descendants of each task."""
+    rows = (
+        TaskClosure.objects.filter(ancestor_id__in=task_ids, depth__gt=0)
+        .values("ancestor_id")
+        .annotate(total=Count("id"), done=Count("id", filter=Q(descendant__status="DONE")))
+        .order_by()
+    )
+    result = {pk: {"done": 0, "total": 0} for pk in task_ids}
+    for row in rows:
+        result[row["ancestor_id"]] = {"done": row["done"], "total": row["total"]}
+    return result
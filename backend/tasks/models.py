@@ -1,5 +1,12 @@
+import uuid
+
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
+
+
+class TaskVersionConflict(Exception):
+    """Raised by Task.save() when the row changed since the instance was loaded."""
 
 
 class Task(models.Model):
@@ -8,6 +15,8 @@ class Task(models.Model):
         ("DOING", "Doing"),
         ("DONE", "Done"),
     ]
+    OPEN_STATUSES = ("TODO", "DOING")
+    COUNTER_FIELDS = ("comment_count",)
 
     PRIORITY_CHOICES = [
         ("LOW", "Low"),
@@ -22,6 +31,21 @@ class Task(models.Model):
         null=True,
         blank=True,
     )
+    assigned_to = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        related_name="assigned_tasks",
+        null=True,
+        blank=True,
+    )
+    # Subtasks; the closure rows in TaskClosure are kept in step by tasks.hierarchy.
+    parent = models.ForeignKey(
+        "self",
+        on_delete=models.CASCADE,
+        related_name="children",
+        null=True,
+        blank=True,
+    )
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     status = models.CharField(
@@ -38,9 +62,172 @@ class Task(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # Incremented by every save; updates are conditional on it (optimistic locking).
+    version = models.PositiveIntegerField(default=1, editable=False)
+    # Maintained by tasks.signals with F() updates; never written by save().
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["created_at"], name="task_created_at_idx"),
+            models.Index(fields=["completed_at"], name="task_completed_at_idx"),
+            # One per inbox source (see tasks.inbox), each scanned newest first.
+            models.Index(fields=["user", "created_at", "id"], name="task_user_created_idx"),
+            models.Index(fields=["assigned_to", "created_at", "id"], name="task_assignee_created_idx"),
+        ]
 
     def __str__(self):
         return self.title
+
+    def save(self, *args, **kwargs):
+        # completed_at marks the latest transition into DONE.
+        if self.status == "DONE":
+            if self.completed_at is None:
+                self.completed_at = timezone.now()
+        else:
+            self.completed_at = None
+
+        updating = not self._state.adding and not kwargs.get("force_insert")
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            if "status" in update_fields:
+                update_fields = {*update_fields, "completed_at"}
+            if updating and update_fields:
+                update_fields = {*update_fields, "version"}
+            kwargs["update_fields"] = update_fields
+        elif updating:
+            # A full save of a loaded task must not write back a stale counter.
+            kwargs["update_fields"] = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in self.COUNTER_FIELDS
+            ]
+
+        if not updating:
+            return super().save(*args, **kwargs)
+        # Optimistic locking: the UPDATE only matches the version this
+        # instance was loaded at (see _do_update) and bumps it.
+        self._expected_version = self.version
+        self.version += 1
+        try:
+            super().save(*args, **kwargs)
+        except Exception:
+            self.version = self._expected_version
+            raise
+        finally:
+            self._expected_version = None
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        expected = getattr(self, "_expected_version", None)
+        if expected is None:
+            return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+        if not super()._do_update(base_qs.filter(version=expected), using, pk_val, values, update_fields, forced_update):
+            raise TaskVersionConflict(f"Task {pk_val} is no longer at version {expected}.")
+        return True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored owner/status so save signals can apply deltas.
+        instance._loaded_user_id = instance.__dict__.get("user_id")
+        instance._loaded_status = instance.__dict__.get("status")
+        instance._loaded_parent_id = instance.__dict__.get("parent_id")
+        return instance
+
+    @property
+    def is_open(self):
+        return self.status in self.OPEN_STATUSES
+
+
+class TaskClosure(models.Model):
+    """
+    One row per (ancestor, descendant) pair of the task hierarchy, including
+    each task paired with itself at depth 0, so subtrees, ancestors and
+    rolled-up progress are single indexed queries.
+    """
+
+    ancestor = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="descendant_links")
+    descendant = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="ancestor_links")
+    depth = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["ancestor", "descendant"], name="task_closure_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["descendant", "depth"], name="task_closure_descendant_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
+
+
+class TaskComment(models.Model):
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="comments")
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    content = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["task", "created_at"], name="comment_task_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"Comment by {self.author} on {self.task}"
+
+
+class Blob(models.Model):
+    """File content stored once under its SHA-256, shared by every attachment with that content."""
+
+    sha256 = models.CharField(primary_key=True, max_length=64)
+    size = models.BigIntegerField()
+    name = models.CharField(max_length=255, help_text="Storage path of the content.")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.sha256
+
+
+class TaskAttachment(models.Model):
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="attachments")
+    blob = models.ForeignKey(Blob, on_delete=models.PROTECT, related_name="attachments")
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=255, default="application/octet-stream")
+    uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    uploaded_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-uploaded_at"]
+
+    def __str__(self):
+        return f"{self.filename} on {self.task}"
+
+
+class AttachmentUpload(models.Model):
+    """
+    An attachment upload in progress. `received` bytes are stored in the
+    part file (see tasks.attachments); the row is deleted once the upload
+    becomes a TaskAttachment or expires.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="attachment_uploads")
+    uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=255, default="application/octet-stream")
+    size = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64, blank=True, help_text="Optional checksum the content must match.")
+    received = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Upload of {self.filename} ({self.received}/{self.size})"
+
+    @property
+    def is_complete(self):
+        return self.received >= self.size
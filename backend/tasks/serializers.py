@@ -1,5 +1,8 @@
+from django.conf import settings
 from rest_framework import serializers
-from .models import Task
+
+from . import hierarchy
+from .models import AttachmentUpload, Task, TaskAttachment, TaskComment
 
 
 class TaskSerializer(serializers.ModelSerializer):
@@ -7,3 +10,69 @@ class TaskSerializer(serializers.ModelSerializer):
         model = Task
         fields = "__all__"
         read_only_fields = ("user",)
+
+    def validate_assigned_to(self, assignee):
+        """Only staff may assign a task to someone else; anyone may assign it to themselves."""
+        request = self.context.get("request")
+        if assignee is None or request is None or assignee.pk == request.user.pk or request.user.is_staff:
+            return assignee
+        if self.instance is not None and self.instance.assigned_to_id == assignee.pk:
+            return assignee  # Unchanged, e.g. a full PUT of a task staff assigned.
+        raise serializers.ValidationError("You can only assign tasks to yourself.")
+
+    def validate_parent(self, parent):
+        if parent is None:
+            return parent
+        request = self.context.get("request")
+        if request is not None and parent.user_id != request.user.pk:
+            raise serializers.ValidationError("Parent task not found.")
+        if self.instance is not None:
+            try:
+                hierarchy.check_move([self.instance.pk], parent.pk)
+            except hierarchy.InvalidMove as exc:
+                raise serializers.ValidationError(str(exc))
+        return parent
+
+
+class TaskMoveSerializer(serializers.Serializer):
+    task_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=500)
+    parent = serializers.IntegerField(allow_null=True)
+
+
+class TaskCommentSerializer(serializers.ModelSerializer):
+    author_email = serializers.EmailField(source="author.email", read_only=True)
+
+    class Meta:
+        model = TaskComment
+        fields = ["id", "task", "author", "author_email", "content", "created_at", "updated_at"]
+        read_only_fields = ("task", "author")
+
+
+class TaskAttachmentSerializer(serializers.ModelSerializer):
+    size = serializers.IntegerField(source="blob.size", read_only=True)
+    sha256 = serializers.CharField(source="blob_id", read_only=True)
+    uploaded_by_email = serializers.EmailField(source="uploaded_by.email", read_only=True)
+
+    class Meta:
+        model = TaskAttachment
+        fields = [
+            "id", "task", "filename", "content_type", "size", "sha256",
+            "uploaded_by", "uploaded_by_email", "uploaded_at",
+        ]
+        read_only_fields = fields
+
+
+class AttachmentUploadSerializer(serializers.ModelSerializer):
+    sha256 = serializers.RegexField(r"^[0-9a-f]{64}$", required=False, allow_blank=True)
+
+    class Meta:
+        model = AttachmentUpload
+        fields = ["id", "task", "filename", "content_type", "size", "sha256", "received", "created_at"]
+        read_only_fields = ("task", "received", "created_at")
+
+    def validate_size(self, value):
+        if value < 0:
+            raise serializers.ValidationError("Size can't be negative.")
+        if value > settings.ATTACHMENT_MAX_SIZE:
+            raise serializers.ValidationError(f"Attachments are limited to {settings.ATTACHMENT_MAX_SIZE} bytes.")
+        return value
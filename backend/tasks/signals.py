@@ -0,0 +1,37 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import hierarchy
+from .attachments import delete_blob_if_unused
+from .models import Task, TaskAttachment, TaskComment
+
+
+@receiver(post_save, sender=Task)
+def maintain_task_closure(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        hierarchy.insert_node(instance)
+    elif instance.parent_id != getattr(instance, "_loaded_parent_id", instance.parent_id):
+        hierarchy.relink_subtree(instance.pk, instance.parent_id)
+    instance._loaded_parent_id = instance.parent_id
+
+
+@receiver(post_save, sender=TaskComment)
+def count_comment_on_save(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Task.objects.filter(pk=instance.task_id).update(comment_count=F("comment_count") + 1)
+
+
+@receiver(post_delete, sender=TaskComment)
+def count_comment_on_delete(sender, instance, **kwargs):
+    Task.objects.filter(pk=instance.task_id, comment_count__gt=0).update(comment_count=F("comment_count") - 1)
+
+
+@receiver(post_delete, sender=TaskAttachment)
+def delete_unused_blob(sender, instance, **kwargs):
+    # Blobs are shared between attachments; the file goes with the last one.
+    blob_id = instance.blob_id
+    transaction.on_commit(lambda: delete_blob_if_unused(blob_id))
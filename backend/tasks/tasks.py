@@ -0,0 +1,14 @@
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from . import attachments
+
+
+@shared_task
+def purge_expired_uploads():
+    """Drop attachment uploads idle for longer than ATTACHMENT_UPLOAD_EXPIRY."""
+    before = timezone.now() - timedelta(seconds=settings.ATTACHMENT_UPLOAD_EXPIRY)
+    return {"status": "purged", "uploads_count": attachments.purge_expired_uploads(before)}
@@ -1,8 +1,22 @@
+import hashlib
+import shutil
+import tempfile
+from unittest import skipUnless
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import Client, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
-from .models import Task
+from rest_framework_simplejwt.tokens import RefreshToken
+from config import db_routers
+from config.db_routers import PrimaryReplicaRouter
+from .models import AttachmentUpload, Blob, Task, TaskAttachment, TaskClosure, TaskComment, TaskVersionConflict
 
 User = get_user_model()
 
@@ -175,3 +189,648 @@ class TaskAPITests(APITestCase):
         data = {"title": "Ghost Task"}
         response = self.client.post(self.list_url, data)
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_completed_at_tracks_done_transitions(self):
+        """
+        Test completed_at is set when a task becomes DONE and cleared when reopened.
+        """
+        task = Task.objects.create(user=self.user1, title="Finish me")
+        self.assertIsNone(task.completed_at)
+
+        self.client.force_authenticate(user=self.user1)
+        url = reverse("task-detail", args=[task.id])
+        self.client.patch(url, {"status": "DONE"})
+        task.refresh_from_db()
+        self.assertIsNotNone(task.completed_at)
+
+        self.client.patch(url, {"status": "TODO"})
+        task.refresh_from_db()
+        self.assertIsNone(task.completed_at)
+
+
+class TaskOptimisticLockingTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="editor@example.com", password="password123")
+        self.client.force_authenticate(user=self.user)
+        self.task = Task.objects.create(user=self.user, title="Shared")
+        self.url = reverse("task-detail", kwargs={"pk": self.task.pk})
+
+    def test_stale_if_match_is_rejected(self):
+        """
+        Ensure the second of two edits based on the same version gets 412 and leaves the first edit in place.
+        """
+        etag = self.client.get(self.url)["ETag"]
+
+        first = self.client.patch(self.url, {"title": "Tab one"}, format="json", HTTP_IF_MATCH=etag)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(first["ETag"], etag)
+        self.assertEqual(first.data["version"], 2)
+
+        second = self.client.patch(self.url, {"title": "Tab two"}, format="json", HTTP_IF_MATCH=etag)
+        self.assertEqual(second.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertEqual(self.client.delete(self.url, HTTP_IF_MATCH=etag).status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.title, "Tab one")
+        self.assertEqual(
+            self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, status.HTTP_304_NOT_MODIFIED
+        )
+
+    def test_update_is_one_conditional_statement(self):
+        """
+        Ensure a successful update writes with a single UPDATE conditioned on the version, without SELECT ... FOR UPDATE.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.put(
+                self.url, {"title": "Renamed", "status": "TODO", "priority": "LOW"}, format="json", HTTP_IF_MATCH='"1"'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        statements = [query["sql"] for query in queries.captured_queries]
+        updates = [sql for sql in statements if sql.startswith("UPDATE") and '"tasks_task"' in sql.split("SET")[0]]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"version" = 1', updates[0].split("WHERE")[1])
+        self.assertFalse(any("FOR UPDATE" in sql for sql in statements))
+
+    def test_race_between_read_and_write_conflicts(self):
+        """
+        Ensure a save based on an instance that was overtaken raises a conflict instead of overwriting.
+        """
+        stale = Task.objects.get(pk=self.task.pk)
+        Task.objects.get(pk=self.task.pk).save()
+
+        stale.title = "Lost update"
+        with self.assertRaises(TaskVersionConflict), transaction.atomic():
+            stale.save()
+        self.assertEqual(stale.version, 1)
+        self.task.refresh_from_db()
+        self.assertEqual((self.task.title, self.task.version), ("Shared", 2))
+
+
+class TaskHierarchyTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="planner@example.com", password="password123")
+        self.client.force_authenticate(user=self.user)
+        self.epic = Task.objects.create(user=self.user, title="Epic")
+        self.story = Task.objects.create(user=self.user, title="Story", parent=self.epic)
+        self.subtask = Task.objects.create(user=self.user, title="Subtask", parent=self.story, status="DONE")
+        self.other_epic = Task.objects.create(user=self.user, title="Other epic")
+
+    def closure(self):
+        return set(TaskClosure.objects.filter(depth__gt=0).values_list("ancestor_id", "descendant_id", "depth"))
+
+    def test_subtree_ancestors_and_progress_are_single_queries(self):
+        """
+        Ensure subtree, breadcrumb and progress reads each need one query after the ownership lookup.
+        """
+        with self.assertNumQueries(2):
+            subtree = self.client.get(reverse("task-subtree", kwargs={"pk": self.epic.pk}))
+        self.assertEqual([(t["title"], t["depth"]) for t in subtree.data], [("Epic", 0), ("Story", 1), ("Subtask", 2)])
+
+        with self.assertNumQueries(2):
+            ancestors = self.client.get(reverse("task-ancestors", kwargs={"pk": self.subtask.pk}))
+        self.assertEqual([t["title"] for t in ancestors.data], ["Epic", "Story"])
+
+        with self.assertNumQueries(2):
+            progress = self.client.get(reverse("task-progress", kwargs={"pk": self.epic.pk}))
+        self.assertEqual((progress.data["done"], progress.data["total"]), (1, 2))
+
+    def test_moving_a_subtree_rewrites_only_crossing_links(self):
+        """
+        Ensure a bulk move re-parents the subtree and its closure rows match a fresh build.
+        """
+        response = self.client.post(
+            reverse("task-move"), {"task_ids": [self.story.pk, self.subtask.pk], "parent": self.other_epic.pk},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["moved"], [self.story.pk])
+
+        self.story.refresh_from_db()
+        self.assertEqual(self.story.parent_id, self.other_epic.pk)
+        self.assertEqual(self.closure(), {
+            (self.other_epic.pk, self.story.pk, 1),
+            (self.other_epic.pk, self.subtask.pk, 2),
+            (self.story.pk, self.subtask.pk, 1),
+        })
+
+        self.client.post(reverse("task-move"), {"task_ids": [self.story.pk], "parent": None}, format="json")
+        self.assertEqual(self.closure(), {(self.story.pk, self.subtask.pk, 1)})
+
+    def test_parent_updates_keep_closure_and_reject_cycles(self):
+        """
+        Ensure changing parent through the task API maintains the closure and can't create a cycle.
+        """
+        detail = reverse("task-detail", kwargs={"pk": self.epic.pk})
+        response = self.client.patch(detail, {"parent": self.subtask.pk}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.patch(
+            reverse("task-detail", kwargs={"pk": self.subtask.pk}), {"parent": self.other_epic.pk}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.closure(), {(self.epic.pk, self.story.pk, 1), (self.other_epic.pk, self.subtask.pk, 1)})
+
+        stranger = User.objects.create_user(email="stranger@example.com", password="password123")
+        foreign = Task.objects.create(user=stranger, title="Not yours")
+        response = self.client.patch(detail, {"parent": foreign.pk}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(reverse("task-move"), {"task_ids": [foreign.pk], "parent": None}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TaskInboxTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="me@example.com", password="password123")
+        self.other = User.objects.create_user(email="boss@example.com", password="password123")
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("task-inbox")
+
+    def test_inbox_merges_created_and_assigned_without_duplicates(self):
+        """
+        Ensure the inbox walks created and assigned tasks newest first by cursor, listing tasks in both sources once.
+        """
+        expected = []
+        for i in range(7):
+            if i % 3 == 0:
+                task = Task.objects.create(user=self.other, assigned_to=self.user, title=f"assigned {i}")
+            elif i % 3 == 1:
+                task = Task.objects.create(user=self.user, title=f"created {i}")
+            else:
+                task = Task.objects.create(user=self.user, assigned_to=self.user, title=f"both {i}")
+            expected.append(task.title)
+        Task.objects.create(user=self.other, title="not mine")
+        expected.reverse()
+
+        titles = []
+        url = self.url + "?page_size=3"
+        pages = 0
+        while url:
+            with self.assertNumQueries(2):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            titles += [task["title"] for task in response.data["results"]]
+            url = response.data["next"]
+            pages += 1
+
+        self.assertEqual(titles, expected)
+        self.assertEqual(pages, 3)
+
+    def test_only_staff_assign_tasks_to_others(self):
+        """
+        Ensure a user can't push a task into someone else's inbox, can assign themselves, and staff can assign anyone.
+        """
+        response = self.client.post("/api/tasks/", {"title": "Spam", "assigned_to": self.other.pk}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("assigned_to", response.data)
+        self.assertFalse(Task.objects.filter(assigned_to=self.other).exists())
+
+        response = self.client.post("/api/tasks/", {"title": "Mine", "assigned_to": self.user.pk}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        staff = User.objects.create_user(email="lead@example.com", password="password123", is_staff=True)
+        self.client.force_authenticate(user=staff)
+        response = self.client.post("/api/tasks/", {"title": "Delegated", "assigned_to": self.other.pk}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_assignee_can_read_but_not_change_task(self):
+        """
+        Ensure an inbox entry assigned by someone else opens for the assignee, while edits and deletes stay with the owner.
+        """
+        task = Task.objects.create(user=self.other, assigned_to=self.user, title="Review the draft")
+        detail = reverse("task-detail", kwargs={"pk": task.pk})
+
+        response = self.client.get(detail)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["title"], "Review the draft")
+
+        self.assertEqual(self.client.patch(detail, {"title": "Hijacked"}, format="json").status_code, 404)
+        self.assertEqual(self.client.delete(detail).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn(task.pk, [t["id"] for t in self.client.get("/api/tasks/").data["results"]])
+
+        stranger = User.objects.create_user(email="stranger@example.com", password="password123")
+        self.client.force_authenticate(user=stranger)
+        self.assertEqual(self.client.get(detail).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_cursor(self):
+        """
+        Ensure a malformed cursor is rejected with 400.
+        """
+        response = self.client.get(self.url, {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TaskCommentAPITests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="author@example.com", password="password123")
+        self.other = User.objects.create_user(email="other@example.com", password="password123")
+        self.task = Task.objects.create(user=self.user, title="Discussed")
+        self.url = reverse("task-comment-list", kwargs={"task_pk": self.task.pk})
+        self.client.force_authenticate(user=self.user)
+
+    def test_create_and_delete_maintain_comment_count(self):
+        """
+        Ensure comments are created for the URL's task and its comment_count follows creates and deletes.
+        """
+        response = self.client.post(self.url, {"content": "First", "task": 999}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["task"], self.task.pk)
+        self.assertEqual(response.data["author_email"], "author@example.com")
+        self.client.post(self.url, {"content": "Second"}, format="json")
+
+        detail = self.client.get(reverse("task-detail", kwargs={"pk": self.task.pk}))
+        self.assertEqual(detail.data["comment_count"], 2)
+
+        self.client.delete(reverse("task-comment-detail", kwargs={"task_pk": self.task.pk, "pk": response.data["id"]}))
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.comment_count, 1)
+
+    def test_saving_a_stale_task_keeps_comment_count(self):
+        """
+        Ensure a full save of a task loaded before a comment was added does not overwrite the counter.
+        """
+        stale = Task.objects.get(pk=self.task.pk)
+        TaskComment.objects.create(task=self.task, author=self.user, content="New")
+        stale.title = "Renamed"
+        stale.save()
+
+        self.task.refresh_from_db()
+        self.assertEqual((self.task.title, self.task.comment_count), ("Renamed", 1))
+
+    def test_cursor_pages_in_order_with_authors_in_one_query(self):
+        """
+        Ensure comments page oldest first by cursor and each page loads its authors in the same query.
+        """
+        TaskComment.objects.bulk_create(
+            TaskComment(task=self.task, author=self.user, content=f"Comment {i}") for i in range(5)
+        )
+
+        # The task ownership check and one comments query joined to authors.
+        with self.assertNumQueries(2):
+            first = self.client.get(self.url, {"page_size": 3})
+        self.assertEqual([c["content"] for c in first.data["results"]], ["Comment 0", "Comment 1", "Comment 2"])
+        self.assertIsNone(first.data["previous"])
+
+        second = self.client.get(first.data["next"])
+        self.assertEqual([c["content"] for c in second.data["results"]], ["Comment 3", "Comment 4"])
+        self.assertIsNone(second.data["next"])
+
+    def test_comments_are_scoped_to_the_task_owner_and_author(self):
+        """
+        Ensure other users can't read or comment on a task, and only the author can edit a comment.
+        """
+        comment = TaskComment.objects.create(task=self.task, author=self.user, content="Mine")
+
+        self.client.force_authenticate(user=self.other)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.post(self.url, {"content": "Hi"}).status_code, status.HTTP_404_NOT_FOUND)
+        detail_url = reverse("task-comment-detail", kwargs={"task_pk": self.task.pk, "pk": comment.pk})
+        self.assertEqual(self.client.patch(detail_url, {"content": "Edited"}).status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TaskAttachmentAPITests(APITestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root, ATTACHMENT_UPLOAD_DIR=f"{media_root}/uploads")
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(email="owner@example.com", password="password123")
+        self.task = Task.objects.create(user=self.user, title="With files")
+        self.uploads_url = reverse("task-attachment-upload-list", kwargs={"task_pk": self.task.pk})
+        self.client.force_authenticate(user=self.user)
+        self.content = bytes(range(256)) * 40
+
+    def upload_url(self, upload_id, task=None):
+        task = task or self.task
+        return reverse("task-attachment-upload-detail", kwargs={"task_pk": task.pk, "pk": upload_id})
+
+    def send_chunk(self, upload_id, offset, data, task=None):
+        return self.client.generic(
+            "PATCH", self.upload_url(upload_id, task), data,
+            content_type="application/offset+octet-stream", HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def upload(self, content, filename="data.bin", chunk_size=4096):
+        response = self.client.post(self.uploads_url, {"filename": filename, "size": len(content)}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        upload_id = response.data["id"]
+        for offset in range(0, len(content), chunk_size):
+            response = self.send_chunk(upload_id, offset, content[offset:offset + chunk_size])
+        return response
+
+    def test_chunked_upload_resumes_and_becomes_attachment(self):
+        """
+        Ensure chunks must follow the stored offset, an upload can resume from it, and the last chunk creates the attachment.
+        """
+        response = self.client.post(self.uploads_url, {"filename": "data.bin", "size": len(self.content)}, format="json")
+        upload_id = response.data["id"]
+        self.assertEqual(response["Upload-Offset"], "0")
+
+        self.assertEqual(self.send_chunk(upload_id, 0, self.content[:6000]).status_code, status.HTTP_204_NO_CONTENT)
+        conflict = self.send_chunk(upload_id, 100, self.content[100:200])
+        self.assertEqual(conflict.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(conflict["Upload-Offset"], "6000")
+
+        resume = self.client.head(self.upload_url(upload_id))
+        offset = int(resume["Upload-Offset"])
+        response = self.send_chunk(upload_id, offset, self.content[offset:])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["sha256"], hashlib.sha256(self.content).hexdigest())
+        self.assertEqual(response.data["size"], len(self.content))
+        self.assertFalse(AttachmentUpload.objects.exists())
+
+    def test_identical_content_is_stored_once(self):
+        """
+        Ensure duplicate content shares one blob, and a known hash skips the transfer.
+        """
+        first = self.upload(self.content, "a.bin")
+        second = self.upload(self.content, "b.bin")
+        self.assertEqual(first.data["sha256"], second.data["sha256"])
+
+        known = self.client.post(
+            self.uploads_url,
+            {"filename": "c.bin", "size": len(self.content), "sha256": first.data["sha256"]},
+            format="json",
+        )
+        self.assertEqual(known.status_code, status.HTTP_200_OK)
+        self.assertEqual(known.data["filename"], "c.bin")
+        self.assertEqual(Blob.objects.count(), 1)
+        self.assertEqual(TaskAttachment.objects.count(), 3)
+
+    def test_hash_of_another_users_blob_cannot_be_claimed(self):
+        """
+        Ensure a hash alone doesn't attach another user's content; the bytes must be uploaded, after
+        which the server still deduplicates them into the existing blob.
+        """
+        other = User.objects.create_user(email="other@example.com", password="password123")
+        other_task = Task.objects.create(user=other, title="Private")
+        self.client.force_authenticate(user=other)
+        secret = self.client.post(
+            reverse("task-attachment-upload-list", kwargs={"task_pk": other_task.pk}),
+            {"filename": "secret.bin", "size": len(self.content)}, format="json",
+        )
+        self.send_chunk(secret.data["id"], 0, self.content, task=other_task)
+        sha256 = hashlib.sha256(self.content).hexdigest()
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(
+            self.uploads_url, {"filename": "claimed.bin", "size": len(self.content), "sha256": sha256}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response["Upload-Offset"], "0")
+        self.assertFalse(TaskAttachment.objects.filter(task=self.task).exists())
+
+        finished = self.send_chunk(response.data["id"], 0, self.content)
+        self.assertEqual(finished.status_code, status.HTTP_200_OK)
+        self.assertEqual(Blob.objects.count(), 1)
+
+    def test_checksum_mismatch_is_rejected(self):
+        """
+        Ensure an upload whose content doesn't match its declared sha256 is discarded.
+        """
+        response = self.client.post(
+            self.uploads_url, {"filename": "x.bin", "size": 3, "sha256": "0" * 64}, format="json"
+        )
+        response = self.send_chunk(response.data["id"], 0, b"abc")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Blob.objects.exists())
+        self.assertFalse(AttachmentUpload.objects.exists())
+
+    def test_empty_file_with_wrong_checksum_is_rejected(self):
+        """
+        Ensure an empty upload declaring another file's hash gets 400 and leaves nothing behind.
+        """
+        response = self.client.post(
+            self.uploads_url, {"filename": "empty.txt", "size": 0, "sha256": "0" * 64}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(AttachmentUpload.objects.exists())
+        self.assertFalse(TaskAttachment.objects.exists())
+
+        response = self.client.post(
+            self.uploads_url,
+            {"filename": "empty.txt", "size": 0, "sha256": hashlib.sha256(b"").hexdigest()},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["size"], 0)
+
+    def test_download_supports_ranges_and_etags(self):
+        """
+        Ensure downloads stream the whole file, single byte ranges, 416 for unsatisfiable ranges and 304 for a matching ETag.
+        """
+        attachment = self.upload(self.content).data
+        url = reverse("task-attachment-download", kwargs={"task_pk": self.task.pk, "pk": attachment["id"]})
+
+        full = self.client.get(url, HTTP_ACCEPT="application/octet-stream")
+        self.assertEqual(full.status_code, status.HTTP_200_OK)
+        self.assertEqual(b"".join(full.streaming_content), self.content)
+        self.assertIn('filename="data.bin"', full["Content-Disposition"])
+
+        partial = self.client.get(url, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(partial.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(partial["Content-Range"], f"bytes 10-19/{len(self.content)}")
+        self.assertEqual(b"".join(partial.streaming_content), self.content[10:20])
+
+        suffix = self.client.get(url, HTTP_RANGE="bytes=-5")
+        self.assertEqual(b"".join(suffix.streaming_content), self.content[-5:])
+
+        self.assertEqual(
+            self.client.get(url, HTTP_RANGE=f"bytes={len(self.content)}-").status_code,
+            status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+        )
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=full["ETag"]).status_code, status.HTTP_304_NOT_MODIFIED
+        )
+
+    @override_settings(ATTACHMENT_SENDFILE="x-accel-redirect", ATTACHMENT_SENDFILE_PREFIX="/protected-media/")
+    def test_download_can_be_offloaded_to_the_proxy(self):
+        """
+        Ensure X-Accel-Redirect mode returns only headers pointing at the blob.
+        """
+        attachment = self.upload(self.content).data
+        url = reverse("task-attachment-download", kwargs={"task_pk": self.task.pk, "pk": attachment["id"]})
+
+        response = self.client.get(url)
+
+        blob = Blob.objects.get()
+        self.assertEqual(response["X-Accel-Redirect"], f"/protected-media/{blob.name}")
+        self.assertEqual(response.content, b"")
+
+    def test_deleting_last_attachment_removes_blob(self):
+        """
+        Ensure a blob's file is deleted with the last attachment that references it.
+        """
+        first = self.upload(self.content, "a.bin").data
+        second = self.upload(self.content, "b.bin").data
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse("task-attachment-detail", kwargs={"task_pk": self.task.pk, "pk": first["id"]}))
+        self.assertTrue(Blob.objects.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse("task-attachment-detail", kwargs={"task_pk": self.task.pk, "pk": second["id"]}))
+        self.assertFalse(Blob.objects.exists())
+
+
+class AsyncTaskAPITests(TestCase):
+    def setUp(self):
+        self.user1 = User.objects.create_user(email="async1@example.com", password="password123")
+        self.user2 = User.objects.create_user(email="async2@example.com", password="password123")
+        self.headers = {"Authorization": f"Bearer {RefreshToken.for_user(self.user1).access_token}"}
+        for i in range(12):
+            Task.objects.create(
+                user=self.user1,
+                title=f"Report {i}" if i % 2 else f"Errand {i}",
+                status="DONE" if i % 3 == 0 else "TODO",
+            )
+        self.other_task = Task.objects.create(user=self.user2, title="Report elsewhere")
+
+    async def test_list_matches_sync_viewset(self):
+        """
+        Ensure the async list returns the same page, filters and search as TaskViewSet.
+        """
+        for query in ["", "?page=2", "?status=TODO", "?search=report", "?status=TODO&search=report&page=1"]:
+            sync_response = await sync_to_async(self.client.get)(f"/api/tasks/{query}", headers=self.headers)
+            async_response = await self.async_client.get(f"/api/async/tasks/{query}", headers=self.headers)
+            self.assertEqual(async_response.status_code, status.HTTP_200_OK)
+
+            sync_data, async_data = sync_response.json(), async_response.json()
+            self.assertEqual(async_data["count"], sync_data["count"])
+            self.assertEqual(async_data["results"], sync_data["results"])
+            for link in ("next", "previous"):
+                self.assertEqual(
+                    async_data[link] and async_data[link].replace("/api/async/tasks/", "/api/tasks/"),
+                    sync_data[link],
+                )
+
+    async def test_invalid_filter_and_page(self):
+        """
+        Ensure invalid filters and pages produce the same errors as the sync view.
+        """
+        response = await self.async_client.get("/api/async/tasks/?status=NOPE", headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("status", response.json())
+
+        response = await self.async_client.get("/api/async/tasks/?page=9", headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_detail_is_scoped_to_owner(self):
+        """
+        Ensure the async detail view hides other users' tasks.
+        """
+        task = await Task.objects.filter(user=self.user1).afirst()
+        response = await self.async_client.get(f"/api/async/tasks/{task.pk}/", headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["title"], task.title)
+
+        response = await self.async_client.get(f"/api/async/tasks/{self.other_task.pk}/", headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_detail_matches_sync_viewset_for_assignee(self):
+        """
+        Ensure an assignee gets the same task, ETag and revalidation from the async and sync detail views.
+        """
+        assigned = await Task.objects.acreate(user=self.user2, assigned_to=self.user1, title="Review")
+        for path in (f"/api/tasks/{assigned.pk}/", f"/api/async/tasks/{assigned.pk}/"):
+            with self.subTest(path=path):
+                if path.startswith("/api/async/"):
+                    response = await self.async_client.get(path, headers=self.headers)
+                else:
+                    response = await sync_to_async(self.client.get)(path, headers=self.headers)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.json()["title"], "Review")
+                self.assertEqual(response["ETag"], '"1"')
+
+        response = await self.async_client.get(
+            f"/api/async/tasks/{assigned.pk}/", headers={**self.headers, "If-None-Match": '"1"'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_requires_authentication(self):
+        """
+        Ensure anonymous requests get a 401 with the Bearer challenge.
+        """
+        response = await self.async_client.get("/api/async/tasks/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn("Bearer", response["WWW-Authenticate"])
+
+    async def test_current_user(self):
+        """
+        Ensure the async /me endpoint returns the token's user.
+        """
+        response = await self.async_client.get("/api/async/accounts/me/", headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["email"], "async1@example.com")
+
+
+@override_settings(DATABASE_REPLICAS=["replica_1"])
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+
+    def test_reads_outside_a_request_use_primary(self):
+        """
+        Ensure background code (no request state) never reads from a replica.
+        """
+        self.assertEqual(self.router.db_for_read(Task), "default")
+
+    def test_request_reads_go_to_replica_until_it_writes(self):
+        """
+        Ensure a request reads from replicas until its first write pins it.
+        """
+        token = db_routers._state.set(db_routers.RoutingState())
+        try:
+            self.assertEqual(self.router.db_for_read(Task), "replica_1")
+            self.assertEqual(self.router.db_for_write(Task), "default")
+            self.assertEqual(self.router.db_for_read(Task), "default")
+        finally:
+            db_routers._state.reset(token)
+
+    def test_pinned_request_reads_primary(self):
+        """
+        Ensure a request carrying a pin reads from the primary.
+        """
+        token = db_routers._state.set(db_routers.RoutingState(pinned=True))
+        try:
+            self.assertEqual(self.router.db_for_read(Task), "default")
+        finally:
+            db_routers._state.reset(token)
+
+
+@skipUnless(settings.DATABASE_REPLICAS, "set DATABASE_REPLICA_URLS, e.g. to a second SQLite file")
+class ReplicaReadYourWritesTests(TransactionTestCase):
+    """
+    The replica is a separate, unreplicated database here, so anything
+    read from it is visibly stale.
+    """
+    databases = {"default", *settings.DATABASE_REPLICAS}
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="replica@example.com", password="password123")
+        for alias in settings.DATABASE_REPLICAS:
+            User.objects.using(alias).create(pk=self.user.pk, email=self.user.email, password=self.user.password)
+        self.headers = {"Authorization": f"Bearer {RefreshToken.for_user(self.user).access_token}"}
+
+    def test_writer_reads_own_writes(self):
+        """
+        Ensure the browser and the user that wrote read from the primary afterwards.
+        """
+        response = self.client.post("/api/tasks/", {"title": "Fresh"}, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        # Same client: pinned by cookie.
+        self.assertEqual(self.client.get("/api/tasks/", headers=self.headers).json()["count"], 1)
+
+        # Another device of the same user: pinned by the user key.
+        self.assertEqual(Client().get("/api/tasks/", headers=self.headers).json()["count"], 1)
+
+        # Once the pin expires, reads go back to the (stale) replica.
+        cache.clear()
+        self.assertEqual(Client().get("/api/tasks/", headers=self.headers).json()["count"], 0)
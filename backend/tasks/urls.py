@@ -1,8 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import TaskViewSet
+from .views import AttachmentUploadViewSet, TaskAttachmentViewSet, TaskCommentViewSet, TaskViewSet
 
 router = DefaultRouter()
+router.register(r'(?P<task_pk>\d+)/comments', TaskCommentViewSet, basename='task-comment')
+router.register(r'(?P<task_pk>\d+)/attachments/uploads', AttachmentUploadViewSet, basename='task-attachment-upload')
+router.register(r'(?P<task_pk>\d+)/attachments', TaskAttachmentViewSet, basename='task-attachment')
 router.register(r'', TaskViewSet, basename='task')
 
 urlpatterns = [
@@ -1,12 +1,61 @@
-from rest_framework import viewsets, filters
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import Http404, HttpResponseNotModified, JsonResponse
+from django.shortcuts import aget_object_or_404, get_object_or_404
+from django.utils.http import parse_etags, quote_etag
+from django.conf import settings
+from rest_framework import mixins, renderers, status, viewsets, filters
+from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from django_filters.rest_framework import DjangoFilterBackend
 
-from .models import Task
-from .serializers import TaskSerializer
+from config.async_api import AsyncPageNumberPagination, async_api_view
+from config.idempotency import idempotent
+
+from . import attachments, hierarchy, inbox
+from .models import AttachmentUpload, Task, TaskAttachment, TaskComment, TaskVersionConflict
+from .serializers import (
+    AttachmentUploadSerializer, TaskAttachmentSerializer, TaskCommentSerializer, TaskMoveSerializer, TaskSerializer,
+)
+
+
+def task_etag(task):
+    return quote_etag(str(task.version))
+
+
+def etag_matches(etag, header):
+    """
+    Weak comparison: the version tag matches whether or not the client got
+    it back weakened by compression (config.compression).
+    """
+    return etag in (tag.removeprefix("W/") for tag in parse_etags(header))
+
+
+def visible_tasks(user, action):
+    """
+    The tasks `user` may reach through `action`: their own, plus those
+    assigned to them when only reading one (retrieve). Shared by the sync
+    and async views.
+    """
+    if action == "retrieve":
+        tasks = Task.objects.filter(Q(user=user) | Q(assigned_to=user))
+    else:
+        tasks = Task.objects.filter(user=user)
+    return tasks.order_by("-created_at")
 
 
 class TaskViewSet(viewsets.ModelViewSet):
+    """
+    Tasks of the current user. A task's assignee can also read it (GET
+    <id>/, so inbox entries open) but not change it; only staff assign
+    tasks to other users. Detail responses carry the task version as
+    ETag; updates and deletes sent with If-Match only apply to that version
+    and otherwise return 412, so concurrent edits can't silently overwrite
+    each other. Creation honours Idempotency-Key (config.idempotency).
+    """
     permission_classes = [IsAuthenticated]
     serializer_class = TaskSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
@@ -14,7 +63,301 @@ class TaskViewSet(viewsets.ModelViewSet):
     search_fields = ['title']
 
     def get_queryset(self):
-        return Task.objects.filter(user=self.request.user).order_by("-created_at")
+        return visible_tasks(self.request.user, self.action)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response["ETag"] = quote_etag(str(response.data["version"]))
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        task = self.get_object()
+        etag = task_etag(task)
+        if etag_matches(etag, request.headers.get("If-None-Match", "")):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(self.get_serializer(task).data)
+        response["ETag"] = etag
+        return response
+
+    def update(self, request, *args, **kwargs):
+        partial = kwargs.pop("partial", False)
+        task = self.get_object()
+        if not self._if_match(task):
+            return self._precondition_failed(task)
+        serializer = self.get_serializer(task, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        try:
+            # A single UPDATE ... WHERE id = ? AND version = ?; no row lock is taken.
+            self.perform_update(serializer)
+        except TaskVersionConflict:
+            return self._precondition_failed(None)
+        response = Response(serializer.data)
+        response["ETag"] = task_etag(task)
+        return response
+
+    def destroy(self, request, *args, **kwargs):
+        task = self.get_object()
+        if not self._if_match(task):
+            return self._precondition_failed(task)
+        deleted, _ = Task.objects.filter(pk=task.pk, version=task.version).delete()
+        if not deleted:
+            return self._precondition_failed(None)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def _if_match(self, task):
+        header = self.request.headers.get("If-Match")
+        if header is None or header.strip() == "*":
+            return True
+        return etag_matches(task_etag(task), header)
+
+    def _precondition_failed(self, task):
+        response = Response(
+            {"detail": "The task was changed by someone else. Reload it and try again."},
+            status=status.HTTP_412_PRECONDITION_FAILED,
+        )
+        if task is not None:
+            response["ETag"] = task_etag(task)
+        return response
+
+    @action(detail=False)
+    def inbox(self, request, *args, **kwargs):
+        """
+        GET /api/tasks/inbox/?cursor=<next>&page_size=<n>
+        Tasks the user created or is assigned, newest first (see tasks.inbox).
+        """
+        try:
+            page_size = min(max(int(request.query_params.get("page_size", 20)), 1), 100)
+            tasks, next_cursor = inbox.inbox_page(request.user, request.query_params.get("cursor"), page_size)
+        except ValueError:
+            return Response({"detail": "Invalid cursor or page_size."}, status=status.HTTP_400_BAD_REQUEST)
+        next_url = None
+        if next_cursor is not None:
+            next_url = replace_query_param(request.build_absolute_uri(), "cursor", next_cursor)
+        return Response({"next": next_url, "results": self.get_serializer(tasks, many=True).data})
+
+    @action(detail=True)
+    def subtree(self, request, *args, **kwargs):
+        """GET /api/tasks/<pk>/subtree/ - the task and its descendants, with their depth below it."""
+        tasks = hierarchy.subtree(self.get_object())
+        return Response([{**self.get_serializer(task).data, "depth": task.depth} for task in tasks])
+
+    @action(detail=True)
+    def ancestors(self, request, *args, **kwargs):
+        """GET /api/tasks/<pk>/ancestors/ - breadcrumbs, root first."""
+        return Response(self.get_serializer(hierarchy.ancestors(self.get_object()), many=True).data)
+
+    @action(detail=True)
+    def progress(self, request, *args, **kwargs):
+        """GET /api/tasks/<pk>/progress/ - done/total over all descendants."""
+        task = self.get_object()
+        return Response({"id": task.pk, **hierarchy.progress([task.pk])[task.pk]})
+
+    @action(detail=False, methods=["post"])
+    def move(self, request, *args, **kwargs):
+        """
+        POST /api/tasks/move/ {"task_ids": [...], "parent": <id> | null}
+        Moves the tasks, with their subtrees, under `parent` (or to the top level).
+        """
+        serializer = TaskMoveSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        task_ids = set(serializer.validated_data["task_ids"])
+        parent_id = serializer.validated_data["parent"]
+
+        owned = self.get_queryset()
+        if owned.filter(pk__in=task_ids).count() != len(task_ids) or (
+            parent_id is not None and not owned.filter(pk=parent_id).exists()
+        ):
+            raise Http404
+        try:
+            moved = hierarchy.move_subtrees(task_ids, parent_id)
+        except hierarchy.InvalidMove as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"moved": sorted(moved), "parent": parent_id})
+
+
+class TaskCommentPagination(CursorPagination):
+    # Walks the (task, created_at) index; the cursor is opaque and stable
+    # while new comments are added.
+    ordering = "created_at"
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+
+class TaskChildMixin:
+    """For views nested under /api/tasks/<task_pk>/: the task must belong to the user."""
+
+    def get_task(self):
+        if not hasattr(self, "_task"):
+            self._task = get_object_or_404(Task.objects.only("pk"), pk=self.kwargs["task_pk"], user=self.request.user)
+        return self._task
+
+
+class TaskCommentViewSet(TaskChildMixin, viewsets.ModelViewSet):
+    """
+    /api/tasks/<task_pk>/comments/
+    Comments on one of the user's tasks, oldest first. Only the author can
+    edit or delete a comment.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = TaskCommentSerializer
+    pagination_class = TaskCommentPagination
+
+    def get_queryset(self):
+        if getattr(self, "swagger_fake_view", False):
+            return TaskComment.objects.none()
+        queryset = TaskComment.objects.filter(task=self.get_task()).select_related("author")
+        if self.action not in ("list", "retrieve"):
+            queryset = queryset.filter(author=self.request.user)
+        return queryset
+
+    def perform_create(self, serializer):
+        serializer.save(task=self.get_task(), author=self.request.user)
+
+
+class PassthroughRenderer(renderers.BaseRenderer):
+    """Lets file downloads skip content negotiation; the view returns the response itself."""
+    media_type = "*/*"
+    format = "bin"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data
+
+
+class TaskAttachmentViewSet(TaskChildMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
+                            mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    /api/tasks/<task_pk>/attachments/
+    Attachments of one of the user's tasks. New ones are created through
+    the uploads endpoint; <pk>/download/ returns the content (Range aware).
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = TaskAttachmentSerializer
+
+    def get_queryset(self):
+        if getattr(self, "swagger_fake_view", False):
+            return TaskAttachment.objects.none()
+        return TaskAttachment.objects.filter(task=self.get_task()).select_related("blob", "uploaded_by")
+
+    @action(detail=True, renderer_classes=[PassthroughRenderer])
+    def download(self, request, *args, **kwargs):
+        return attachments.download_response(request, self.get_object())
+
+
+class AttachmentUploadViewSet(TaskChildMixin, mixins.CreateModelMixin, mixins.RetrieveModelMixin,
+                              mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    /api/tasks/<task_pk>/attachments/uploads/
+    Resumable uploads (see tasks.attachments):
+    POST {filename, size, content_type?, sha256?} -> 201 with the upload, or
+        200 with the attachment when no transfer is needed (empty file, or
+        content the user already attached elsewhere).
+    PATCH <id>/ with an Upload-Offset header and the next bytes as an
+        application/offset+octet-stream body -> 204 with the new
+        Upload-Offset, 200 with the attachment after the last chunk, or
+        409 with the expected Upload-Offset.
+    GET/HEAD <id>/ -> the upload, Upload-Offset tells where to resume.
+    DELETE <id>/ abandons the upload.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = AttachmentUploadSerializer
+    chunk_content_types = ("application/offset+octet-stream", "application/octet-stream")
+
+    def get_queryset(self):
+        if getattr(self, "swagger_fake_view", False):
+            return AttachmentUpload.objects.none()
+        return AttachmentUpload.objects.filter(task=self.get_task(), uploaded_by=self.request.user)
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            upload, attachment = attachments.open_upload(self.get_task(), request.user, **serializer.validated_data)
+        except attachments.UploadChecksumMismatch as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        if attachment is not None:
+            return Response(TaskAttachmentSerializer(attachment).data, status=status.HTTP_200_OK)
+        return self._upload_response(upload, status.HTTP_201_CREATED)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._upload_response(self.get_object(), status.HTTP_200_OK)
+
+    def partial_update(self, request, *args, **kwargs):
+        upload = self.get_object()
+        # The body is read straight from the request stream; request.data is
+        # never touched, so the chunk isn't parsed or buffered.
+        if request.content_type.split(";")[0].strip() not in self.chunk_content_types:
+            return Response(
+                {"detail": f"Chunks must be sent as {self.chunk_content_types[0]}."},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+        try:
+            offset = int(request.headers["Upload-Offset"])
+            length = int(request.META.get("CONTENT_LENGTH") or 0)
+        except (KeyError, ValueError):
+            return Response({"detail": "Upload-Offset and Content-Length headers are required."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if length > settings.ATTACHMENT_CHUNK_MAX_SIZE:
+            return Response({"detail": f"Chunks are limited to {settings.ATTACHMENT_CHUNK_MAX_SIZE} bytes."},
+                            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        try:
+            upload = attachments.append_chunk(upload, offset, request, length)
+        except attachments.UploadOffsetMismatch as exc:
+            response = Response({"detail": str(exc)}, status=status.HTTP_409_CONFLICT)
+            response["Upload-Offset"] = str(exc.offset)
+            return response
+        if not upload.is_complete:
+            response = Response(status=status.HTTP_204_NO_CONTENT)
+            response["Upload-Offset"] = str(upload.received)
+            return response
+
+        try:
+            attachment = attachments.complete_upload(upload)
+        except attachments.UploadChecksumMismatch as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(TaskAttachmentSerializer(attachment).data, status=status.HTTP_200_OK)
+
+    def perform_destroy(self, instance):
+        attachments.discard_upload(instance)
+
+    def _upload_response(self, upload, status_code):
+        response = Response(self.get_serializer(upload).data, status=status_code)
+        response["Upload-Offset"] = str(upload.received)
+        return response
+
+
+def _filtered_tasks(request, user, action):
+    # Reuse TaskViewSet's filter backends so filtering and search stay identical.
+    view = TaskViewSet(request=request, action=action, format_kwarg=None)
+    return view.filter_queryset(visible_tasks(user, action))
+
+
+@async_api_view
+async def task_list_async(request, user):
+    """GET /api/async/tasks/ - async counterpart of TaskViewSet.list."""
+    paginator = AsyncPageNumberPagination()
+    page = await paginator.apaginate_queryset(_filtered_tasks(request, user, "list"), request)
+    data = TaskSerializer(page, many=True).data
+    return JsonResponse(paginator.get_paginated_response(data).data)
+
+
+@async_api_view
+async def task_detail_async(request, user, pk):
+    """GET /api/async/tasks/<pk>/ - async counterpart of TaskViewSet.retrieve."""
+    try:
+        task = await aget_object_or_404(_filtered_tasks(request, user, "retrieve"), pk=pk)
+    except (TypeError, ValueError, ValidationError):
+        raise Http404
+    etag = task_etag(task)
+    if etag_matches(etag, request.headers.get("If-None-Match", "")):
+        response = HttpResponseNotModified()
+    else:
+        response = JsonResponse(TaskSerializer(task).data)
+    response["ETag"] = etag
+    return response
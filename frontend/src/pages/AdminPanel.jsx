@@ -1,53 +1,96 @@
 import React, { useState, useEffect } from 'react';
 import './AdminPanel.css';
 
+const PAGE_SIZE = 50;
+
+const ORDERINGS = [
+  { value: '-total_tasks', label: 'Most tasks' },
+  { value: '-open_tasks', label: 'Most open tasks' },
+  { value: '-last_activity_at', label: 'Recently active' },
+  { value: 'email', label: 'Email (A-Z)' },
+];
+
 function AdminPanel() {
   const [users, setUsers] = useState([]);
-  const [selectedUsers, setSelectedUsers] = useState(new Set());
+  const [count, setCount] = useState(0);
+  const [page, setPage] = useState(1);
+  const [search, setSearch] = useState('');
+  const [ordering, setOrdering] = useState(ORDERINGS[0].value);
+  // Selected users by id -> email, kept across pages and searches.
+  const [selectedUsers, setSelectedUsers] = useState(new Map());
   const [message, setMessage] = useState('');
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
   const [success, setSuccess] = useState('');
 
   useEffect(() => {
-    fetchUserOverview();
-  }, []);
+    // Wait for typing to pause before searching; drop responses for superseded queries.
+    const controller = new AbortController();
+    const timer = setTimeout(
+      () => fetchUserOverview(page, search, ordering, controller.signal),
+      search ? 300 : 0,
+    );
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [page, search, ordering]);
 
-  async function fetchUserOverview() {
+  async function fetchUserOverview(page, search, ordering, signal) {
     try {
       setLoading(true);
-      const response = await fetch('/api/admin/overview/', {
+      const params = new URLSearchParams({ page, page_size: PAGE_SIZE, ordering });
+      if (search.trim()) params.set('search', search.trim());
+      const response = await fetch(`/api/admin/overview/?${params}`, {
         headers: {
           'Authorization': `Bearer ${localStorage.getItem('access_token')}`,
         },
+        signal,
       });
       if (!response.ok) throw new Error('Failed to fetch users');
       const data = await response.json();
-      setUsers(data);
+      setUsers(data.results);
+      setCount(data.count);
       setError('');
     } catch (err) {
+      if (err.name === 'AbortError') return;
       setError(err.message);
     } finally {
-      setLoading(false);
+      if (!signal.aborted) setLoading(false);
     }
   }
 
-  function toggleUser(userId) {
-    const newSelected = new Set(selectedUsers);
-    if (newSelected.has(userId)) {
-      newSelected.delete(userId);
+  const pageCount = Math.max(1, Math.ceil(count / PAGE_SIZE));
+  const pageSelected = users.length > 0 && users.every(u => selectedUsers.has(u.id));
+
+  function handleSearch(value) {
+    setSearch(value);
+    setPage(1);
+  }
+
+  function handleOrdering(value) {
+    setOrdering(value);
+    setPage(1);
+  }
+
+  function toggleUser(user) {
+    const newSelected = new Map(selectedUsers);
+    if (newSelected.has(user.id)) {
+      newSelected.delete(user.id);
     } else {
-      newSelected.add(userId);
+      newSelected.set(user.id, user.email);
     }
     setSelectedUsers(newSelected);
   }
 
-  function selectAll() {
-    if (selectedUsers.size === users.length) {
-      setSelectedUsers(new Set());
+  function selectPage() {
+    const newSelected = new Map(selectedUsers);
+    if (pageSelected) {
+      users.forEach(u => newSelected.delete(u.id));
     } else {
-      setSelectedUsers(new Set(users.map(u => u.id)));
+      users.forEach(u => newSelected.set(u.id, u.email));
     }
+    setSelectedUsers(newSelected);
   }
 
   async function handleSendEmail() {
@@ -65,9 +108,7 @@ function AdminPanel() {
       setError('');
       setSuccess('');
       
-      const recipients = users
-        .filter(u => selectedUsers.has(u.id))
-        .map(u => u.email);
+      const recipients = [...selectedUsers.values()];
 
       const response = await fetch('/api/admin/notify/', {
         method: 'POST',
@@ -89,7 +130,7 @@ function AdminPanel() {
       const data = await response.json();
       setSuccess(`Email queued successfully! Job ID: ${data.job_id}`);
       setMessage('');
-      setSelectedUsers(new Set());
+      setSelectedUsers(new Map());
     } catch (err) {
       setError(err.message);
     } finally {
@@ -111,10 +152,30 @@ function AdminPanel() {
         <div className="panel-head">
           <h2 className="panel-title">Users Overview</h2>
           <p className="panel-subtitle">
-            {selectedUsers.size} of {users.length} users selected
+            {selectedUsers.size} of {count} users selected
           </p>
         </div>
 
+        <div className="overview-controls">
+          <div className="form-field">
+            <label>Search by email</label>
+            <input
+              type="search"
+              value={search}
+              onChange={(e) => handleSearch(e.target.value)}
+              placeholder="name@example.com"
+            />
+          </div>
+          <div className="form-field">
+            <label>Sort by</label>
+            <select value={ordering} onChange={(e) => handleOrdering(e.target.value)}>
+              {ORDERINGS.map(o => (
+                <option key={o.value} value={o.value}>{o.label}</option>
+              ))}
+            </select>
+          </div>
+        </div>
+
         {loading && !users.length ? (
           <div className="info-box">Loading users...</div>
         ) : (
@@ -125,8 +186,8 @@ function AdminPanel() {
                   <th>
                     <input
                       type="checkbox"
-                      checked={selectedUsers.size === users.length && users.length > 0}
-                      onChange={selectAll}
+                      checked={pageSelected}
+                      onChange={selectPage}
                     />
                   </th>
                   <th>Email</th>
@@ -142,7 +203,7 @@ function AdminPanel() {
                       <input
                         type="checkbox"
                         checked={selectedUsers.has(user.id)}
-                        onChange={() => toggleUser(user.id)}
+                        onChange={() => toggleUser(user)}
                       />
                     </td>
                     <td>{user.email}</td>
@@ -155,6 +216,16 @@ function AdminPanel() {
             </table>
           </div>
         )}
+
+        <div className="pagination">
+          <button onClick={() => setPage(page - 1)} disabled={loading || page <= 1}>
+            Previous
+          </button>
+          <span>Page {page} of {pageCount}</span>
+          <button onClick={() => setPage(page + 1)} disabled={loading || page >= pageCount}>
+            Next
+          </button>
+        </div>
       </section>
 
       <section className="panel">